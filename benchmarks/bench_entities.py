@@ -0,0 +1,179 @@
+"""Encoding and decoding 100k entities with dataclasses.asdict and
+Entity(**response), compared with the generated per-class codecs, and
+reading a couple of entregas from large planos de entregas with eager and
+lazy nested decoding.
+
+    python benchmarks/bench_entities.py
+"""
+
+import dataclasses
+import os
+import sys
+import time
+from collections.abc import Callable, Sequence
+from typing import Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from api_pgd_client import entities  # noqa: E402
+
+COUNT = 100_000
+
+
+def build_planos_trabalho() -> list[entities.PlanoDeTrabalho]:
+    return [
+        entities.PlanoDeTrabalho(
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            id_plano_trabalho=f"2024-{index:06d}",
+            status=3,
+            cod_unidade_executora=1000 + index % 50,
+            cpf_participante=f"{index:011d}",
+            matricula_siape=f"{index:07d}",
+            data_inicio="2024-01-01",
+            data_termino="2024-12-31",
+            carga_horaria_disponivel=40,
+            contribuicoes=[
+                {
+                    "id_contribuicao": f"{index}-{item}",
+                    "tipo_contribuicao": 1,
+                    "percentual_contribuicao": 25,
+                    "id_plano_entregas": "2024-PE",
+                    "id_entrega": f"E-{item}",
+                }
+                for item in range(4)
+            ],
+        )
+        for index in range(COUNT)
+    ]
+
+
+PLANOS_ENTREGAS = 100
+ENTREGAS = 5_000
+
+
+def build_planos_entregas() -> list[dict[str, Any]]:
+    return [
+        {
+            "origem_unidade": "SIAPE",
+            "id_plano_entregas": f"2024-{index:04d}",
+            "entregas": [
+                {
+                    "id_entrega": f"{index}-{item}",
+                    "nome_entrega": f"Entrega {item}",
+                    "meta_entrega": 100,
+                    "data_entrega": "2024-06-30",
+                    "nome_unidade_demandante": "Secretaria",
+                    "nome_unidade_destinataria": "Diretoria",
+                }
+                for item in range(ENTREGAS)
+            ],
+        }
+        for index in range(PLANOS_ENTREGAS)
+    ]
+
+
+def read_two_entregas(**kwargs: bool) -> Callable[[dict[str, Any]], Any]:
+    def read(data: dict[str, Any]) -> tuple[int, str]:
+        plano_entregas = entities.PlanoDeEntregas.from_dict(data, **kwargs)
+        entregas: Any = plano_entregas.entregas
+        return entregas[0].meta_entrega, entregas[-1].nome_entrega
+
+    return read
+
+
+def read_two_entregas_and_encode(**kwargs: bool) -> Callable[[dict[str, Any]], Any]:
+    def read(data: dict[str, Any]) -> dict[str, Any]:
+        plano_entregas = entities.PlanoDeEntregas.from_dict(data, **kwargs)
+        entregas: Any = plano_entregas.entregas
+        entregas[0].meta_entrega, entregas[-1].nome_entrega
+        return plano_entregas.to_dict()
+
+    return read
+
+
+def legacy_from_dict(data: dict[str, Any]) -> entities.PlanoDeTrabalho:
+    return entities.PlanoDeTrabalho(**data)
+
+
+def measure(function: Callable[[Any], Any], items: Sequence[Any]) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    planos_trabalho = build_planos_trabalho()
+    responses = [plano_trabalho.to_dict() for plano_trabalho in planos_trabalho]
+    # The API may return fields this client does not know about yet, which
+    # Entity(**response) rejects, so the legacy case only gets known fields.
+    extended = [response | {"campo_novo": "valor"} for response in responses]
+    cases: list[
+        tuple[str, Callable[[Any], Any], Callable[[Any], Any], Sequence[Any]]
+    ] = [
+        (
+            "to_dict",
+            dataclasses.asdict,
+            entities.PlanoDeTrabalho.to_dict,
+            planos_trabalho,
+        ),
+        ("from_dict", legacy_from_dict, entities.PlanoDeTrabalho.from_dict, responses),
+        (
+            "from_dict (unknown keys)",
+            legacy_from_dict,
+            entities.PlanoDeTrabalho.from_dict,
+            extended,
+        ),
+        (
+            "from_dict (nested)",
+            lambda data: entities.PlanoDeTrabalho(
+                **{
+                    **data,
+                    "contribuicoes": [
+                        entities.Contribuicao(**item) for item in data["contribuicoes"]
+                    ],
+                }
+            ),
+            lambda data: entities.PlanoDeTrabalho.from_dict(data, nested=True),
+            responses,
+        ),
+    ]
+    print(f"{COUNT} entities")
+    print(f"{'case':<26}{'before (s)':>12}{'after (s)':>12}{'speedup':>10}")
+    for name, before, after, items in cases:
+        after_s = measure(after, items)
+        try:
+            before_s = measure(before, items)
+        except TypeError:
+            print(f"{name:<26}{'TypeError':>12}{after_s:>12.3f}{'-':>10}")
+            continue
+        print(f"{name:<26}{before_s:>12.3f}{after_s:>12.3f}{before_s / after_s:>9.1f}x")
+
+    planos_entregas = build_planos_entregas()
+    lazy_cases = [
+        (
+            "read 2 entregas",
+            read_two_entregas(nested=True),
+            read_two_entregas(lazy=True),
+        ),
+        (
+            "read 2 + to_dict",
+            read_two_entregas_and_encode(nested=True),
+            read_two_entregas_and_encode(lazy=True),
+        ),
+    ]
+    print()
+    print(f"{PLANOS_ENTREGAS} planos de entregas with {ENTREGAS} entregas each")
+    print(f"{'case':<26}{'nested (s)':>12}{'lazy (s)':>12}{'speedup':>10}")
+    for name, eager, lazy in lazy_cases:
+        eager_s = measure(eager, planos_entregas)
+        lazy_s = measure(lazy, planos_entregas)
+        print(f"{name:<26}{eager_s:>12.3f}{lazy_s:>12.3f}{eager_s / lazy_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Memory held by a batch of decoded planos de trabalho and participantes,
+with the regular entities and with the slotted variants plus interning.
+
+    python benchmarks/bench_entities_memory.py [count]
+"""
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from typing import Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from api_pgd_client import entities  # noqa: E402
+
+COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+
+def build_payload() -> str:
+    # Serialized and parsed back so every record owns its strings, as it
+    # happens with records read from the API, a database or a file.
+    records: list[dict[str, Any]] = []
+    for index in range(COUNT):
+        records.append(
+            {
+                "origem_unidade": "SIAPE",
+                "cod_unidade_autorizadora": 999,
+                "id_plano_trabalho": f"2024-{index:07d}",
+                "status": 3,
+                "cod_unidade_executora": 1000 + index % 50,
+                "cpf_participante": f"{index:011d}",
+                "matricula_siape": f"{index:07d}",
+                "data_inicio": f"2024-{index % 12 + 1:02d}-01",
+                "data_termino": "2024-12-31",
+                "carga_horaria_disponivel": 40,
+            }
+        )
+        records.append(
+            {
+                "cpf": f"{index:011d}",
+                "matricula_siape": f"{index:07d}",
+                "origem_unidade": "SIAPE",
+                "cod_unidade_autorizadora": 999,
+                "cod_unidade_lotacao": 1000 + index % 50,
+                "cod_unidade_instituidora": 1,
+                "situacao": 1,
+                "modalidade_execucao": 2,
+                "data_assinatura_tcr": f"2024-{index % 12 + 1:02d}-01",
+            }
+        )
+    return json.dumps(records)
+
+
+def measure(
+    payload: str,
+    plano_trabalho: type[entities.BaseEntity],
+    participante: type[entities.BaseEntity],
+    **kwargs: bool,
+) -> int:
+    gc.collect()
+    tracemalloc.start()
+    records = json.loads(payload)
+    batch = [
+        (participante if "cpf" in record else plano_trabalho).from_dict(
+            record, **kwargs
+        )
+        for record in records
+    ]
+    del records
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del batch
+    return current
+
+
+def main() -> None:
+    payload = build_payload()
+    cases: list[
+        tuple[
+            str, type[entities.BaseEntity], type[entities.BaseEntity], dict[str, bool]
+        ]
+    ] = [
+        ("regular", entities.PlanoDeTrabalho, entities.Participante, {}),
+        (
+            "slotted",
+            entities.SlottedPlanoDeTrabalho,
+            entities.SlottedParticipante,
+            {},
+        ),
+        (
+            "slotted + intern",
+            entities.SlottedPlanoDeTrabalho,
+            entities.SlottedParticipante,
+            {"intern": True},
+        ),
+    ]
+    print(f"{COUNT} planos de trabalho + {COUNT} participantes")
+    print(f"{'layout':<20}{'memory (MiB)':>14}{'ratio':>8}")
+    baseline = None
+    for name, plano_trabalho, participante, kwargs in cases:
+        memory = measure(payload, plano_trabalho, participante, **kwargs)
+        baseline = baseline or memory
+        print(f"{name:<20}{memory / 2**20:>14.1f}{memory / baseline:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""Throughput and latency of the client's hot paths against a local fake
+PGD API, plus CPU-only microbenchmarks, saved as JSON so runs can be
+compared.
+
+    python benchmarks/bench_suite.py run
+    python benchmarks/bench_suite.py run --quick --output after.json
+    python benchmarks/bench_suite.py compare before.json after.json
+
+run measures requests/second and p50/p99 latency of enviar_plano_trabalho
+(planos with 10, 1k and 10k contribuicoes), consultar_participante and
+token refresh at each concurrency level, and the time per call of to_dict,
+the JSON encoding done by do_put and building the default headers. Results
+go to benchmarks/results/ (or --output); --save-baseline also stores them
+as the baseline, which compare uses when given a single file. compare
+flags every metric that got worse by more than --threshold and exits with
+status 1 if any did. Baselines only make sense on the machine they were
+taken on.
+"""
+
+import argparse
+import datetime
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from collections.abc import Callable, Iterable, Sequence
+from concurrent import futures
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("PGD_SOURCE_SYSTEM_NAME", "benchmark")
+os.environ.setdefault("PGD_SOURCE_SYSTEM_VERSION", "0.0.0")
+os.environ.setdefault("PGD_API_USERNAME", "benchmark")
+os.environ.setdefault("PGD_API_PASSWORD", "benchmark")
+
+from api_pgd_client import client, entities, transports  # noqa: E402
+from api_pgd_client.testing import FakePgdApiServer  # noqa: E402
+from api_pgd_client.utils import encoding  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+CONCURRENCY_LEVELS = (1, 4, 16)
+CONTRIBUICOES = (10, 1_000, 10_000)
+REQUESTS = 400
+# Whether a bigger value of each metric is better or worse.
+HIGHER_IS_BETTER = {"rps": True, "p50_ms": False, "p99_ms": False, "us": False}
+
+
+def build_plano_trabalho(index: int, contribuicoes: int) -> entities.PlanoDeTrabalho:
+    # Nested entities, not dicts, so to_dict has them to encode.
+    items: list[Any] = [
+        entities.Contribuicao(
+            id_contribuicao=f"{index}-{item}",
+            tipo_contribuicao=1,
+            percentual_contribuicao=25,
+            id_plano_entregas="2024-PE",
+            id_entrega=f"E-{item}",
+        )
+        for item in range(contribuicoes)
+    ]
+    return entities.PlanoDeTrabalho(
+        origem_unidade="SIAPE",
+        cod_unidade_autorizadora=999,
+        id_plano_trabalho=f"2024-{index:06d}",
+        status=3,
+        cod_unidade_executora=1000 + index % 50,
+        cpf_participante=f"{index:011d}",
+        matricula_siape=f"{index:07d}",
+        data_inicio="2024-01-01",
+        data_termino="2024-12-31",
+        carga_horaria_disponivel=40,
+        contribuicoes=items,
+    )
+
+
+def percentile(values: Sequence[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def run_load(
+    function: Callable[[Any], Any], items: Iterable[Any], concurrency: int
+) -> dict[str, float]:
+    # Calls function on every item from concurrency threads; the latency of
+    # each call and the wall time of the whole run make the result.
+    def timed(item: Any) -> float:
+        start = time.perf_counter()
+        function(item)
+        return time.perf_counter() - start
+
+    with futures.ThreadPoolExecutor(concurrency) as executor:
+        start = time.perf_counter()
+        latencies = list(executor.map(timed, items))
+        wall = time.perf_counter() - start
+    return summarize(latencies, wall)
+
+
+def summarize(latencies: Sequence[float], wall: float) -> dict[str, float]:
+    return {
+        "rps": len(latencies) / wall,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def bench_token_refresh(
+    api_client: client.ApiClient, requests: int, concurrency: int
+) -> dict[str, float]:
+    # Each round drops the token, as a 401 would, and then concurrency
+    # calls find it missing at once and wait for a single new one.
+    latencies: list[float] = []
+    wall = 0.0
+
+    def timed(_: int) -> float:
+        start = time.perf_counter()
+        api_client.default_headers
+        return time.perf_counter() - start
+
+    with futures.ThreadPoolExecutor(concurrency) as executor:
+        for _ in range(max(1, requests // concurrency)):
+            api_client.token_manager.invalidate(api_client.token_manager.current)
+            start = time.perf_counter()
+            latencies.extend(executor.map(timed, range(concurrency)))
+            wall += time.perf_counter() - start
+    return summarize(latencies, wall)
+
+
+def measure(function: Callable[[], Any]) -> dict[str, float]:
+    # Best of five runs, each long enough (about 0.2s) to time reliably.
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return {"us": min(timer.repeat(5, number)) / number * 1e6}
+
+
+def build_client(server: FakePgdApiServer, concurrency: int) -> client.ApiClient:
+    return client.ApiClient(
+        domain=server.url,
+        origem_unidade="SIAPE",
+        cod_unidade_autorizadora=999,
+        transport=transports.SessionTransport(pool_maxsize=concurrency),
+    )
+
+
+def bench_requests(
+    server: FakePgdApiServer,
+    requests: int,
+    concurrency_levels: Sequence[int],
+    log: Callable[[str], None],
+) -> dict[str, dict[str, float]]:
+    results = {}
+    api_client = build_client(server, max(concurrency_levels))
+    for contribuicoes in CONTRIBUICOES:
+        # Big planos take long enough to send that fewer of them will do.
+        count = (
+            max(20, requests * 10 // contribuicoes) if contribuicoes > 10 else requests
+        )
+        planos = [build_plano_trabalho(index, contribuicoes) for index in range(count)]
+        for concurrency in concurrency_levels:
+            name = (
+                f"enviar_plano_trabalho[contribuicoes={contribuicoes},c={concurrency}]"
+            )
+            log(name)
+            results[name] = run_load(
+                api_client.enviar_plano_trabalho, planos, concurrency
+            )
+    for index in range(requests):
+        server.resources[f"/organizacao/SIAPE/999/{index}/participante/{index:07d}"] = {
+            "origem_unidade": "SIAPE",
+            "cod_unidade_autorizadora": 999,
+            "cod_unidade_lotacao": index,
+            "matricula_siape": f"{index:07d}",
+            "cpf": f"{index:011d}",
+            "situacao": 1,
+            "modalidade_execucao": 3,
+        }
+    for concurrency in concurrency_levels:
+        name = f"consultar_participante[c={concurrency}]"
+        log(name)
+        results[name] = run_load(
+            lambda index: api_client.consultar_participante(index, f"{index:07d}"),
+            range(requests),
+            concurrency,
+        )
+
+    for concurrency in concurrency_levels:
+        name = f"token_refresh[c={concurrency}]"
+        log(name)
+        results[name] = bench_token_refresh(api_client, requests, concurrency)
+    api_client.close()
+    return results
+
+
+def bench_cpu(log: Callable[[str], None]) -> dict[str, dict[str, float]]:
+    results = {}
+    for contribuicoes in CONTRIBUICOES:
+        plano_trabalho = build_plano_trabalho(0, contribuicoes)
+        data = plano_trabalho.to_dict()
+        name = f"to_dict[contribuicoes={contribuicoes}]"
+        log(name)
+        results[name] = measure(plano_trabalho.to_dict)
+        name = f"encode[contribuicoes={contribuicoes}]"
+        log(name)
+        results[name] = measure(functools.partial(encoding.encode_json, data))
+    api_client = client.ApiClient(domain="https://api-pgd.example")
+    token = {"access_token": "token", "token_type": "Bearer"}
+    api_client.token_manager.set(token)
+    log("default_headers")
+    results["default_headers"] = measure(lambda: api_client.default_headers)
+    log("build_default_headers")
+    results["build_default_headers"] = measure(
+        lambda: api_client.build_default_headers(token)
+    )
+    return results
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(arguments: argparse.Namespace) -> None:
+    requests = arguments.requests or (REQUESTS // 4 if arguments.quick else REQUESTS)
+    concurrency_levels = (
+        CONCURRENCY_LEVELS[:2] if arguments.quick else CONCURRENCY_LEVELS
+    )
+
+    def log(name: str) -> None:
+        print(f"  {name}", file=sys.stderr)
+
+    results: dict[str, dict[str, float]] = {}
+    if not arguments.cpu_only:
+        with FakePgdApiServer(latency=arguments.latency) as server:
+            results.update(bench_requests(server, requests, concurrency_levels, log))
+    results.update(bench_cpu(log))
+    report = {
+        "meta": {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "commit": get_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "orjson": encoding.HAS_ORJSON,
+            "requests": requests,
+            "latency": arguments.latency,
+        },
+        "results": results,
+    }
+    output = arguments.output or os.path.join(
+        RESULTS_DIR,
+        f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json",
+    )
+    paths = [output, BASELINE_PATH] if arguments.save_baseline else [output]
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+    print_results(results)
+    print(f"\nSaved to {', '.join(paths)}")
+
+
+def print_results(results: dict[str, dict[str, float]]) -> None:
+    print(f"{'benchmark':<52}{'rps':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'us':>12}")
+    for name, values in results.items():
+        print(
+            f"{name:<52}"
+            + "".join(
+                f"{values[metric]:>{width}.{digits}f}"
+                if metric in values
+                else " " * width
+                for metric, width, digits in (
+                    ("rps", 10, 0),
+                    ("p50_ms", 10, 2),
+                    ("p99_ms", 10, 2),
+                    ("us", 12, 2),
+                )
+            )
+        )
+
+
+def compare(arguments: argparse.Namespace) -> int:
+    if arguments.current is None:
+        baseline_path, current_path = BASELINE_PATH, arguments.baseline
+    else:
+        baseline_path, current_path = arguments.baseline, arguments.current
+    if not os.path.exists(baseline_path):
+        print(
+            f"No baseline at {baseline_path}; save one with run --save-baseline.",
+            file=sys.stderr,
+        )
+        return 2
+    with open(baseline_path) as file:
+        baseline = json.load(file)["results"]
+    with open(current_path) as file:
+        current = json.load(file)["results"]
+    regressions = 0
+    print(f"{'benchmark':<52}{'metric':>8}{'before':>12}{'after':>12}{'change':>9}")
+    for name, values in current.items():
+        for metric, value in values.items():
+            before = baseline.get(name, {}).get(metric)
+            if not before:
+                continue
+            change = value / before - 1
+            worse = -change if HIGHER_IS_BETTER[metric] else change
+            flag = ""
+            if worse > arguments.threshold:
+                regressions += 1
+                flag = "  REGRESSION"
+            print(
+                f"{name:<52}{metric:>8}{before:>12.2f}{value:>12.2f}"
+                f"{change:>+9.1%}{flag}"
+            )
+    missing = sorted(set(baseline) - set(current))
+    if missing:
+        print(f"\nNot in {current_path}: {', '.join(missing)}")
+    print(f"\n{regressions} regression(s) over {arguments.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", help="where to save the JSON results")
+    run_parser.add_argument(
+        "--save-baseline", action="store_true", help="also save them as the baseline"
+    )
+    run_parser.add_argument(
+        "--quick", action="store_true", help="fewer requests and concurrency levels"
+    )
+    run_parser.add_argument("--requests", type=int, help="requests per benchmark")
+    run_parser.add_argument(
+        "--latency", type=float, default=0, help="seconds the fake API takes to answer"
+    )
+    run_parser.add_argument(
+        "--cpu-only", action="store_true", help="only the microbenchmarks"
+    )
+    compare_parser = commands.add_parser(
+        "compare", help="flag regressions between two results files"
+    )
+    compare_parser.add_argument(
+        "baseline", help="baseline results (or the current ones, against the baseline)"
+    )
+    compare_parser.add_argument("current", nargs="?", help="current results")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="relative change that counts as a regression (default: 0.15)",
+    )
+    arguments = parser.parse_args(argv)
+    if arguments.command == "run":
+        run(arguments)
+        return 0
+    return compare(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
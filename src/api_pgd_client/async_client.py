@@ -0,0 +1,563 @@
+import abc
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any, Optional, TypeVar
+
+from . import (
+    cache,
+    coalescing,
+    constants,
+    context,
+    entities,
+    metrics,
+    namedtuples,
+    outbox,
+    profiling,
+    ratelimit,
+    retries,
+    state,
+    timeouts,
+)
+from .client import BaseApiClient
+from .constants import endpoints
+from .constants import headers as constants_headers
+from .utils import encoding
+from .utils import headers as headers_utils
+
+try:
+    import httpx
+
+    HAS_HTTPX = True
+except ImportError:  # pragma: no cover
+    HAS_HTTPX = False
+
+T = TypeVar("T")
+
+HTTPX_REQUIRED = "AsyncApiClient requires httpx: pip install api_pgd_client[async]"
+
+
+class AsyncBaseRequest(abc.ABC):
+    _http_client: Any = None
+    conditional_cache: Optional[cache.ConditionalCache] = None
+    retry_policy: Optional[retries.RetryPolicy] = None
+    endpoint_timeouts: Optional[dict[str, namedtuples.Timeout]] = None
+    instrumentation: Optional[metrics.Instrumentation] = None
+    profiler: Optional[profiling.Profiler] = None
+    single_flight: Optional[coalescing.AsyncSingleFlight] = None
+    read_limiter: Optional[ratelimit.BaseRateLimiter] = None
+    write_limiter: Optional[ratelimit.BaseRateLimiter] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+    max_connections: int = constants.POOL_MAXSIZE
+
+    @property
+    def http_client(self) -> Any:
+        if self._http_client is None:
+            self._http_client = self.create_http_client()
+        return self._http_client
+
+    def create_http_client(self, **kwargs: Any) -> Any:
+        if not HAS_HTTPX:  # pragma: no cover
+            raise self.get_error_class()(HTTPX_REQUIRED)
+        kwargs.setdefault(
+            "limits",
+            httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=constants.POOL_IDLE_TIMEOUT,
+            ),
+        )
+        return httpx.AsyncClient(**kwargs)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Requests wait here, without a timeout, instead of in the httpx pool
+        # queue, whose default timeout would fail bursts larger than the pool.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        return self._semaphore
+
+    async def do_delete(self, url: str, headers: dict[str, str]) -> Any:
+        return await self._do_request(endpoints.DELETE_METHOD, url, headers=headers)
+
+    async def do_get(
+        self, url: str, params: dict[str, Any], headers: dict[str, str]
+    ) -> Any:
+        single_flight = self.single_flight
+        if single_flight is None:
+            return self.decode_content(await self.get_content(url, params, headers))
+        key = coalescing.get_key(endpoints.GET_METHOD, url, params, headers)
+        content = await single_flight.do(
+            key, lambda: self.get_content(url, params, headers)
+        )
+        return self.decode_content(content)
+
+    async def get_content(
+        self, url: str, params: dict[str, Any], headers: dict[str, str]
+    ) -> Any:
+        conditional_cache = self.conditional_cache
+        if conditional_cache is None:
+            response = await self._send(
+                endpoints.GET_METHOD, url, params=params, headers=headers
+            )
+            return response.content
+        key = conditional_cache.get_key(url, params)
+        entry = conditional_cache.get(key)
+        response = await self._send(
+            endpoints.GET_METHOD,
+            url,
+            params=params,
+            headers=conditional_cache.get_headers(entry, headers),
+        )
+        return conditional_cache.resolve(
+            key, entry, response.status_code, response.headers, response.content
+        )
+
+    def encode_content(self, data: Any) -> bytes:
+        # NaN and infinity can't be sent; they fail this one request with
+        # the client's error, like any other rejected payload.
+        with profiling.stage(self.profiler, "encode"):
+            try:
+                return encoding.encode_json(data)
+            except ValueError as exc:
+                raise self.build_error(str(exc)) from exc
+
+    def decode_content(self, content: Any) -> Any:
+        if not content:
+            return None
+        with profiling.stage(self.profiler, "decode"):
+            return encoding.decode_json(content)
+
+    async def do_post(
+        self,
+        url: str,
+        data: dict[str, Any],
+        headers: dict[str, str],
+        as_json: bool = True,
+    ) -> Any:
+        if as_json:
+            return await self._do_request(
+                endpoints.POST_METHOD, url, content=json.dumps(data), headers=headers
+            )
+        return await self._do_request(
+            endpoints.POST_METHOD, url, data=data, headers=headers
+        )
+
+    async def do_put(
+        self, url: str, data: dict[str, Any], headers: dict[str, str]
+    ) -> Any:
+        if constants_headers.CONTENT_TYPE_HEADER_LABEL not in headers:
+            headers = (
+                headers_utils.create_headers_with(
+                    [constants_headers.CONTENT_TYPE_JSON_HEADER]
+                )
+                | headers
+            )
+        content = self.encode_content(data)
+        return await self._do_request(
+            endpoints.PUT_METHOD,
+            url,
+            content=content,
+            headers=headers,
+        )
+
+    async def _do_request(self, method_name: str, url: str, **kwargs: Any) -> Any:
+        response = await self._send(method_name, url, **kwargs)
+        return self.decode_content(response.content)
+
+    async def _send(self, method_name: str, url: str, **kwargs: Any) -> Any:
+        timeout = kwargs.pop("timeout", None)
+        if timeout is None:
+            timeout = self.get_timeout(method_name, url)
+        else:
+            timeout = timeouts.as_timeout(timeout)
+        policy = self.retry_policy
+        if policy is not None:
+            policy.budget.deposit()
+        limiter = self.get_rate_limiter(method_name)
+        call = context.current_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            if call is not None:
+                call.attempts += 1
+            delay = 0.0
+            if limiter is not None:
+                delay = await self.call_limiter(limiter, limiter.reserve)
+                if delay > 0:
+                    if not timeouts.fits_deadline(delay):
+                        await self.call_limiter(limiter, limiter.refund)
+                        raise self.build_deadline_error(method_name)
+                    await asyncio.sleep(delay)
+            attempts_left = 1 if policy is None else policy.max_attempts - attempt + 1
+            attempt_timeout = timeouts.get_attempt_timeout(timeout, attempts_left)
+            if attempt_timeout is None:
+                raise self.build_deadline_error(method_name)
+            event = None
+            if self.instrumentation is not None:
+                event = self.instrumentation.start(method_name, url, attempt, **kwargs)
+                event.queue_wait = delay
+            try:
+                response = await self._request(
+                    method_name,
+                    url,
+                    event,
+                    timeout=httpx.Timeout(
+                        attempt_timeout.read, connect=attempt_timeout.connect
+                    ),
+                    **kwargs,
+                )
+            except httpx.TransportError as exc:
+                if policy is not None and await self._wait_for_retry(policy, attempt):
+                    continue
+                if not isinstance(exc, httpx.TimeoutException):
+                    raise
+                raise self.build_error(
+                    f"Due to timeout error, {method_name.upper()} can't be done."
+                ) from exc
+            if (
+                policy is not None
+                and policy.is_retryable_status(response.status_code)
+                and await self._wait_for_retry(
+                    policy,
+                    attempt,
+                    response.headers.get(constants_headers.RETRY_AFTER_HEADER_LABEL),
+                )
+            ):
+                continue
+            break
+
+        if call is not None:
+            call.status_code = response.status_code
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            # httpx also raises on 3xx; a 304 answers a conditional GET.
+            if response.status_code == 304:
+                return response
+            body = response.json()
+            content = json.dumps(body, ensure_ascii=False, indent=4)
+            raise self.build_error(
+                f"Error while trying to do a {method_name.upper()} request.\n"
+                f"Status code: {response.status_code}\n"
+                f"Response:\n{content}",
+                status_code=response.status_code,
+                content=body,
+            ) from exc
+        return response
+
+    async def _request(
+        self,
+        method_name: str,
+        url: str,
+        event: Optional[metrics.RequestEvent] = None,
+        **kwargs: Any,
+    ) -> Any:
+        queued_at = time.perf_counter()
+        async with self.semaphore:
+            start = time.perf_counter()
+            if event is not None:
+                event.queue_wait += start - queued_at
+            response = None
+            error = None
+            try:
+                response = await self.http_client.request(
+                    method_name.upper(), url, **kwargs
+                )
+                return response
+            except BaseException as exc:
+                error = exc
+                raise
+            finally:
+                if event is not None and self.instrumentation is not None:
+                    self.instrumentation.finish(
+                        event, response, error, time.perf_counter() - start
+                    )
+
+    def get_timeout(self, method_name: str, url: str) -> namedtuples.Timeout:
+        return timeouts.get_timeout(self.endpoint_timeouts, method_name, url)
+
+    async def call_limiter(
+        self, limiter: ratelimit.BaseRateLimiter, method: Callable[[], T]
+    ) -> T:
+        # A limiter shared through a file blocks on its lock, so it's
+        # called from a thread instead of the event loop.
+        if limiter.blocking:
+            return await asyncio.to_thread(method)
+        return method()
+
+    def get_rate_limiter(self, method_name: str) -> Optional[ratelimit.BaseRateLimiter]:
+        # Reads and writes are limited separately; the token request isn't.
+        if method_name == endpoints.GET_METHOD:
+            return self.read_limiter
+        if method_name == endpoints.PUT_METHOD:
+            return self.write_limiter
+        return None
+
+    async def _wait_for_retry(
+        self,
+        policy: retries.RetryPolicy,
+        attempt: int,
+        retry_after: Optional[str] = None,
+    ) -> bool:
+        delay = policy.get_delay(attempt, retry_after)
+        if not timeouts.fits_deadline(delay) or not policy.should_retry(attempt, delay):
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+    def build_deadline_error(self, method_name: str) -> Any:
+        return self.build_error(
+            f"Due to the deadline, {method_name.upper()} can't be done."
+        )
+
+    def build_error(
+        self, message: str, status_code: Optional[int] = None, content: Any = None
+    ) -> Any:
+        error = self.get_error_class()(message)
+        error.status_code = status_code
+        error.content = content
+        return error
+
+    @abc.abstractmethod
+    def get_error_class(self) -> Any:
+        pass
+
+
+class AsyncApiClient(BaseApiClient, AsyncBaseRequest):
+    def __init__(
+        self,
+        domain: str = constants.BASE_URL,
+        origem_unidade: Any = None,
+        cod_unidade_autorizadora: Any = None,
+        max_connections: int = constants.POOL_MAXSIZE,
+        http_client: Any = None,
+        state_store: Optional[state.BaseStateStore] = None,
+        outbox_store: Optional[outbox.BaseOutboxStore] = None,
+        response_cache: Optional[cache.BaseResponseCache] = None,
+        conditional_cache: Optional[cache.ConditionalCache] = None,
+        retry_policy: Optional[retries.RetryPolicy] = None,
+        read_limiter: Optional[ratelimit.BaseRateLimiter] = None,
+        write_limiter: Optional[ratelimit.BaseRateLimiter] = None,
+        single_flight: Optional[coalescing.AsyncSingleFlight] = None,
+        endpoint_timeouts: Optional[Mapping[str, timeouts.TimeoutValue]] = None,
+        instrumentation: Optional[metrics.Instrumentation] = None,
+        profiler: Optional[profiling.Profiler] = None,
+    ):
+        # Requests are sent with httpx even on an http_client passed in, so
+        # it is checked here rather than on the first request.
+        if not HAS_HTTPX:
+            raise self.Error(HTTPX_REQUIRED)
+        super().__init__(domain, origem_unidade, cod_unidade_autorizadora)
+        self.instrumentation = (
+            metrics.Instrumentation() if instrumentation is None else instrumentation
+        )
+        if profiler is None and constants.PROFILE:
+            profiler = profiling.Profiler()
+        self.profiler = profiler
+        if profiler is not None:
+            self.instrumentation.add_hook(profiler)
+        self.endpoint_timeouts = timeouts.as_timeouts(endpoint_timeouts)
+        if single_flight is None and constants.COALESCE_REQUESTS:
+            single_flight = coalescing.AsyncSingleFlight()
+        self.single_flight = single_flight
+        if read_limiter is None:
+            read_limiter = ratelimit.build_rate_limiter(
+                constants.RATE_LIMIT_READS_PER_SECOND, "reads"
+            )
+        if write_limiter is None:
+            write_limiter = ratelimit.build_rate_limiter(
+                constants.RATE_LIMIT_WRITES_PER_SECOND, "writes"
+            )
+        self.read_limiter = read_limiter
+        self.write_limiter = write_limiter
+        self.retry_policy = (
+            retries.RetryPolicy() if retry_policy is None else retry_policy
+        )
+        self.state_store = state_store
+        self.outbox_store = outbox_store
+        self.response_cache = response_cache
+        self.conditional_cache = conditional_cache
+        self.max_connections = max_connections
+        self._token: dict[str, str] = {}
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._owns_http_client = http_client is None
+        self._http_client = http_client
+
+    async def aclose(self) -> None:
+        if self._owns_http_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def stats(self) -> namedtuples.ClientStats:
+        return self.build_stats(
+            self.instrumentation,
+            self.conditional_cache,
+            self.single_flight,
+            None,
+            self.retry_policy,
+        )
+
+    def export_prometheus(self) -> str:
+        return metrics.render_prometheus(self.stats())
+
+    async def __aenter__(self) -> "AsyncApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def default_headers(self) -> dict[str, str]:
+        token = await self.token()
+        with profiling.stage(self.profiler, "headers"):
+            return self.build_default_headers(token)
+
+    async def token(self) -> dict[str, str]:
+        if self._token:
+            return self._token
+        start = time.perf_counter()
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        with profiling.stage(self.profiler, profiling.TOKEN_STAGE):
+            async with self._token_lock:
+                if not self._token:
+                    self._token = await self.get_token()
+        metrics.record_token_wait(time.perf_counter() - start)
+        return self._token
+
+    async def get_token(self) -> Any:
+        return await self.do_post(
+            self.token_endpoint,
+            self.token_payload,
+            self.token_headers,
+            as_json=False,
+        )
+
+    async def consultar_usuario(self, email: str) -> entities.User:
+        url = self.user_endpoint(email)
+        response = await self._consultar(endpoints.USER_ENDPOINT, url)
+        with profiling.stage(self.profiler, "from_dict"):
+            return entities.User.from_dict(response)
+
+    async def consultar_participante(
+        self,
+        cod_unidade_lotacao: int,
+        matricula_siape: str,
+        origem_unidade: str = "",
+        cod_unidade_autorizadora: int = 0,
+    ) -> entities.Participante:
+        url = self.participante_endpoint(
+            cod_unidade_lotacao,
+            matricula_siape,
+            origem_unidade,
+            cod_unidade_autorizadora,
+        )
+        response = await self._consultar(endpoints.PARTICIPANTE_ENDPOINT, url)
+        with profiling.stage(self.profiler, "from_dict"):
+            return entities.Participante.from_dict(response)
+
+    async def enviar_participante(self, participante: entities.Participante) -> Any:
+        url = self.participante_endpoint(
+            participante.cod_unidade_lotacao,
+            participante.matricula_siape,
+            participante.origem_unidade,
+            participante.cod_unidade_autorizadora,
+        )
+        return await self._enviar(url, participante)
+
+    async def consultar_plano_entregas(
+        self,
+        id_plano_entregas: str,
+        origem_unidade: str = "",
+        cod_unidade_autorizadora: int = 0,
+    ) -> entities.PlanoDeEntregas:
+        url = self.plano_entregas_endpoint(
+            id_plano_entregas, origem_unidade, cod_unidade_autorizadora
+        )
+        response = await self._consultar(endpoints.PLANO_ENTREGAS_ENDPOINT, url)
+        with profiling.stage(self.profiler, "from_dict"):
+            return entities.PlanoDeEntregas.from_dict(response)
+
+    async def enviar_plano_entregas(
+        self, plano_entregas: entities.PlanoDeEntregas
+    ) -> Any:
+        url = self.plano_entregas_endpoint(
+            plano_entregas.id_plano_entregas,
+            plano_entregas.origem_unidade,
+            plano_entregas.cod_unidade_autorizadora,
+        )
+        return await self._enviar(url, plano_entregas)
+
+    async def consultar_plano_trabalho(
+        self,
+        id_plano_trabalho: str,
+        origem_unidade: str = "",
+        cod_unidade_autorizadora: int = 0,
+    ) -> entities.PlanoDeTrabalho:
+        url = self.plano_trabalho_endpoint(
+            id_plano_trabalho, origem_unidade, cod_unidade_autorizadora
+        )
+        response = await self._consultar(endpoints.PLANO_TRABALHO_ENDPOINT, url)
+        with profiling.stage(self.profiler, "from_dict"):
+            return entities.PlanoDeTrabalho.from_dict(response)
+
+    async def enviar_plano_trabalho(
+        self, plano_trabalho: entities.PlanoDeTrabalho
+    ) -> Any:
+        url = self.plano_trabalho_endpoint(
+            plano_trabalho.id_plano_trabalho,
+            plano_trabalho.origem_unidade,
+            plano_trabalho.cod_unidade_autorizadora,
+        )
+        return await self._enviar(url, plano_trabalho)
+
+    async def _consultar(self, endpoint: namedtuples.Endpoint, url: str) -> Any:
+        if self.profiler is not None:
+            self.profiler.count_call()
+        cached = self.get_cached_response(url)
+        if isinstance(cached, cache.NotFound):
+            raise self.build_error(
+                cached.message, status_code=404, content=cached.content
+            )
+        if cached is not cache.MISSING:
+            return cached
+        try:
+            response = await self.retry_on_expired_token(
+                lambda headers: self.do_get(url, {}, headers)
+            )
+        except self.Error as exc:
+            self.cache_error(url, exc)
+            raise
+        self.cache_response(endpoint, url, response)
+        return response
+
+    async def _enviar(self, url: str, entidade: entities.BaseEntity) -> Any:
+        if self.profiler is not None:
+            self.profiler.count_call()
+        with profiling.stage(self.profiler, "to_dict"):
+            data = entidade.to_dict()
+        digest = self.get_content_digest(data)
+        if self.is_unchanged(url, digest):
+            return None
+        try:
+            response = await self.retry_on_expired_token(
+                lambda headers: self.do_put(url, data, headers)
+            )
+        finally:
+            self.invalidate_cached_response(url)
+        self.remember_sent(url, digest)
+        return response
+
+    async def retry_on_expired_token(
+        self, request_call: Callable[[dict[str, str]], Awaitable[Any]]
+    ) -> Any:
+        token = await self.token()
+        try:
+            return await request_call(self.build_default_headers(token))
+        except self.Error as exc:
+            if not self.is_expired_token_error(exc):
+                raise exc
+            if self._token is token:
+                self._token = {}
+        return await request_call(await self.default_headers())
@@ -0,0 +1,222 @@
+import abc
+import collections
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Optional
+from urllib.parse import urlencode
+
+from . import constants, namedtuples
+from .constants import headers as constants_headers
+from .utils import encoding
+
+# Returned by get when there is no usable entry for the key.
+MISSING = object()
+
+# Entries kept by a cache built without a maxsize. PGD_API_CACHE_MAXSIZE and
+# PGD_API_CONDITIONAL_CACHE_MAXSIZE only decide whether the client builds
+# one on its own.
+DEFAULT_MAXSIZE = 1024
+
+
+class BaseResponseCache(abc.ABC):
+    def __init__(
+        self,
+        ttl: float = constants.CACHE_TTL,
+        ttls: Optional[Mapping[str, float]] = None,
+        negative_ttl: float = constants.CACHE_NEGATIVE_TTL,
+    ):
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.negative_ttl = negative_ttl
+
+    def get_ttl(self, endpoint_name: str) -> float:
+        return self.ttls.get(endpoint_name, self.ttl)
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Any:
+        pass
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        pass
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def stats(self) -> namedtuples.CacheStats:
+        pass
+
+
+class NotFound:
+    # Stored in place of a response when the API answered 404, so the
+    # error is raised again until the entry expires.
+    __slots__ = ("message", "content")
+
+    def __init__(self, message: str, content: Any):
+        self.message = message
+        self.content = content
+
+
+class LruResponseCache(BaseResponseCache):
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        ttl: float = constants.CACHE_TTL,
+        ttls: Optional[Mapping[str, float]] = None,
+        negative_ttl: float = constants.CACHE_NEGATIVE_TTL,
+    ):
+        super().__init__(ttl, ttls, negative_ttl)
+        self.maxsize = maxsize
+        self._entries: collections.OrderedDict[str, tuple[float, Any]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Any:
+        # Responses are kept encoded and decoded on every hit, so callers
+        # never share (and mutate) the same dicts and lists.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self._hits += 1
+        value = entry[1]
+        if isinstance(value, bytes):
+            return encoding.decode_json(value)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        if not isinstance(value, NotFound):
+            value = encoding.encode_json(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> namedtuples.CacheStats:
+        with self._lock:
+            return namedtuples.CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+            )
+
+
+class ConditionalCache:
+    # Last body received for each URL along with its validators, so a GET
+    # can be made conditional and a 304 answered from the stored body.
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries: collections.OrderedDict[str, namedtuples.ValidatedResponse] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def get_key(url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()), doseq=True)}"
+
+    def get(self, key: str) -> Optional[namedtuples.ValidatedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        return entry
+
+    def get_headers(
+        self, entry: Optional[namedtuples.ValidatedResponse], headers: dict[str, str]
+    ) -> dict[str, str]:
+        if entry is None:
+            return headers
+        headers = dict(headers)
+        if entry.etag:
+            headers[constants_headers.IF_NONE_MATCH_HEADER_LABEL] = entry.etag
+        if entry.last_modified:
+            headers[constants_headers.IF_MODIFIED_SINCE_HEADER_LABEL] = (
+                entry.last_modified
+            )
+        return headers
+
+    def resolve(
+        self,
+        key: str,
+        entry: Optional[namedtuples.ValidatedResponse],
+        status_code: int,
+        headers: Mapping[str, str],
+        content: bytes,
+    ) -> bytes:
+        # Returns the body to decode: the stored one on 304, otherwise the
+        # new one, which is stored if it came with validators. headers is
+        # the case-insensitive mapping from the HTTP library.
+        if status_code == 304 and entry is not None:
+            with self._lock:
+                self._hits += 1
+            stored: bytes = entry.content
+            return stored
+        etag = headers.get(constants_headers.ETAG_HEADER_LABEL)
+        last_modified = headers.get(constants_headers.LAST_MODIFIED_HEADER_LABEL)
+        with self._lock:
+            self._misses += 1
+            if not (etag or last_modified) or self.maxsize <= 0:
+                self._entries.pop(key, None)
+                return content
+            self._entries[key] = namedtuples.ValidatedResponse(
+                etag, last_modified, content
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return content
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> namedtuples.CacheStats:
+        with self._lock:
+            return namedtuples.CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=0,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+            )
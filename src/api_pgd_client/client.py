@@ -1,24 +1,105 @@
 import abc
+import collections
+import functools
 import json
-from collections.abc import Callable
-from typing import Any
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent import futures
+from typing import Any, Optional
 
 import requests  # type: ignore
 
-from . import constants, entities, namedtuples
-from .constants import endpoints, errors, headers
+from . import (
+    cache,
+    coalescing,
+    concurrency,
+    constants,
+    context,
+    dispatcher,
+    entities,
+    metrics,
+    namedtuples,
+    outbox,
+    profiling,
+    ratelimit,
+    retries,
+    state,
+    timeouts,
+    tokens,
+    transports,
+)
+from .constants import endpoints, errors
+from .constants import headers as constants_headers
+from .utils import encoding
 from .utils import headers as headers_utils
 
 
 class BaseRequest(abc.ABC):
+    _transport: Optional[transports.BaseTransport] = None
+    conditional_cache: Optional[cache.ConditionalCache] = None
+    retry_policy: Optional[retries.RetryPolicy] = None
+    endpoint_timeouts: Optional[dict[str, namedtuples.Timeout]] = None
+    single_flight: Optional[coalescing.SingleFlight] = None
+    read_limiter: Optional[ratelimit.BaseRateLimiter] = None
+    write_limiter: Optional[ratelimit.BaseRateLimiter] = None
+    concurrency_limiter: Optional[concurrency.AimdLimiter] = None
+    instrumentation: Optional[metrics.Instrumentation] = None
+    profiler: Optional[profiling.Profiler] = None
+
+    @property
+    def transport(self) -> transports.BaseTransport:
+        if self._transport is None:
+            self._transport = transports.SessionTransport()
+        return self._transport
+
     def do_delete(self, url: str, headers: dict[str, str]) -> Any:
         return self._do_request(endpoints.DELETE_METHOD, url, headers=headers)
 
     def do_get(self, url: str, params: dict[str, Any], headers: dict[str, str]) -> Any:
-        return self._do_request(
-            endpoints.GET_METHOD, url, params=params, headers=headers
+        single_flight = self.single_flight
+        if single_flight is None:
+            return self.decode_content(self.get_content(url, params, headers))
+        key = coalescing.get_key(endpoints.GET_METHOD, url, params, headers)
+        # Coalesced callers share the body, not the decoded response, so
+        # none of them can change what the others get.
+        content = single_flight.do(key, lambda: self.get_content(url, params, headers))
+        return self.decode_content(content)
+
+    def get_content(
+        self, url: str, params: dict[str, Any], headers: dict[str, str]
+    ) -> Any:
+        conditional_cache = self.conditional_cache
+        if conditional_cache is None:
+            return self._send(
+                endpoints.GET_METHOD, url, params=params, headers=headers
+            ).content
+        key = conditional_cache.get_key(url, params)
+        entry = conditional_cache.get(key)
+        response = self._send(
+            endpoints.GET_METHOD,
+            url,
+            params=params,
+            headers=conditional_cache.get_headers(entry, headers),
+        )
+        return conditional_cache.resolve(
+            key, entry, response.status_code, response.headers, response.content
         )
 
+    def encode_content(self, data: Any) -> bytes:
+        # NaN and infinity can't be sent; they fail this one request with
+        # the client's error, like any other rejected payload.
+        with profiling.stage(self.profiler, "encode"):
+            try:
+                return encoding.encode_json(data)
+            except ValueError as exc:
+                raise self.build_error(str(exc)) from exc
+
+    def decode_content(self, content: Any) -> Any:
+        if not content:
+            return None
+        with profiling.stage(self.profiler, "decode"):
+            return encoding.decode_json(content)
+
     def do_post(
         self,
         url: str,
@@ -31,38 +112,182 @@ class BaseRequest(abc.ABC):
         return self._do_request(endpoints.POST_METHOD, url, data=data, headers=headers)
 
     def do_put(self, url: str, data: dict[str, Any], headers: dict[str, str]) -> Any:
-        payload = json.loads(json.dumps(data, default=str))
+        if constants_headers.CONTENT_TYPE_HEADER_LABEL not in headers:
+            headers = (
+                headers_utils.create_headers_with(
+                    [constants_headers.CONTENT_TYPE_JSON_HEADER]
+                )
+                | headers
+            )
+        content = self.encode_content(data)
         return self._do_request(
-            endpoints.PUT_METHOD, url, json=payload, headers=headers
+            endpoints.PUT_METHOD, url, data=content, headers=headers
         )
 
     def _do_request(self, method_name: str, url: str, **kwargs: Any) -> Any:
-        kwargs.setdefault("timeout", constants.REQUEST_TIMEOUT)
-        try:
-            response = getattr(requests, method_name.lower())(url, **kwargs)
-        except requests.Timeout as exc:
-            error_class = self.get_error_class()
-            raise error_class(
-                f"Due to timeout error, {method_name.upper()} can't be done."
-            ) from exc
-
+        return self.decode_content(self._send(method_name, url, **kwargs).content)
+
+    def _send(self, method_name: str, url: str, **kwargs: Any) -> Any:
+        timeout = kwargs.pop("timeout", None)
+        if timeout is None:
+            timeout = self.get_timeout(method_name, url)
+        else:
+            timeout = timeouts.as_timeout(timeout)
+        policy = self.retry_policy
+        if policy is not None:
+            policy.budget.deposit()
+        limiter = self.get_rate_limiter(method_name)
+        call = context.current_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            if call is not None:
+                call.attempts += 1
+            delay = 0.0
+            if limiter is not None:
+                delay = limiter.reserve()
+                if delay > 0:
+                    if not timeouts.fits_deadline(delay):
+                        # Not sent, so the next callers don't wait for it.
+                        limiter.refund()
+                        raise self.build_deadline_error(method_name)
+                    time.sleep(delay)
+            attempts_left = 1 if policy is None else policy.max_attempts - attempt + 1
+            attempt_timeout = timeouts.get_attempt_timeout(timeout, attempts_left)
+            if attempt_timeout is None:
+                raise self.build_deadline_error(method_name)
+            event = None
+            if self.instrumentation is not None:
+                event = self.instrumentation.start(method_name, url, attempt, **kwargs)
+                event.queue_wait = delay
+            try:
+                response = self._request(
+                    method_name, url, event, timeout=attempt_timeout, **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if policy is not None and self._wait_for_retry(policy, attempt):
+                    continue
+                if not isinstance(exc, requests.Timeout):
+                    raise
+                raise self.build_error(
+                    f"Due to timeout error, {method_name.upper()} can't be done."
+                ) from exc
+            if (
+                policy is not None
+                and policy.is_retryable_status(response.status_code)
+                and self._wait_for_retry(
+                    policy,
+                    attempt,
+                    response.headers.get(constants_headers.RETRY_AFTER_HEADER_LABEL),
+                )
+            ):
+                continue
+            break
+
+        if call is not None:
+            call.status_code = response.status_code
         try:
             response.raise_for_status()
         except requests.HTTPError as exc:
-            content = json.dumps(response.json(), ensure_ascii=False, indent=4)
-            raise self.get_error_class()(
+            body = response.json()
+            content = json.dumps(body, ensure_ascii=False, indent=4)
+            raise self.build_error(
                 f"Error while trying to do a {method_name.upper()} request.\n"
                 f"Status code: {response.status_code}\n"
-                f"Response:\n{content}"
+                f"Response:\n{content}",
+                status_code=response.status_code,
+                content=body,
             ) from exc
-        return json.loads(response.content) if response.content else None
+        return response
+
+    def _request(
+        self,
+        method_name: str,
+        url: str,
+        event: Optional[metrics.RequestEvent] = None,
+        **kwargs: Any,
+    ) -> Any:
+        # Only writes go through the concurrency limiter: they are what the
+        # batches send in bulk.
+        limiter = self.concurrency_limiter
+        if method_name != endpoints.PUT_METHOD:
+            limiter = None
+        generation = None
+        if limiter is not None:
+            queued_at = time.perf_counter()
+            generation = limiter.acquire(timeouts.remaining_time())
+            if generation is None:
+                raise self.build_deadline_error(method_name)
+            if event is not None:
+                event.queue_wait += time.perf_counter() - queued_at
+        start = time.perf_counter()
+        response = None
+        error = None
+        try:
+            response = self.transport.request(method_name, url, **kwargs)
+            return response
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if limiter is not None and generation is not None:
+                limiter.release(
+                    generation,
+                    response is None
+                    or limiter.is_overload_status(response.status_code),
+                    elapsed,
+                )
+            if event is not None and self.instrumentation is not None:
+                self.instrumentation.finish(event, response, error, elapsed)
+
+    def get_timeout(self, method_name: str, url: str) -> namedtuples.Timeout:
+        return timeouts.get_timeout(self.endpoint_timeouts, method_name, url)
+
+    def get_rate_limiter(self, method_name: str) -> Optional[ratelimit.BaseRateLimiter]:
+        # Reads and writes are limited separately; the token request isn't.
+        if method_name == endpoints.GET_METHOD:
+            return self.read_limiter
+        if method_name == endpoints.PUT_METHOD:
+            return self.write_limiter
+        return None
+
+    def _wait_for_retry(
+        self,
+        policy: retries.RetryPolicy,
+        attempt: int,
+        retry_after: Optional[str] = None,
+    ) -> bool:
+        delay = policy.get_delay(attempt, retry_after)
+        if not timeouts.fits_deadline(delay) or not policy.should_retry(attempt, delay):
+            return False
+        time.sleep(delay)
+        return True
+
+    def build_deadline_error(self, method_name: str) -> Any:
+        return self.build_error(
+            f"Due to the deadline, {method_name.upper()} can't be done."
+        )
+
+    def build_error(
+        self, message: str, status_code: Optional[int] = None, content: Any = None
+    ) -> Any:
+        error = self.get_error_class()(message)
+        error.status_code = status_code
+        error.content = content
+        return error
 
     @abc.abstractmethod
     def get_error_class(self) -> Any:
         pass
 
 
-class ApiClient(BaseRequest):
+class BaseApiClient:
+    state_store: Optional[state.BaseStateStore] = None
+    outbox_store: Optional[outbox.BaseOutboxStore] = None
+    response_cache: Optional[cache.BaseResponseCache] = None
+    profiler: Optional[profiling.Profiler] = None
+
     class Error(Exception):
         pass
 
@@ -75,41 +300,36 @@ class ApiClient(BaseRequest):
         self.domain = domain
         self.origem_unidade = origem_unidade
         self.cod_unidade_autorizadora = cod_unidade_autorizadora
-        self._token: dict[str, str] = {}
 
-    @property
-    def default_headers(self) -> dict[str, str]:
+    def build_default_headers(self, token: dict[str, str]) -> dict[str, str]:
         return headers_utils.create_headers_with(
             [
-                headers.CONTENT_TYPE_JSON_HEADER,
-                headers_utils.authorization_header_factory(**self.token),
-                headers_utils.header_item_factory(
-                    headers.USER_AGENT_HEADER,
-                    system_name=constants.SOURCE_SYSTEM_NAME,
-                    system_version=constants.SOURCE_SYSTEM_VERSION,
-                    system_url=constants.SOURCE_SYSTEM_ABOUT_URL,
-                ),
+                constants_headers.CONTENT_TYPE_JSON_HEADER,
+                headers_utils.authorization_header_factory(**token),
+                self.user_agent_header,
             ],
         )
 
-    @property
-    def token(self) -> dict[str, str]:
-        if not self._token:
-            self._token = self.get_token()
-        return self._token
+    @functools.cached_property
+    def user_agent_header(self) -> namedtuples.HeaderItem:
+        return headers_utils.header_item_factory(
+            constants_headers.USER_AGENT_HEADER,
+            system_name=constants.SOURCE_SYSTEM_NAME,
+            system_version=constants.SOURCE_SYSTEM_VERSION,
+            system_url=constants.SOURCE_SYSTEM_ABOUT_URL,
+        )
 
-    def get_token(self) -> Any:
-        payload = {
+    @property
+    def token_payload(self) -> dict[str, str]:
+        return {
             "username": constants.API_USERNAME,
             "password": constants.API_PASSWORD,
         }
-        return self.do_post(
-            self.token_endpoint,
-            payload,
-            headers_utils.create_headers_with(
-                [headers.CONTENT_TYPE_FORM_URLENCODED_HEADER]
-            ),
-            as_json=False,
+
+    @property
+    def token_headers(self) -> dict[str, str]:
+        return headers_utils.create_headers_with(
+            [constants_headers.CONTENT_TYPE_FORM_URLENCODED_HEADER]
         )
 
     @property
@@ -117,23 +337,138 @@ class ApiClient(BaseRequest):
         return self.get_endpoint(endpoints.TOKEN_ENDPOINT)
 
     def get_endpoint(self, endpoint: namedtuples.Endpoint, **kwargs: Any) -> str:
-        base_path = self._get_endpoint_path(endpoint)
         try:
-            path = base_path.format(**kwargs)
+            build_path = endpoints.PATH_BUILDERS[endpoint.name]
+        except (AttributeError, KeyError) as exc:
+            raise self.get_error_class()("Endpoint not defined") from exc
+        # Without a profiler the stage is skipped altogether: entering it
+        # would cost about as much as building the path.
+        profiler = self.profiler
+        try:
+            if profiler is None:
+                path = build_path(**kwargs)
+            else:
+                with profiler.stage("endpoint"):
+                    path = build_path(**kwargs)
         except KeyError as exc:
             raise self.get_error_class()("Endpoint malformed") from exc
         return f"{self.domain}{path}"
 
-    def _get_endpoint_path(self, endpoint: namedtuples.Endpoint) -> Any:
-        try:
-            return endpoints.ENDPOINTS[endpoint.name].path
-        except (AttributeError, KeyError) as exc:
-            error_class = self.get_error_class()
-            raise error_class("Endpoint not defined") from exc
-
     def get_error_class(self) -> Any:
         return self.Error
 
+    def get_cached_response(self, url: str) -> Any:
+        if self.response_cache is None:
+            return cache.MISSING
+        return self.response_cache.get(url)
+
+    def cache_response(
+        self, endpoint: namedtuples.Endpoint, url: str, response: Any
+    ) -> None:
+        if self.response_cache is not None:
+            self.response_cache.set(
+                url, response, self.response_cache.get_ttl(endpoint.name)
+            )
+
+    def cache_error(self, url: str, exc: Exception) -> None:
+        if self.response_cache is not None and getattr(exc, "status_code", None) == 404:
+            self.response_cache.set(
+                url,
+                cache.NotFound(str(exc), getattr(exc, "content", None)),
+                self.response_cache.negative_ttl,
+            )
+
+    def invalidate_cached_response(self, url: str) -> None:
+        if self.response_cache is not None:
+            self.response_cache.delete(url)
+
+    def get_content_digest(self, data: dict[str, Any]) -> Optional[str]:
+        if self.state_store is None:
+            return None
+        try:
+            return state.content_digest(data)
+        except ValueError:
+            # do_put reports what can't be encoded; there's nothing to
+            # compare it with.
+            return None
+
+    def is_unchanged(self, url: str, digest: Optional[str]) -> bool:
+        # The resource URL holds the entity's natural key, with the client
+        # defaults applied, and the domain, so it identifies what was sent.
+        if digest is None or self.state_store is None:
+            return False
+        if self.state_store.get(url) != digest:
+            return False
+        call = context.current_call()
+        if call is not None:
+            call.skipped = True
+        return True
+
+    def remember_sent(self, url: str, digest: Optional[str]) -> None:
+        if digest is not None and self.state_store is not None:
+            self.state_store.set(url, digest)
+
+    def build_stats(
+        self,
+        instrumentation: Optional[metrics.Instrumentation],
+        conditional_cache: Optional[cache.ConditionalCache],
+        single_flight: Any,
+        concurrency_limiter: Optional[concurrency.AimdLimiter],
+        retry_policy: Optional[retries.RetryPolicy],
+    ) -> namedtuples.ClientStats:
+        return namedtuples.ClientStats(
+            latency={} if instrumentation is None else instrumentation.stats(),
+            response_cache=(
+                None if self.response_cache is None else self.response_cache.stats()
+            ),
+            conditional_cache=(
+                None if conditional_cache is None else conditional_cache.stats()
+            ),
+            coalescing=None if single_flight is None else single_flight.stats(),
+            concurrency=(
+                None if concurrency_limiter is None else concurrency_limiter.stats()
+            ),
+            retry_budget=None if retry_policy is None else retry_policy.budget.tokens,
+        )
+
+    def get_envio_url(self, entidade: entities.BaseEntity) -> str:
+        kind = entities.get_kind(entidade)
+        if kind == "Participante":
+            return self.participante_endpoint(
+                entidade.cod_unidade_lotacao,  # type: ignore[attr-defined]
+                entidade.matricula_siape,  # type: ignore[attr-defined]
+                entidade.origem_unidade,  # type: ignore[attr-defined]
+                entidade.cod_unidade_autorizadora,  # type: ignore[attr-defined]
+            )
+        if kind == "PlanoDeEntregas":
+            return self.plano_entregas_endpoint(
+                entidade.id_plano_entregas,  # type: ignore[attr-defined]
+                entidade.origem_unidade,  # type: ignore[attr-defined]
+                entidade.cod_unidade_autorizadora,  # type: ignore[attr-defined]
+            )
+        if kind == "PlanoDeTrabalho":
+            return self.plano_trabalho_endpoint(
+                entidade.id_plano_trabalho,  # type: ignore[attr-defined]
+                entidade.origem_unidade,  # type: ignore[attr-defined]
+                entidade.cod_unidade_autorizadora,  # type: ignore[attr-defined]
+            )
+        raise self.get_error_class()(f"{kind} can't be sent to the API.")
+
+    def enfileirar(self, entidade: entities.BaseEntity) -> None:
+        # Saves the entity in the outbox for an OutboxDrainer to send, without
+        # touching the API. Enqueueing the same resource again before it
+        # was sent replaces it, so only its last version goes out.
+        if self.outbox_store is None:
+            raise self.get_error_class()("No outbox store configured.")
+        self.outbox_store.put(
+            entities.get_kind(entidade),
+            entidade.to_dict(),
+            key=self.get_envio_url(entidade),
+        )
+
+    def is_expired_token_error(self, exc: Exception) -> bool:
+        return errors.TOKEN_INVALIDO in str(exc)
+
     @property
     def users_endpoint(self) -> str:
         return self.get_endpoint(endpoints.USERS_ENDPOINT)
@@ -194,11 +529,150 @@ class ApiClient(BaseRequest):
             matricula_siape=matricula_siape,
         )
 
-    def consultar_usuario(self, email: str) -> entities.User:
-        response = self.retry_on_expired_token(
-            lambda: self.do_get(self.user_endpoint(email), {}, self.default_headers)
+
+class ApiClient(BaseApiClient, BaseRequest):
+    def __init__(
+        self,
+        domain: str = constants.BASE_URL,
+        origem_unidade: Any = None,
+        cod_unidade_autorizadora: Any = None,
+        transport: Any = None,
+        token_store: Optional[tokens.BaseTokenStore] = None,
+        state_store: Optional[state.BaseStateStore] = None,
+        outbox_store: Optional[outbox.BaseOutboxStore] = None,
+        response_cache: Optional[cache.BaseResponseCache] = None,
+        conditional_cache: Optional[cache.ConditionalCache] = None,
+        retry_policy: Optional[retries.RetryPolicy] = None,
+        read_limiter: Optional[ratelimit.BaseRateLimiter] = None,
+        write_limiter: Optional[ratelimit.BaseRateLimiter] = None,
+        concurrency_limiter: Optional[concurrency.AimdLimiter] = None,
+        single_flight: Optional[coalescing.SingleFlight] = None,
+        endpoint_timeouts: Optional[Mapping[str, timeouts.TimeoutValue]] = None,
+        instrumentation: Optional[metrics.Instrumentation] = None,
+        profiler: Optional[profiling.Profiler] = None,
+    ):
+        super().__init__(domain, origem_unidade, cod_unidade_autorizadora)
+        self.instrumentation = (
+            metrics.Instrumentation() if instrumentation is None else instrumentation
+        )
+        if profiler is None and constants.PROFILE:
+            profiler = profiling.Profiler()
+        self.profiler = profiler
+        if profiler is not None:
+            self.instrumentation.add_hook(profiler)
+        self.endpoint_timeouts = timeouts.as_timeouts(endpoint_timeouts)
+        if single_flight is None and constants.COALESCE_REQUESTS:
+            single_flight = coalescing.SingleFlight()
+        self.single_flight = single_flight
+        if concurrency_limiter is None and constants.ADAPTIVE_CONCURRENCY:
+            concurrency_limiter = concurrency.AimdLimiter()
+        self.concurrency_limiter = concurrency_limiter
+        if read_limiter is None:
+            read_limiter = ratelimit.build_rate_limiter(
+                constants.RATE_LIMIT_READS_PER_SECOND, "reads"
+            )
+        if write_limiter is None:
+            write_limiter = ratelimit.build_rate_limiter(
+                constants.RATE_LIMIT_WRITES_PER_SECOND, "writes"
+            )
+        self.read_limiter = read_limiter
+        self.write_limiter = write_limiter
+        self.retry_policy = (
+            retries.RetryPolicy() if retry_policy is None else retry_policy
+        )
+        if response_cache is None and constants.CACHE_MAXSIZE > 0:
+            response_cache = cache.LruResponseCache(constants.CACHE_MAXSIZE)
+        self.response_cache = response_cache
+        if conditional_cache is None and constants.CONDITIONAL_CACHE_MAXSIZE > 0:
+            conditional_cache = cache.ConditionalCache(
+                constants.CONDITIONAL_CACHE_MAXSIZE
+            )
+        self.conditional_cache = conditional_cache
+        if token_store is None and constants.TOKEN_STORE_PATH:
+            token_store = tokens.FileTokenStore(constants.TOKEN_STORE_PATH)
+        self._owns_state_store = state_store is None and bool(
+            constants.STATE_STORE_PATH
+        )
+        if self._owns_state_store:
+            state_store = state.SqliteStateStore(constants.STATE_STORE_PATH)
+        self.state_store = state_store
+        self._owns_outbox_store = outbox_store is None and bool(constants.OUTBOX_PATH)
+        if self._owns_outbox_store:
+            outbox_store = outbox.SqliteOutboxStore(constants.OUTBOX_PATH)
+        self.outbox_store = outbox_store
+        self.token_manager = tokens.TokenManager(
+            lambda: self.get_token(), store=token_store
         )
-        return entities.User(**response)
+        self._default_headers: Optional[tuple[Any, dict[str, str]]] = None
+        # Starts its workers on the first despachar.
+        self.dispatcher = dispatcher.Dispatcher(self)
+        self._owns_transport = transport is None
+        self._transport = transport
+
+    def close(self) -> None:
+        # What was dispatched is sent before the connections go away.
+        self.dispatcher.shutdown()
+        if self._owns_transport and self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._owns_state_store and self.state_store is not None:
+            self.state_store.close()
+            self.state_store = None
+        if self._owns_outbox_store and self.outbox_store is not None:
+            self.outbox_store.close()
+            self.outbox_store = None
+
+    def stats(self) -> namedtuples.ClientStats:
+        return self.build_stats(
+            self.instrumentation,
+            self.conditional_cache,
+            self.single_flight,
+            self.concurrency_limiter,
+            self.retry_policy,
+        )
+
+    def export_prometheus(self) -> str:
+        return metrics.render_prometheus(self.stats())
+
+    def __enter__(self) -> "ApiClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def default_headers(self) -> dict[str, str]:
+        # Rebuilt only when the token manager hands out a different token;
+        # callers get a copy, so changing it never leaks into other calls.
+        token = self.token
+        with profiling.stage(self.profiler, "headers"):
+            cached = self._default_headers
+            if cached is None or cached[0] is not token:
+                cached = (token, self.build_default_headers(token))
+                self._default_headers = cached
+            return dict(cached[1])
+
+    @property
+    def token(self) -> dict[str, str]:
+        start = time.perf_counter()
+        with profiling.stage(self.profiler, profiling.TOKEN_STAGE):
+            token = self.token_manager.get()
+        metrics.record_token_wait(time.perf_counter() - start)
+        return token  # type: ignore[no-any-return]
+
+    def get_token(self) -> Any:
+        return self.do_post(
+            self.token_endpoint,
+            self.token_payload,
+            self.token_headers,
+            as_json=False,
+        )
+
+    def consultar_usuario(self, email: str) -> entities.User:
+        url = self.user_endpoint(email)
+        response = self._consultar(endpoints.USER_ENDPOINT, url)
+        with profiling.stage(self.profiler, "from_dict"):
+            return entities.User.from_dict(response)
 
     def consultar_participante(
         self,
@@ -207,31 +681,24 @@ class ApiClient(BaseRequest):
         origem_unidade: str = "",
         cod_unidade_autorizadora: int = 0,
     ) -> entities.Participante:
-        response = self.retry_on_expired_token(
-            self.do_get,
-            self.participante_endpoint(
-                cod_unidade_lotacao,
-                matricula_siape,
-                origem_unidade,
-                cod_unidade_autorizadora,
-            ),
-            {},
-            self.default_headers,
+        url = self.participante_endpoint(
+            cod_unidade_lotacao,
+            matricula_siape,
+            origem_unidade,
+            cod_unidade_autorizadora,
         )
-        return entities.Participante(**response)
+        response = self._consultar(endpoints.PARTICIPANTE_ENDPOINT, url)
+        with profiling.stage(self.profiler, "from_dict"):
+            return entities.Participante.from_dict(response)
 
     def enviar_participante(self, participante: entities.Participante) -> Any:
-        return self.retry_on_expired_token(
-            self.do_put,
-            self.participante_endpoint(
-                participante.cod_unidade_lotacao,
-                participante.matricula_siape,
-                participante.origem_unidade,
-                participante.cod_unidade_autorizadora,
-            ),
-            participante.to_dict(),
-            self.default_headers,
+        url = self.participante_endpoint(
+            participante.cod_unidade_lotacao,
+            participante.matricula_siape,
+            participante.origem_unidade,
+            participante.cod_unidade_autorizadora,
         )
+        return self._enviar(url, participante)
 
     def consultar_plano_entregas(
         self,
@@ -239,28 +706,20 @@ class ApiClient(BaseRequest):
         origem_unidade: str = "",
         cod_unidade_autorizadora: int = 0,
     ) -> entities.PlanoDeEntregas:
-        response = self.retry_on_expired_token(
-            lambda: self.do_get(
-                self.plano_entregas_endpoint(
-                    id_plano_entregas, origem_unidade, cod_unidade_autorizadora
-                ),
-                {},
-                self.default_headers,
-            )
+        url = self.plano_entregas_endpoint(
+            id_plano_entregas, origem_unidade, cod_unidade_autorizadora
         )
-        return entities.PlanoDeEntregas(**response)
+        response = self._consultar(endpoints.PLANO_ENTREGAS_ENDPOINT, url)
+        with profiling.stage(self.profiler, "from_dict"):
+            return entities.PlanoDeEntregas.from_dict(response)
 
     def enviar_plano_entregas(self, plano_entregas: entities.PlanoDeEntregas) -> Any:
-        return self.retry_on_expired_token(
-            self.do_put,
-            self.plano_entregas_endpoint(
-                plano_entregas.id_plano_entregas,
-                plano_entregas.origem_unidade,
-                plano_entregas.cod_unidade_autorizadora,
-            ),
-            plano_entregas.to_dict(),
-            self.default_headers,
+        url = self.plano_entregas_endpoint(
+            plano_entregas.id_plano_entregas,
+            plano_entregas.origem_unidade,
+            plano_entregas.cod_unidade_autorizadora,
         )
+        return self._enviar(url, plano_entregas)
 
     def consultar_plano_trabalho(
         self,
@@ -268,36 +727,188 @@ class ApiClient(BaseRequest):
         origem_unidade: str = "",
         cod_unidade_autorizadora: int = 0,
     ) -> entities.PlanoDeTrabalho:
-        response = self.retry_on_expired_token(
-            self.do_get,
-            self.plano_trabalho_endpoint(
-                id_plano_trabalho, origem_unidade, cod_unidade_autorizadora
-            ),
-            {},
-            self.default_headers,
+        url = self.plano_trabalho_endpoint(
+            id_plano_trabalho, origem_unidade, cod_unidade_autorizadora
         )
-        return entities.PlanoDeTrabalho(**response)
+        response = self._consultar(endpoints.PLANO_TRABALHO_ENDPOINT, url)
+        with profiling.stage(self.profiler, "from_dict"):
+            return entities.PlanoDeTrabalho.from_dict(response)
 
     def enviar_plano_trabalho(self, plano_trabalho: entities.PlanoDeTrabalho) -> Any:
-        return self.retry_on_expired_token(
-            self.do_put,
-            self.plano_trabalho_endpoint(
-                plano_trabalho.id_plano_trabalho,
-                plano_trabalho.origem_unidade,
-                plano_trabalho.cod_unidade_autorizadora,
-            ),
-            plano_trabalho.to_dict(),
-            self.default_headers,
+        url = self.plano_trabalho_endpoint(
+            plano_trabalho.id_plano_trabalho,
+            plano_trabalho.origem_unidade,
+            plano_trabalho.cod_unidade_autorizadora,
+        )
+        return self._enviar(url, plano_trabalho)
+
+    def enviar(self, entidade: entities.BaseEntity) -> Any:
+        return self._enviar(self.get_envio_url(entidade), entidade)
+
+    def despachar(self, entidade: entities.BaseEntity) -> futures.Future[Any]:
+        # Sends the entity from the dispatcher's workers; the Future gets
+        # what enviar returns or raises.
+        return self.dispatcher.submit(self.enviar, entidade)
+
+    def _consultar(self, endpoint: namedtuples.Endpoint, url: str) -> Any:
+        if self.profiler is not None:
+            self.profiler.count_call()
+        cached = self.get_cached_response(url)
+        if isinstance(cached, cache.NotFound):
+            raise self.build_error(
+                cached.message, status_code=404, content=cached.content
+            )
+        if cached is not cache.MISSING:
+            return cached
+        try:
+            response = self.retry_on_expired_token(
+                lambda: self.do_get(url, {}, self.default_headers)
+            )
+        except self.Error as exc:
+            self.cache_error(url, exc)
+            raise
+        self.cache_response(endpoint, url, response)
+        return response
+
+    def _enviar(self, url: str, entidade: entities.BaseEntity) -> Any:
+        if self.profiler is not None:
+            self.profiler.count_call()
+        with profiling.stage(self.profiler, "to_dict"):
+            data = entidade.to_dict()
+        digest = self.get_content_digest(data)
+        if self.is_unchanged(url, digest):
+            return None
+        try:
+            response = self.retry_on_expired_token(
+                lambda: self.do_put(url, data, self.default_headers)
+            )
+        finally:
+            # Even a failed PUT may have been applied, so the cached
+            # response can't be trusted after it either.
+            self.invalidate_cached_response(url)
+        self.remember_sent(url, digest)
+        return response
+
+    def enviar_participantes_em_lote(
+        self,
+        participantes: Iterable[entities.Participante],
+        max_workers: int = constants.BATCH_MAX_WORKERS,
+        deadline: Optional[float] = None,
+    ) -> list[namedtuples.BatchItemResult]:
+        return list(
+            self._enviar_em_lote(
+                self.enviar_participante, participantes, max_workers, deadline
+            )
         )
 
+    def enviar_planos_entregas_em_lote(
+        self,
+        planos_entregas: Iterable[entities.PlanoDeEntregas],
+        max_workers: int = constants.BATCH_MAX_WORKERS,
+        deadline: Optional[float] = None,
+    ) -> list[namedtuples.BatchItemResult]:
+        return list(
+            self._enviar_em_lote(
+                self.enviar_plano_entregas, planos_entregas, max_workers, deadline
+            )
+        )
+
+    def enviar_planos_trabalho_em_lote(
+        self,
+        planos_trabalho: Iterable[entities.PlanoDeTrabalho],
+        max_workers: int = constants.BATCH_MAX_WORKERS,
+        deadline: Optional[float] = None,
+    ) -> list[namedtuples.BatchItemResult]:
+        return list(
+            self._enviar_em_lote(
+                self.enviar_plano_trabalho, planos_trabalho, max_workers, deadline
+            )
+        )
+
+    def enviar_em_lote(
+        self,
+        entidades: Iterable[entities.BaseEntity],
+        max_workers: int = constants.BATCH_MAX_WORKERS,
+        deadline: Optional[float] = None,
+    ) -> list[namedtuples.BatchItemResult]:
+        return list(self._enviar_em_lote(self.enviar, entidades, max_workers, deadline))
+
+    def enviar_em_fluxo(
+        self,
+        entidades: Iterable[entities.BaseEntity],
+        max_workers: int = constants.BATCH_MAX_WORKERS,
+        deadline: Optional[float] = None,
+    ) -> Iterator[namedtuples.BatchItemResult]:
+        # Like enviar_em_lote, but each result is yielded as soon as it's
+        # its turn instead of being kept in a list, for inputs too large
+        # to hold in memory.
+        return self._enviar_em_lote(self.enviar, entidades, max_workers, deadline)
+
+    def _enviar_em_lote(
+        self,
+        enviar: Callable[[Any], Any],
+        entidades: Iterable[Any],
+        max_workers: int,
+        deadline: Optional[float] = None,
+    ) -> Iterator[namedtuples.BatchItemResult]:
+        # At most two items per worker are read ahead, so the input can be a
+        # generator of any size and results come back in the input order.
+        # Past the deadline, in seconds, the items left fail without being
+        # sent.
+        deadline_at = timeouts.get_deadline(deadline)
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending: collections.deque[futures.Future[Any]] = collections.deque()
+            for entidade in entidades:
+                pending.append(
+                    executor.submit(self._enviar_item, enviar, entidade, deadline_at)
+                )
+                if len(pending) >= 2 * max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _enviar_item(
+        self,
+        enviar: Callable[[Any], Any],
+        entidade: Any,
+        deadline_at: Optional[float] = None,
+    ) -> namedtuples.BatchItemResult:
+        with timeouts.deadline_at(deadline_at), context.call_context() as call:
+            start = time.perf_counter()
+            try:
+                response = enviar(entidade)
+            except (self.Error, requests.RequestException) as exc:
+                return namedtuples.BatchItemResult(
+                    entity=entidade,
+                    success=False,
+                    status_code=getattr(exc, "status_code", call.status_code),
+                    latency=time.perf_counter() - start,
+                    error=exc,
+                    error_body=getattr(exc, "content", None),
+                    attempts=call.attempts,
+                )
+            return namedtuples.BatchItemResult(
+                entity=entidade,
+                success=True,
+                status_code=call.status_code,
+                latency=time.perf_counter() - start,
+                response=response,
+                skipped=call.skipped,
+                attempts=call.attempts,
+            )
+
     def retry_on_expired_token(
         self, request_call: Callable[..., Any], *args: Any, **kwargs: Any
     ) -> Any:
+        # The request_call should read default_headers when called, so the
+        # retry goes out with the token that replaced the expired one. The
+        # token is fetched here so the one invalidated is the one sent.
+        token = self.token
         try:
             response = request_call(*args, **kwargs)
         except self.Error as exc:
-            if errors.TOKEN_INVALIDO not in str(exc):
+            if not self.is_expired_token_error(exc):
                 raise exc
-            self._token = self.get_token()
+            self.token_manager.invalidate(token)
             response = request_call(*args, **kwargs)
         return response
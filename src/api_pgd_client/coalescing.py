@@ -0,0 +1,114 @@
+import asyncio
+import functools
+import threading
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any, Optional, TypeVar
+
+from . import namedtuples
+from .constants import headers as constants_headers
+
+T = TypeVar("T")
+
+
+def get_key(
+    method_name: str,
+    url: str,
+    params: Optional[Mapping[str, Any]],
+    headers: Mapping[str, str],
+) -> tuple[Any, ...]:
+    # The token is part of the key, so clients with different credentials
+    # sharing one instance never get each other's responses.
+    return (
+        method_name,
+        url,
+        tuple(sorted((params or {}).items())),
+        headers.get(constants_headers.AUTHORIZATION_HEADER_LABEL),
+    )
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    # Concurrent calls with the same key wait for the first one and share
+    # its result (or its error) instead of sending the same request again.
+    def __init__(self) -> None:
+        self._calls: dict[tuple[Any, ...], _Call] = {}
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._coalesced = 0
+
+    def do(self, key: tuple[Any, ...], function: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+                self._issued += 1
+            else:
+                self._coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            shared: T = call.result
+            return shared
+        try:
+            result = call.result = function()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return result
+
+    def stats(self) -> namedtuples.CoalescingStats:
+        with self._lock:
+            return namedtuples.CoalescingStats(
+                issued=self._issued,
+                coalesced=self._coalesced,
+                in_flight=len(self._calls),
+            )
+
+
+class AsyncSingleFlight:
+    # Same as SingleFlight, for coroutines running on one event loop. The
+    # request runs in its own task, so cancelling any caller, the first
+    # one included, only stops that caller from waiting.
+    def __init__(self) -> None:
+        self._calls: dict[tuple[Any, ...], asyncio.Future[Any]] = {}
+        self._issued = 0
+        self._coalesced = 0
+
+    async def do(self, key: tuple[Any, ...], function: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(function())
+            task.add_done_callback(functools.partial(self._finish, key))
+            self._issued += 1
+        else:
+            self._coalesced += 1
+        result: T = await asyncio.shield(task)
+        return result
+
+    def _finish(self, key: tuple[Any, ...], task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Marks the error as retrieved when nobody was left waiting.
+            task.exception()
+
+    def stats(self) -> namedtuples.CoalescingStats:
+        return namedtuples.CoalescingStats(
+            issued=self._issued,
+            coalesced=self._coalesced,
+            in_flight=len(self._calls),
+        )
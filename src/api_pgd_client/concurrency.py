@@ -0,0 +1,80 @@
+import threading
+from typing import Optional
+
+from . import constants, namedtuples
+
+
+class AimdLimiter:
+    # Limits how many requests are in flight and adapts the limit to how
+    # the API is coping: each request that comes back fast and fine adds
+    # 1/limit to it (so about one more slot per round of requests), and an
+    # overload signal (429, 5xx, connection error or a response slower
+    # than latency_threshold) multiplies it by backoff_ratio.
+    def __init__(
+        self,
+        initial_limit: int = constants.CONCURRENCY_INITIAL_LIMIT,
+        min_limit: int = constants.CONCURRENCY_MIN_LIMIT,
+        max_limit: int = constants.CONCURRENCY_MAX_LIMIT,
+        backoff_ratio: float = constants.CONCURRENCY_BACKOFF_RATIO,
+        latency_threshold: float = constants.CONCURRENCY_LATENCY_THRESHOLD,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_threshold = latency_threshold
+        self._limit = float(min(max_limit, max(min_limit, initial_limit)))
+        self._in_flight = 0
+        self._generation = 0
+        self._increases = 0
+        self._decreases = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def is_overload_status(self, status_code: int) -> bool:
+        return status_code == 429 or status_code >= 500
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[int]:
+        # Returns the generation to hand back to release. It changes on
+        # every decrease, so the requests that were already in flight when
+        # the API got overloaded don't shrink the limit again. None means
+        # no slot was freed within timeout.
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._in_flight < int(self._limit), timeout
+            ):
+                return None
+            self._in_flight += 1
+            return self._generation
+
+    def release(self, generation: int, overloaded: bool, latency: float) -> None:
+        if self.latency_threshold > 0 and latency > self.latency_threshold:
+            overloaded = True
+        with self._condition:
+            self._in_flight -= 1
+            if overloaded:
+                if generation == self._generation:
+                    self._limit = max(
+                        float(self.min_limit), self._limit * self.backoff_ratio
+                    )
+                    self._generation += 1
+                    self._decreases += 1
+            elif self._limit < self.max_limit:
+                before = int(self._limit)
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+                if int(self._limit) > before:
+                    self._increases += 1
+            self._condition.notify_all()
+
+    def stats(self) -> namedtuples.ConcurrencyStats:
+        with self._condition:
+            return namedtuples.ConcurrencyStats(
+                limit=int(self._limit),
+                in_flight=self._in_flight,
+                increases=self._increases,
+                decreases=self._decreases,
+                min_limit=self.min_limit,
+                max_limit=self.max_limit,
+            )
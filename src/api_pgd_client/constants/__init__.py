@@ -1,6 +1,54 @@
 from decouple import config
 
 REQUEST_TIMEOUT = config("PGD_API_REQUEST_TIMEOUT", default=300, cast=int)
+CONNECT_TIMEOUT = config("PGD_API_CONNECT_TIMEOUT", default=10, cast=float)
+READ_TIMEOUT = config("PGD_API_READ_TIMEOUT", default=REQUEST_TIMEOUT, cast=float)
+
+POOL_CONNECTIONS = config("PGD_API_POOL_CONNECTIONS", default=10, cast=int)
+POOL_MAXSIZE = config("PGD_API_POOL_MAXSIZE", default=10, cast=int)
+POOL_IDLE_TIMEOUT = config("PGD_API_POOL_IDLE_TIMEOUT", default=60, cast=float)
+
+RETRY_MAX_ATTEMPTS = config("PGD_API_RETRY_MAX_ATTEMPTS", default=3, cast=int)
+RETRY_BACKOFF_BASE = config("PGD_API_RETRY_BACKOFF_BASE", default=0.5, cast=float)
+RETRY_BACKOFF_MAX = config("PGD_API_RETRY_BACKOFF_MAX", default=30, cast=float)
+RETRY_AFTER_MAX = config("PGD_API_RETRY_AFTER_MAX", default=60, cast=float)
+RETRY_BUDGET_RATIO = config("PGD_API_RETRY_BUDGET_RATIO", default=0.2, cast=float)
+RETRY_BUDGET_MAX_TOKENS = config(
+    "PGD_API_RETRY_BUDGET_MAX_TOKENS", default=10, cast=float
+)
+
+RATE_LIMIT_READS_PER_SECOND = config(
+    "PGD_API_RATE_LIMIT_READS_PER_SECOND", default=0, cast=float
+)
+RATE_LIMIT_WRITES_PER_SECOND = config(
+    "PGD_API_RATE_LIMIT_WRITES_PER_SECOND", default=0, cast=float
+)
+RATE_LIMIT_BURST = config("PGD_API_RATE_LIMIT_BURST", default=0, cast=float)
+RATE_LIMIT_PATH = config("PGD_API_RATE_LIMIT_PATH", default="")
+
+BATCH_MAX_WORKERS = config("PGD_API_BATCH_MAX_WORKERS", default=POOL_MAXSIZE, cast=int)
+
+DISPATCH_MAX_WORKERS = config(
+    "PGD_API_DISPATCH_MAX_WORKERS", default=POOL_MAXSIZE, cast=int
+)
+DISPATCH_QUEUE_SIZE = config("PGD_API_DISPATCH_QUEUE_SIZE", default=1000, cast=int)
+DISPATCH_POLICY = config("PGD_API_DISPATCH_POLICY", default="block")
+DISPATCH_BLOCK_TIMEOUT = config("PGD_API_DISPATCH_BLOCK_TIMEOUT", default=0, cast=float)
+
+ADAPTIVE_CONCURRENCY = config("PGD_API_ADAPTIVE_CONCURRENCY", default=False, cast=bool)
+CONCURRENCY_INITIAL_LIMIT = config(
+    "PGD_API_CONCURRENCY_INITIAL_LIMIT", default=2, cast=int
+)
+CONCURRENCY_MIN_LIMIT = config("PGD_API_CONCURRENCY_MIN_LIMIT", default=1, cast=int)
+CONCURRENCY_MAX_LIMIT = config(
+    "PGD_API_CONCURRENCY_MAX_LIMIT", default=BATCH_MAX_WORKERS, cast=int
+)
+CONCURRENCY_BACKOFF_RATIO = config(
+    "PGD_API_CONCURRENCY_BACKOFF_RATIO", default=0.5, cast=float
+)
+CONCURRENCY_LATENCY_THRESHOLD = config(
+    "PGD_API_CONCURRENCY_LATENCY_THRESHOLD", default=0, cast=float
+)
 
 BASE_URL = config("PGD_API_URL", default="https://api-pgd.dth.api.gov.br/")
 
@@ -12,3 +60,22 @@ SOURCE_SYSTEM_ABOUT_URL = config(
 
 API_USERNAME = config("PGD_API_USERNAME")
 API_PASSWORD = config("PGD_API_PASSWORD")
+TOKEN_REFRESH_MARGIN = config("PGD_API_TOKEN_REFRESH_MARGIN", default=60, cast=float)
+TOKEN_STORE_PATH = config("PGD_API_TOKEN_STORE_PATH", default="")
+STATE_STORE_PATH = config("PGD_API_STATE_STORE_PATH", default="")
+OUTBOX_PATH = config("PGD_API_OUTBOX_PATH", default="")
+OUTBOX_BATCH_SIZE = config("PGD_API_OUTBOX_BATCH_SIZE", default=100, cast=int)
+OUTBOX_MAX_ATTEMPTS = config("PGD_API_OUTBOX_MAX_ATTEMPTS", default=10, cast=int)
+OUTBOX_LEASE = config("PGD_API_OUTBOX_LEASE", default=300, cast=float)
+OUTBOX_POLL_INTERVAL = config("PGD_API_OUTBOX_POLL_INTERVAL", default=1, cast=float)
+OUTBOX_BACKOFF_BASE = config("PGD_API_OUTBOX_BACKOFF_BASE", default=5, cast=float)
+OUTBOX_BACKOFF_MAX = config("PGD_API_OUTBOX_BACKOFF_MAX", default=600, cast=float)
+
+CACHE_MAXSIZE = config("PGD_API_CACHE_MAXSIZE", default=0, cast=int)
+CACHE_TTL = config("PGD_API_CACHE_TTL", default=60, cast=float)
+CACHE_NEGATIVE_TTL = config("PGD_API_CACHE_NEGATIVE_TTL", default=30, cast=float)
+CONDITIONAL_CACHE_MAXSIZE = config(
+    "PGD_API_CONDITIONAL_CACHE_MAXSIZE", default=0, cast=int
+)
+PROFILE = config("PGD_API_PROFILE", default=False, cast=bool)
+COALESCE_REQUESTS = config("PGD_API_COALESCE_REQUESTS", default=False, cast=bool)
@@ -1,4 +1,9 @@
+import re
+from collections.abc import Callable
+from typing import Optional
+
 from .. import namedtuples
+from ..utils.endpoints import compile_path, compile_pattern
 
 GET_METHOD = "GET"
 DELETE_METHOD = "DELETE"
@@ -33,3 +38,16 @@ _ENDPOINTS = [
 ENDPOINTS: dict[str, namedtuples.Endpoint] = {
     endpoint.name: endpoint for endpoint in _ENDPOINTS
 }
+PATH_BUILDERS: dict[str, Callable[..., str]] = {
+    endpoint.name: compile_path(endpoint.path) for endpoint in _ENDPOINTS
+}
+PATH_PATTERNS: list[tuple[re.Pattern[str], str]] = [
+    (compile_pattern(endpoint.path), endpoint.name) for endpoint in _ENDPOINTS
+]
+
+
+def match_endpoint_name(path: str) -> Optional[str]:
+    for pattern, name in PATH_PATTERNS:
+        if pattern.fullmatch(path):
+            return name
+    return None
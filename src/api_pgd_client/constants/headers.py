@@ -17,3 +17,8 @@ USER_AGENT_HEADER_LABEL = "User-Agent"
 USER_AGENT_HEADER = namedtuples.HeaderItem(
     USER_AGENT_HEADER_LABEL, "{system_name}/{system_version} ({system_url})"
 )
+ETAG_HEADER_LABEL = "ETag"
+LAST_MODIFIED_HEADER_LABEL = "Last-Modified"
+IF_NONE_MATCH_HEADER_LABEL = "If-None-Match"
+IF_MODIFIED_SINCE_HEADER_LABEL = "If-Modified-Since"
+RETRY_AFTER_HEADER_LABEL = "Retry-After"
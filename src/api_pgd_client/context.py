@@ -0,0 +1,31 @@
+import contextlib
+import contextvars
+import dataclasses
+from collections.abc import Iterator
+from typing import Optional
+
+
+@dataclasses.dataclass
+class CallContext:
+    status_code: Optional[int] = None
+    skipped: bool = False
+    attempts: int = 0
+
+
+_current_call: contextvars.ContextVar[Optional[CallContext]] = contextvars.ContextVar(
+    "api_pgd_client_call", default=None
+)
+
+
+def current_call() -> Optional[CallContext]:
+    return _current_call.get()
+
+
+@contextlib.contextmanager
+def call_context() -> Iterator[CallContext]:
+    call = CallContext()
+    token = _current_call.set(call)
+    try:
+        yield call
+    finally:
+        _current_call.reset(token)
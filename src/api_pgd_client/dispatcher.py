@@ -0,0 +1,185 @@
+import collections
+import contextvars
+import threading
+import time
+from collections.abc import Callable
+from concurrent import futures
+from typing import Any, Optional
+
+from . import constants, namedtuples
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+REJECT = "reject"
+POLICIES = frozenset({BLOCK, DROP_OLDEST, REJECT})
+
+
+class _Job:
+    __slots__ = ("future", "context", "function", "args", "kwargs")
+
+    def __init__(
+        self,
+        function: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ):
+        self.future: futures.Future[Any] = futures.Future()
+        # The caller's context, so a deadline around the submission still
+        # applies when a worker runs it.
+        self.context = contextvars.copy_context()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+
+
+class Dispatcher:
+    # Runs calls on a pool of worker threads sharing the client's
+    # connection pool and hands back a Future right away. At most max_queue
+    # calls wait for a worker; past that the policy decides: "block" waits
+    # up to block_timeout seconds (0 waits for as long as needed) for room,
+    # "drop_oldest" fails the call waiting the longest to make room and
+    # "reject" fails the new one. Both failures are the client's Error.
+    def __init__(
+        self,
+        api_client: Any,
+        max_workers: int = constants.DISPATCH_MAX_WORKERS,
+        max_queue: int = constants.DISPATCH_QUEUE_SIZE,
+        policy: str = constants.DISPATCH_POLICY,
+        block_timeout: float = constants.DISPATCH_BLOCK_TIMEOUT,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(
+                f"Unknown policy {policy!r}, use one of {sorted(POLICIES)}."
+            )
+        self.api_client = api_client
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._queue: collections.deque[_Job] = collections.deque()
+        self._condition = threading.Condition()
+        self._workers: list[threading.Thread] = []
+        self._shutdown = False
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._dropped = 0
+        self._rejected = 0
+
+    def submit(
+        self, function: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> futures.Future[Any]:
+        job = _Job(function, args, kwargs)
+        dropped = None
+        with self._condition:
+            if self._shutdown:
+                raise self.api_client.build_error("Dispatcher is shut down.")
+            if len(self._queue) >= self.max_queue:
+                if self.policy == DROP_OLDEST:
+                    dropped = self._queue.popleft()
+                    self._dropped += 1
+                elif self.policy == REJECT or not self._wait_for_room():
+                    self._rejected += 1
+                    raise self.api_client.build_error(
+                        f"Dispatcher queue is full ({self.max_queue} waiting)."
+                    )
+            self._queue.append(job)
+            if len(self._workers) < self.max_workers:
+                self._start_worker()
+            self._condition.notify_all()
+        if dropped is not None and dropped.future.set_running_or_notify_cancel():
+            dropped.future.set_exception(
+                self.api_client.build_error(
+                    "Dropped from the dispatcher queue to make room for newer calls."
+                )
+            )
+        return job.future
+
+    def _wait_for_room(self) -> bool:
+        timeout = self.block_timeout or None
+        return (
+            self._condition.wait_for(
+                lambda: len(self._queue) < self.max_queue or self._shutdown, timeout
+            )
+            and not self._shutdown
+        )
+
+    def _start_worker(self) -> None:
+        worker = threading.Thread(
+            target=self._work, name=f"pgd-dispatcher-{len(self._workers)}", daemon=True
+        )
+        self._workers.append(worker)
+        worker.start()
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._shutdown)
+                if not self._queue:
+                    return
+                job = self._queue.popleft()
+                self._in_flight += 1
+                self._condition.notify_all()
+            try:
+                self._run(job)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+
+    def _run(self, job: _Job) -> None:
+        if not job.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = job.context.run(job.function, *job.args, **job.kwargs)
+        except BaseException as exc:
+            with self._condition:
+                self._failed += 1
+            job.future.set_exception(exc)
+        else:
+            with self._condition:
+                self._completed += 1
+            job.future.set_result(result)
+
+    def shutdown(
+        self,
+        wait: bool = True,
+        cancel_pending: bool = False,
+        timeout: Optional[float] = None,
+    ) -> None:
+        # New submissions fail from here on; what is queued is still sent,
+        # unless cancel_pending, and wait blocks until it is done.
+        with self._condition:
+            self._shutdown = True
+            cancelled = list(self._queue) if cancel_pending else []
+            if cancel_pending:
+                self._queue.clear()
+            self._condition.notify_all()
+            workers = list(self._workers)
+        for job in cancelled:
+            job.future.cancel()
+        if not wait:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in workers:
+            worker.join(
+                None if deadline is None else max(0, deadline - time.monotonic())
+            )
+
+    def __enter__(self) -> "Dispatcher":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+
+    def stats(self) -> namedtuples.DispatcherStats:
+        with self._condition:
+            return namedtuples.DispatcherStats(
+                queued=len(self._queue),
+                in_flight=self._in_flight,
+                completed=self._completed,
+                failed=self._failed,
+                dropped=self._dropped,
+                rejected=self._rejected,
+                workers=len(self._workers),
+            )
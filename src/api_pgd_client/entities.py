@@ -1,11 +1,44 @@
 import dataclasses
-from typing import Any
+from collections.abc import Callable, Mapping, MutableSequence
+from typing import Any, TypeVar, Union
+
+from .utils import serialization
+
+BaseEntityType = TypeVar("BaseEntityType", bound="BaseEntity")
+
+# A nested collection holds the API's dicts by default, a list of entities
+# after from_dict(..., nested=True) and a LazyEntityList of them after
+# from_dict(..., lazy=True).
+NestedEntities = Union[list[dict[str, Any]], MutableSequence[BaseEntityType]]
 
 
 @dataclasses.dataclass()
 class BaseEntity:
+    __slots__ = ()
+
     def to_dict(self) -> dict[str, Any]:
-        return dataclasses.asdict(self)
+        return serialization.get_encoder(type(self))(self)
+
+    @classmethod
+    def from_dict(
+        cls: type[BaseEntityType],
+        data: Mapping[str, Any],
+        nested: bool = False,
+        intern: bool = False,
+        lazy: bool = False,
+    ) -> BaseEntityType:
+        try:
+            decode = _decoders[cls, nested, intern, lazy]
+        except KeyError:
+            decode = get_decoder(cls, nested, intern, lazy)
+        entity: BaseEntityType = decode(data)
+        return entity
+
+
+def get_kind(entity: BaseEntity) -> str:
+    # The class name, the same for the slotted variants.
+    name = type(entity).__name__
+    return name[len("Slotted") :] if name.startswith("Slotted") else name
 
 
 @dataclasses.dataclass()
@@ -43,7 +76,7 @@ class PlanoDeEntregas(BaseEntity):
     data_termino: str = ""
     avaliacao: int = 0
     data_avaliacao: str = ""
-    entregas: list[dict[str, Any]] = dataclasses.field(default_factory=list)
+    entregas: NestedEntities["Entrega"] = dataclasses.field(default_factory=list)
 
 
 @dataclasses.dataclass()
@@ -89,7 +122,140 @@ class PlanoDeTrabalho(BaseEntity):
     data_inicio: str = ""
     data_termino: str = ""
     carga_horaria_disponivel: int = 0
-    contribuicoes: list[dict[str, Any]] = dataclasses.field(default_factory=list)
-    avaliacoes_registros_execucao: list[dict[str, Any]] = dataclasses.field(
+    contribuicoes: NestedEntities[Contribuicao] = dataclasses.field(
         default_factory=list
     )
+    avaliacoes_registros_execucao: NestedEntities[AvaliacaoRegistroExecucao] = (
+        dataclasses.field(default_factory=list)
+    )
+
+
+def _make_slotted(cls: type[BaseEntityType]) -> type[BaseEntityType]:
+    # dataclass(slots=True) needs Python 3.10, so the class is rebuilt here
+    # the same way: same bases and methods, with the fields as __slots__
+    # instead of class attributes and no per-instance __dict__.
+    field_names = tuple(field.name for field in dataclasses.fields(cls))
+    namespace = {
+        key: value
+        for key, value in cls.__dict__.items()
+        if key not in field_names and key not in ("__dict__", "__weakref__")
+    }
+    name = f"Slotted{cls.__name__}"
+    namespace.update(__slots__=field_names, __qualname__=name)
+    slotted: type[BaseEntityType] = type(name, cls.__bases__, namespace)
+    return slotted
+
+
+SlottedUser = _make_slotted(User)
+SlottedParticipante = _make_slotted(Participante)
+SlottedPlanoDeEntregas = _make_slotted(PlanoDeEntregas)
+SlottedEntrega = _make_slotted(Entrega)
+SlottedContribuicao = _make_slotted(Contribuicao)
+SlottedAvaliacaoRegistroExecucao = _make_slotted(AvaliacaoRegistroExecucao)
+SlottedPlanoDeTrabalho = _make_slotted(PlanoDeTrabalho)
+
+SLOTTED_ENTITIES: dict[type[BaseEntity], type[BaseEntity]] = {
+    User: SlottedUser,
+    Participante: SlottedParticipante,
+    PlanoDeEntregas: SlottedPlanoDeEntregas,
+    Entrega: SlottedEntrega,
+    Contribuicao: SlottedContribuicao,
+    AvaliacaoRegistroExecucao: SlottedAvaliacaoRegistroExecucao,
+    PlanoDeTrabalho: SlottedPlanoDeTrabalho,
+}
+
+NESTED_ENTITIES: dict[type[BaseEntity], dict[str, type[BaseEntity]]] = {
+    PlanoDeEntregas: {"entregas": Entrega},
+    PlanoDeTrabalho: {
+        "contribuicoes": Contribuicao,
+        "avaliacoes_registros_execucao": AvaliacaoRegistroExecucao,
+    },
+}
+
+# Fields whose values repeat across records (unit codes and origin,
+# dates, unit names), replaced by from_dict(..., intern=True) with a
+# shared object for each distinct value.
+INTERNED_FIELDS: dict[type[BaseEntity], frozenset[str]] = {
+    User: frozenset({"origem_unidade", "cod_unidade_autorizadora", "sistema_gerador"}),
+    Participante: frozenset(
+        {
+            "origem_unidade",
+            "cod_unidade_autorizadora",
+            "cod_unidade_lotacao",
+            "cod_unidade_instituidora",
+            "data_assinatura_tcr",
+        }
+    ),
+    PlanoDeEntregas: frozenset(
+        {
+            "origem_unidade",
+            "cod_unidade_autorizadora",
+            "cod_unidade_instituidora",
+            "cod_unidade_executora",
+            "data_inicio",
+            "data_termino",
+            "data_avaliacao",
+        }
+    ),
+    Entrega: frozenset(
+        {
+            "tipo_meta",
+            "data_entrega",
+            "nome_unidade_demandante",
+            "nome_unidade_destinataria",
+        }
+    ),
+    Contribuicao: frozenset({"id_plano_entregas"}),
+    AvaliacaoRegistroExecucao: frozenset(
+        {
+            "id_periodo_avaliativo",
+            "data_inicio_periodo_avaliativo",
+            "data_fim_periodo_avaliativo",
+            "data_avaliacao_registros_execucao",
+        }
+    ),
+    PlanoDeTrabalho: frozenset(
+        {
+            "origem_unidade",
+            "cod_unidade_autorizadora",
+            "cod_unidade_executora",
+            "cod_unidade_lotacao_participante",
+            "data_inicio",
+            "data_termino",
+        }
+    ),
+}
+
+for _entity, _slotted_entity in SLOTTED_ENTITIES.items():
+    INTERNED_FIELDS[_slotted_entity] = INTERNED_FIELDS[_entity]
+    if _entity in NESTED_ENTITIES:
+        NESTED_ENTITIES[_slotted_entity] = {
+            name: SLOTTED_ENTITIES[nested_entity]
+            for name, nested_entity in NESTED_ENTITIES[_entity].items()
+        }
+
+
+_decoders: dict[tuple[type, bool, bool, bool], Callable[[Mapping[str, Any]], Any]] = {}
+
+
+def get_decoder(
+    cls: type, nested: bool, intern: bool = False, lazy: bool = False
+) -> Callable[[Mapping[str, Any]], Any]:
+    # lazy implies nested: the items become entities when they are read.
+    try:
+        return _decoders[cls, nested, intern, lazy]
+    except KeyError:
+        pass
+    nested_decoders = {}
+    if nested or lazy:
+        nested_decoders = {
+            name: get_decoder(entity, nested, intern, lazy)
+            for name, entity in NESTED_ENTITIES.get(cls, {}).items()
+        }
+    decoder = _decoders[cls, nested, intern, lazy] = serialization.compile_decoder(
+        cls,
+        nested_decoders,
+        INTERNED_FIELDS.get(cls, frozenset()) if intern else (),
+        lazy,
+    )
+    return decoder
@@ -0,0 +1,253 @@
+import csv
+import datetime
+import gzip
+import json
+import os
+import typing
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from typing import IO, Any, Generic, Optional, Union
+
+from . import constants, entities, namedtuples
+
+Source = Union[str, "os.PathLike[str]", IO[str]]
+Converter = Callable[[Any], Any]
+ErrorHandler = Callable[[int, Any, Exception], None]
+
+TRUE_VALUES = frozenset({"1", "true", "t", "sim", "s", "yes", "y"})
+FALSE_VALUES = frozenset({"0", "false", "f", "nao", "não", "n", "no"})
+
+
+def to_int(value: Any) -> int:
+    # Spreadsheets often export whole numbers as "12.0".
+    if isinstance(value, str):
+        value = value.strip()
+        return int(float(value)) if "." in value else int(value)
+    return int(value)
+
+
+def to_float(value: Any) -> float:
+    if isinstance(value, str):
+        return float(value.strip().replace(",", "."))
+    return float(value)
+
+
+def to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValueError(f"Not a boolean: {value!r}")
+    return bool(value)
+
+
+def to_str(value: Any) -> str:
+    return value.strip() if isinstance(value, str) else str(value)
+
+
+def to_list(value: Any) -> list[Any]:
+    # A CSV cell holding a list, e.g. contribuicoes, holds it as JSON.
+    if isinstance(value, str):
+        value = json.loads(value)
+    if not isinstance(value, list):
+        raise ValueError(f"Not a list: {value!r}")
+    return value
+
+
+def date_converter(date_format: str) -> Converter:
+    # For exports with dates like "31/12/2024": date_converter("%d/%m/%Y")
+    # turns them into the ISO dates the API takes.
+    def convert(value: Any) -> str:
+        return datetime.datetime.strptime(to_str(value), date_format).date().isoformat()
+
+    return convert
+
+
+CONVERTERS: dict[Any, Converter] = {
+    int: to_int,
+    float: to_float,
+    bool: to_bool,
+    str: to_str,
+    list: to_list,
+}
+
+
+def get_converters(
+    entity_class: type[entities.BaseEntity],
+    converters: Optional[Mapping[str, Converter]] = None,
+) -> dict[str, Converter]:
+    # One converter per field, from its type unless one is given for it.
+    converters = converters or {}
+    result = {}
+    for name, hint in typing.get_type_hints(entity_class).items():
+        if typing.get_origin(hint) is Union:
+            # Nested collections are read as the first type they can hold.
+            hint = typing.get_args(hint)[0]
+        converter = converters.get(name) or CONVERTERS.get(
+            typing.get_origin(hint) or hint
+        )
+        if converter is not None:
+            result[name] = converter
+    return result
+
+
+class EntityReader(Generic[entities.BaseEntityType]):
+    # Turns rows (dicts) into entities one at a time, so the rows can come
+    # from a file of any size. parse, when given, turns each raw row into a
+    # dict first (None skips it). columns maps field names to the source's
+    # column names where they differ. Empty cells keep the field's default.
+    # A row that can't be parsed or converted, or that validate rejects by
+    # raising ValueError, raises ValueError with its number, or is passed,
+    # raw, to on_error and skipped.
+    def __init__(
+        self,
+        entity_class: type[entities.BaseEntityType],
+        rows: Iterable[Any],
+        columns: Optional[Mapping[str, str]] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+        validate: Optional[Callable[[entities.BaseEntityType], None]] = None,
+        on_error: Optional[ErrorHandler] = None,
+        parse: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.entity_class = entity_class
+        self.rows = rows
+        self.validate = validate
+        self.on_error = on_error
+        self.parse = parse
+        self.converters = get_converters(entity_class, converters)
+        columns = columns or {}
+        self.columns = [
+            (name, columns.get(name, name), converter)
+            for name, converter in self.converters.items()
+        ]
+        self.read = 0
+        self.invalid = 0
+
+    def __iter__(self) -> Iterator[entities.BaseEntityType]:
+        for row_number, raw in enumerate(self.rows, start=1):
+            try:
+                row = raw if self.parse is None else self.parse(raw)
+                if row is None:
+                    continue
+                entity = self.build_entity(row)
+                if self.validate is not None:
+                    self.validate(entity)
+            except (ValueError, TypeError) as exc:
+                self.read += 1
+                self.invalid += 1
+                if self.on_error is None:
+                    raise ValueError(f"Row {row_number}: {exc}") from exc
+                self.on_error(row_number, raw, exc)
+                continue
+            self.read += 1
+            yield entity
+
+    def build_entity(self, row: Any) -> entities.BaseEntityType:
+        if not isinstance(row, Mapping):
+            raise ValueError(f"Not an object: {row!r}")
+        data = {}
+        for name, column, converter in self.columns:
+            value = row.get(column)
+            if value is None or value == "":
+                continue
+            try:
+                data[name] = converter(value)
+            except (ValueError, TypeError) as exc:
+                raise ValueError(f"{column}={value!r}: {exc}") from exc
+        return self.entity_class.from_dict(data)
+
+
+def open_source(source: Source, encoding: str) -> IO[str]:
+    if hasattr(source, "read"):
+        return source  # type: ignore[return-value]
+    path = os.fspath(source)
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding=encoding, newline="")
+    return open(path, encoding=encoding, newline="")
+
+
+def _iter_lines(source: Source, encoding: str) -> Iterator[str]:
+    # The file is opened on the first line and closed after the last one;
+    # file objects passed in are left open.
+    file = open_source(source, encoding)
+    try:
+        yield from file
+    finally:
+        if file is not source:
+            file.close()
+
+
+def parse_jsonl_line(line: str) -> Any:
+    # Blank lines are skipped; they still count for the line numbers.
+    if not line.strip():
+        return None
+    return json.loads(line)
+
+
+def read_csv(
+    source: Source,
+    entity_class: type[entities.BaseEntityType],
+    columns: Optional[Mapping[str, str]] = None,
+    converters: Optional[Mapping[str, Converter]] = None,
+    validate: Optional[Callable[[entities.BaseEntityType], None]] = None,
+    on_error: Optional[ErrorHandler] = None,
+    delimiter: str = ",",
+    encoding: str = "utf-8-sig",
+) -> EntityReader[entities.BaseEntityType]:
+    # source is a path (gzipped when it ends with .gz) or a text file.
+    return EntityReader(
+        entity_class,
+        csv.DictReader(_iter_lines(source, encoding), delimiter=delimiter),
+        columns,
+        converters,
+        validate,
+        on_error,
+    )
+
+
+def read_jsonl(
+    source: Source,
+    entity_class: type[entities.BaseEntityType],
+    columns: Optional[Mapping[str, str]] = None,
+    converters: Optional[Mapping[str, Converter]] = None,
+    validate: Optional[Callable[[entities.BaseEntityType], None]] = None,
+    on_error: Optional[ErrorHandler] = None,
+    encoding: str = "utf-8",
+) -> EntityReader[entities.BaseEntityType]:
+    return EntityReader(
+        entity_class,
+        _iter_lines(source, encoding),
+        columns,
+        converters,
+        validate,
+        on_error,
+        parse_jsonl_line,
+    )
+
+
+def send(
+    api_client: Any,
+    entidades: Iterable[entities.BaseEntity],
+    max_workers: int = constants.BATCH_MAX_WORKERS,
+    deadline: Optional[float] = None,
+    on_failure: Optional[Callable[[namedtuples.BatchItemResult], None]] = None,
+) -> namedtuples.IngestStats:
+    # read -> validate -> encode -> send with at most two entities per
+    # worker between reading and sending, so memory stays flat whatever
+    # the size of the input. Only counts are kept; failures go to
+    # on_failure as they come.
+    sent = skipped = failed = 0
+    for result in api_client.enviar_em_fluxo(entidades, max_workers, deadline):
+        if not result.success:
+            failed += 1
+            if on_failure is not None:
+                on_failure(result)
+        elif result.skipped:
+            skipped += 1
+        else:
+            sent += 1
+    invalid = entidades.invalid if isinstance(entidades, EntityReader) else 0
+    return namedtuples.IngestStats(
+        sent=sent, skipped=skipped, failed=failed, invalid=invalid
+    )
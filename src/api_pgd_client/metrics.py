@@ -0,0 +1,297 @@
+import bisect
+import contextvars
+import dataclasses
+import logging
+import math
+import threading
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from . import namedtuples
+from .constants import endpoints
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+OTHER_ENDPOINT = "other"
+METRIC_PREFIX = "pgd_api"
+# Fields of the components' stats that only go up, exported as counters.
+COUNTER_FIELDS = frozenset(
+    {
+        "hits",
+        "misses",
+        "evictions",
+        "expirations",
+        "issued",
+        "coalesced",
+        "increases",
+        "decreases",
+    }
+)
+
+logger = logging.getLogger(__name__)
+
+_token_wait: contextvars.ContextVar[float] = contextvars.ContextVar(
+    "api_pgd_client_token_wait", default=0.0
+)
+
+
+def record_token_wait(seconds: float) -> None:
+    # Time spent getting a token is only known to the client, before the
+    # request is made; it adds up until the next request's event takes it.
+    _token_wait.set(_token_wait.get() + seconds)
+
+
+@dataclasses.dataclass
+class RequestEvent:
+    # One attempt of a request. Timings are in seconds: queue_wait is the
+    # time spent waiting for the rate and concurrency limiters; send goes
+    # from sending the request, connecting first if needed, up to the
+    # response headers; receive is the rest, reading the body. Where the
+    # HTTP library doesn't tell the two apart, receive is 0.
+    endpoint: str
+    method: str
+    url: str
+    attempt: int
+    bytes_sent: int = 0
+    status_code: Optional[int] = None
+    bytes_received: int = 0
+    token_wait: float = 0.0
+    queue_wait: float = 0.0
+    send: float = 0.0
+    receive: float = 0.0
+    error: Optional[BaseException] = None
+
+    @property
+    def duration(self) -> float:
+        return self.send + self.receive
+
+
+class Hook:
+    def before_request(self, event: RequestEvent) -> None:
+        pass
+
+    def after_request(self, event: RequestEvent) -> None:
+        pass
+
+
+class LatencyHistogram:
+    __slots__ = ("bounds", "counts", "total", "errors", "bytes_sent", "bytes_received")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        # The last count is for the values above every bound.
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def observe(self, event: RequestEvent) -> None:
+        duration = event.duration
+        self.counts[bisect.bisect_left(self.bounds, duration)] += 1
+        self.total += duration
+        self.bytes_sent += event.bytes_sent
+        self.bytes_received += event.bytes_received
+        if event.error is not None or (event.status_code or 0) >= 400:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        # Interpolated inside the bucket, as Prometheus' histogram_quantile.
+        count = sum(self.counts)
+        if not count:
+            return math.nan
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                return lower + (bound - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = bound
+        return self.bounds[-1]
+
+    def snapshot(self) -> namedtuples.LatencyStats:
+        cumulative = 0
+        buckets = []
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            cumulative += bucket_count
+            buckets.append((bound, cumulative))
+        buckets.append((math.inf, cumulative + self.counts[-1]))
+        return namedtuples.LatencyStats(
+            count=buckets[-1][1],
+            errors=self.errors,
+            total=self.total,
+            bytes_sent=self.bytes_sent,
+            bytes_received=self.bytes_received,
+            p50=self.quantile(0.5),
+            p90=self.quantile(0.9),
+            p99=self.quantile(0.99),
+            buckets=tuple(buckets),
+        )
+
+
+class Instrumentation:
+    def __init__(
+        self,
+        hooks: Iterable[Hook] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.hooks = list(hooks)
+        self.buckets = tuple(buckets)
+        self._histograms: dict[tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Hook) -> None:
+        self.hooks.append(hook)
+
+    def start(
+        self, method_name: str, url: str, attempt: int, **kwargs: Any
+    ) -> RequestEvent:
+        body = kwargs.get("data") or kwargs.get("content")
+        event = RequestEvent(
+            endpoint=endpoints.match_endpoint_name(urlsplit(url).path)
+            or OTHER_ENDPOINT,
+            method=method_name.upper(),
+            url=url,
+            attempt=attempt,
+            bytes_sent=len(body) if isinstance(body, (bytes, str)) else 0,
+            token_wait=_token_wait.get(),
+        )
+        if event.token_wait:
+            _token_wait.set(0.0)
+        for hook in self.hooks:
+            self._call_hook(hook.before_request, event)
+        return event
+
+    def finish(
+        self,
+        event: RequestEvent,
+        response: Any = None,
+        error: Optional[BaseException] = None,
+        elapsed: float = 0.0,
+    ) -> None:
+        # elapsed is the time spent in the HTTP library; the response's own
+        # elapsed, when it has one, tells when the headers arrived.
+        event.error = error
+        event.send = elapsed
+        if response is not None:
+            event.status_code = response.status_code
+            content = getattr(response, "content", None)
+            if isinstance(content, bytes):
+                event.bytes_received = len(content)
+            try:
+                headers_elapsed = response.elapsed
+            except (AttributeError, RuntimeError):
+                # httpx only has it once the response is closed.
+                headers_elapsed = None
+            if hasattr(headers_elapsed, "total_seconds"):
+                event.send = min(elapsed, headers_elapsed.total_seconds())
+                event.receive = elapsed - event.send
+        key = (event.method, event.endpoint)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(self.buckets)
+            histogram.observe(event)
+        for hook in self.hooks:
+            self._call_hook(hook.after_request, event)
+
+    @staticmethod
+    def _call_hook(method: Callable[[RequestEvent], None], event: RequestEvent) -> None:
+        # Hooks run inside the request: one failing is logged rather than
+        # replacing the response or the request's own error.
+        try:
+            method(event)
+        except Exception:
+            logger.exception("Error in the instrumentation hook %r.", method)
+
+    def stats(self) -> dict[str, namedtuples.LatencyStats]:
+        with self._lock:
+            return {
+                f"{method} {endpoint}": histogram.snapshot()
+                for (method, endpoint), histogram in sorted(self._histograms.items())
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(stats: namedtuples.ClientStats) -> str:
+    # Prometheus text exposition format, version 0.0.4.
+    lines = []
+    name = f"{METRIC_PREFIX}_request_duration_seconds"
+    lines.append(f"# HELP {name} Time spent sending requests and reading responses.")
+    lines.append(f"# TYPE {name} histogram")
+    for key, latency in stats.latency.items():
+        method, endpoint = key.split(" ", 1)
+        labels = f'endpoint="{endpoint}",method="{method}"'
+        for bound, count in latency.buckets:
+            lines.append(
+                f'{name}_bucket{{{labels},le="{_format_value(bound)}"}} {count}'
+            )
+        lines.append(f"{name}_sum{{{labels}}} {_format_value(latency.total)}")
+        lines.append(f"{name}_count{{{labels}}} {latency.count}")
+    for metric, field, help_text in (
+        ("request_errors_total", "errors", "Attempts that failed or got a 4xx/5xx."),
+        ("request_bytes_sent_total", "bytes_sent", "Bytes sent in request bodies."),
+        (
+            "request_bytes_received_total",
+            "bytes_received",
+            "Bytes received in response bodies.",
+        ),
+    ):
+        if not stats.latency:
+            break
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for key, latency in stats.latency.items():
+            method, endpoint = key.split(" ", 1)
+            lines.append(
+                f'{name}{{endpoint="{endpoint}",method="{method}"}} '
+                f"{getattr(latency, field)}"
+            )
+    samples: list[tuple[str, str, float]] = []
+    for prefix, component in (
+        ("response_cache", stats.response_cache),
+        ("conditional_cache", stats.conditional_cache),
+        ("coalescing", stats.coalescing),
+        ("concurrency", stats.concurrency),
+    ):
+        if component is not None:
+            for field, value in component._asdict().items():
+                if field in COUNTER_FIELDS:
+                    samples.append((f"{prefix}_{field}_total", "counter", value))
+                else:
+                    samples.append((f"{prefix}_{field}", "gauge", value))
+    if stats.retry_budget is not None:
+        samples.append(("retry_budget_tokens", "gauge", stats.retry_budget))
+    for metric, metric_type, value in samples:
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
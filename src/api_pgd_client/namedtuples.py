@@ -2,3 +2,69 @@ from collections import namedtuple
 
 HeaderItem = namedtuple("HeaderItem", ("name", "value"))
 Endpoint = namedtuple("Endpoint", ("name", "path", "allowed_methods"))
+BatchItemResult = namedtuple(
+    "BatchItemResult",
+    (
+        "entity",
+        "success",
+        "status_code",
+        "latency",
+        "response",
+        "error",
+        "error_body",
+        "skipped",
+        "attempts",
+    ),
+    defaults=(None, None, None, False, 0),
+)
+CacheStats = namedtuple(
+    "CacheStats", ("hits", "misses", "evictions", "expirations", "size", "maxsize")
+)
+ValidatedResponse = namedtuple(
+    "ValidatedResponse", ("etag", "last_modified", "content")
+)
+ConcurrencyStats = namedtuple(
+    "ConcurrencyStats",
+    ("limit", "in_flight", "increases", "decreases", "min_limit", "max_limit"),
+)
+CoalescingStats = namedtuple("CoalescingStats", ("issued", "coalesced", "in_flight"))
+Timeout = namedtuple("Timeout", ("connect", "read"))
+LatencyStats = namedtuple(
+    "LatencyStats",
+    (
+        "count",
+        "errors",
+        "total",
+        "bytes_sent",
+        "bytes_received",
+        "p50",
+        "p90",
+        "p99",
+        "buckets",
+    ),
+)
+ClientStats = namedtuple(
+    "ClientStats",
+    (
+        "latency",
+        "response_cache",
+        "conditional_cache",
+        "coalescing",
+        "concurrency",
+        "retry_budget",
+    ),
+)
+StageStats = namedtuple("StageStats", ("count", "total", "per_call", "share"))
+ProfileReport = namedtuple(
+    "ProfileReport", ("calls", "stages", "overhead", "overhead_share")
+)
+OutboxItem = namedtuple(
+    "OutboxItem", ("id", "key", "kind", "data", "version", "attempts", "last_error")
+)
+OutboxStats = namedtuple("OutboxStats", ("pending", "ready", "dead"))
+OutboxDrainerStats = namedtuple("OutboxDrainerStats", ("sent", "retried", "failed"))
+DispatcherStats = namedtuple(
+    "DispatcherStats",
+    ("queued", "in_flight", "completed", "failed", "dropped", "rejected", "workers"),
+)
+IngestStats = namedtuple("IngestStats", ("sent", "skipped", "failed", "invalid"))
@@ -0,0 +1,372 @@
+import abc
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from typing import Any, Optional
+
+import requests
+
+from . import constants, entities, namedtuples, retries
+from .utils import encoding
+
+logger = logging.getLogger(__name__)
+
+
+def get_entity(kind: str, data: dict[str, Any]) -> entities.BaseEntity:
+    entity_class: type[entities.BaseEntity] = getattr(entities, kind)
+    return entity_class.from_dict(data)
+
+
+class BaseOutboxStore(abc.ABC):
+    # Entities waiting to be sent. Items are claimed for a lease and only
+    # leave the store when acknowledged, so whatever a crashed process had
+    # claimed is sent again once its lease runs out.
+    def __init__(self) -> None:
+        self.ready = threading.Event()
+
+    @abc.abstractmethod
+    def put(self, kind: str, data: dict[str, Any], key: Optional[str] = None) -> None:
+        pass
+
+    @abc.abstractmethod
+    def claim(self, limit: int, lease: float) -> list[namedtuples.OutboxItem]:
+        pass
+
+    @abc.abstractmethod
+    def ack(self, items: Iterable[namedtuples.OutboxItem]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def retry(self, item: namedtuples.OutboxItem, delay: float, error: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def fail(self, item: namedtuples.OutboxItem, error: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def dead_letters(self) -> list[namedtuples.OutboxItem]:
+        pass
+
+    @abc.abstractmethod
+    def requeue_dead_letters(self) -> int:
+        pass
+
+    @abc.abstractmethod
+    def stats(self) -> namedtuples.OutboxStats:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteOutboxStore(BaseOutboxStore):
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        # Same setup as SqliteStateStore: with WAL and synchronous=NORMAL a
+        # put is a page append without fsync, a few tens of microseconds,
+        # and survives the process crashing (not the machine losing power
+        # before the next checkpoint).
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE, "
+            "kind TEXT NOT NULL, data BLOB NOT NULL, version INTEGER NOT NULL, "
+            "enqueued_at REAL NOT NULL, available_at REAL NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, dead INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_available ON outbox (dead, available_at)"
+        )
+
+    def put(self, kind: str, data: dict[str, Any], key: Optional[str] = None) -> None:
+        # Putting a key again replaces what is waiting to be sent for it.
+        # If it's already in flight, the new version goes out once the
+        # old one is acknowledged.
+        content = encoding.encode_json(data)
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO outbox "
+                "(key, kind, data, version, enqueued_at, available_at) "
+                "VALUES (?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET kind = excluded.kind, "
+                "data = excluded.data, version = outbox.version + 1, "
+                "enqueued_at = excluded.enqueued_at, attempts = 0, dead = 0, "
+                "last_error = NULL, available_at = CASE WHEN outbox.dead "
+                "THEN excluded.available_at ELSE outbox.available_at END",
+                (key, kind, content, now, now),
+            )
+        self.ready.set()
+
+    def claim(self, limit: int, lease: float) -> list[namedtuples.OutboxItem]:
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes
+            # draining the same file never claim the same items.
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._connection.execute(
+                    "SELECT id, key, kind, data, version, attempts, last_error "
+                    "FROM outbox WHERE dead = 0 AND available_at <= ? "
+                    "ORDER BY available_at, id LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                self._connection.executemany(
+                    "UPDATE outbox SET available_at = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    [(now + lease, row[0]) for row in rows],
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            if not rows:
+                self.ready.clear()
+        return [
+            namedtuples.OutboxItem(
+                id=row[0],
+                key=row[1],
+                kind=row[2],
+                data=encoding.decode_json(row[3]),
+                version=row[4],
+                attempts=row[5] + 1,
+                last_error=row[6],
+            )
+            for row in rows
+        ]
+
+    def ack(self, items: Iterable[namedtuples.OutboxItem]) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                for item in items:
+                    deleted = self._connection.execute(
+                        "DELETE FROM outbox WHERE id = ? AND version = ?",
+                        (item.id, item.version),
+                    ).rowcount
+                    if not deleted:
+                        # Replaced while in flight: the new version is due.
+                        self._connection.execute(
+                            "UPDATE outbox SET available_at = ? WHERE id = ?",
+                            (now, item.id),
+                        )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        self.ready.set()
+
+    def retry(self, item: namedtuples.OutboxItem, delay: float, error: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE outbox SET available_at = ?, last_error = ? WHERE id = ?",
+                (time.time() + delay, error, item.id),
+            )
+
+    def fail(self, item: namedtuples.OutboxItem, error: str) -> None:
+        with self._lock:
+            failed = self._connection.execute(
+                "UPDATE outbox SET dead = 1, last_error = ? "
+                "WHERE id = ? AND version = ?",
+                (error, item.id, item.version),
+            ).rowcount
+            if not failed:
+                self._connection.execute(
+                    "UPDATE outbox SET available_at = ? WHERE id = ?",
+                    (time.time(), item.id),
+                )
+
+    def dead_letters(self) -> list[namedtuples.OutboxItem]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, key, kind, data, version, attempts, last_error "
+                "FROM outbox WHERE dead = 1 ORDER BY id"
+            ).fetchall()
+        return [
+            namedtuples.OutboxItem(
+                id=row[0],
+                key=row[1],
+                kind=row[2],
+                data=encoding.decode_json(row[3]),
+                version=row[4],
+                attempts=row[5],
+                last_error=row[6],
+            )
+            for row in rows
+        ]
+
+    def requeue_dead_letters(self) -> int:
+        with self._lock:
+            requeued: int = self._connection.execute(
+                "UPDATE outbox SET dead = 0, attempts = 0, available_at = ? "
+                "WHERE dead = 1",
+                (time.time(),),
+            ).rowcount
+        if requeued:
+            self.ready.set()
+        return requeued
+
+    def stats(self) -> namedtuples.OutboxStats:
+        with self._lock:
+            pending, ready, dead = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(dead = 0 AND available_at <= ?), 0), "
+                "COALESCE(SUM(dead), 0) FROM outbox",
+                (time.time(),),
+            ).fetchone()
+        return namedtuples.OutboxStats(pending=pending - dead, ready=ready, dead=dead)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class OutboxDrainer:
+    # Sends what is in the outbox from a background thread, batch_size
+    # items at a time through the client's batch sending (max_workers
+    # threads). Sent items are acknowledged together; the ones that failed
+    # with a connection error, a 5xx or a 429 come back after a backoff, and
+    # the rest, or those that failed max_attempts times, become dead
+    # letters to be looked at and requeued.
+    def __init__(
+        self,
+        api_client: Any,
+        store: Optional[BaseOutboxStore] = None,
+        batch_size: int = constants.OUTBOX_BATCH_SIZE,
+        max_workers: int = constants.BATCH_MAX_WORKERS,
+        max_attempts: int = constants.OUTBOX_MAX_ATTEMPTS,
+        lease: float = constants.OUTBOX_LEASE,
+        poll_interval: float = constants.OUTBOX_POLL_INTERVAL,
+        backoff_base: float = constants.OUTBOX_BACKOFF_BASE,
+        backoff_max: float = constants.OUTBOX_BACKOFF_MAX,
+    ):
+        if store is None:
+            store = api_client.outbox_store
+        if store is None:
+            raise ValueError("OutboxDrainer needs an outbox store.")
+        self.api_client = api_client
+        self.store = store
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.retry_policy = retries.RetryPolicy(
+            max_attempts=max_attempts,
+            backoff_base=backoff_base,
+            backoff_max=backoff_max,
+        )
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._sent = 0
+        self._retried = 0
+        self._failed = 0
+
+    def drain_once(self) -> int:
+        # Sends one batch and returns how many items it had.
+        items = self.store.claim(self.batch_size, self.lease)
+        if not items:
+            return 0
+        results = self.api_client.enviar_em_lote(
+            (get_entity(item.kind, item.data) for item in items), self.max_workers
+        )
+        sent = []
+        retried = failed = 0
+        for item, result in zip(items, results):
+            if result.success:
+                sent.append(item)
+                continue
+            error = str(result.error)
+            if (
+                self.is_retryable(result)
+                and item.attempts < self.retry_policy.max_attempts
+            ):
+                self.store.retry(
+                    item, self.retry_policy.get_delay(item.attempts), error
+                )
+                retried += 1
+                continue
+            self.store.fail(item, error)
+            failed += 1
+        self.store.ack(sent)
+        with self._lock:
+            self._sent += len(sent)
+            self._retried += retried
+            self._failed += failed
+        return len(items)
+
+    def is_retryable(self, result: namedtuples.BatchItemResult) -> bool:
+        # Connection errors, timeouts, 5xx and 429 may go through later;
+        # anything else, a 4xx or an error raised before sending, won't.
+        status_code = result.status_code
+        if status_code is not None:
+            return bool(
+                status_code >= 500 or self.retry_policy.is_retryable_status(status_code)
+            )
+        error = result.error
+        transient = (requests.ConnectionError, requests.Timeout)
+        return isinstance(error, transient) or isinstance(error.__cause__, transient)
+
+    def drain(self) -> int:
+        # Sends until nothing is ready; items waiting for a retry stay.
+        total = 0
+        while True:
+            count = self.drain_once()
+            if not count:
+                return total
+            total += count
+
+    def run(self) -> None:
+        # An error, e.g. the database being locked for too long, is logged
+        # and the loop goes on after a backoff: claimed items come back
+        # once their lease runs out.
+        errors = 0
+        while not self._stop.is_set():
+            try:
+                count = self.drain_once()
+            except Exception:
+                errors += 1
+                logger.exception("Error while draining the outbox.")
+                self._stop.wait(
+                    max(self.poll_interval, self.retry_policy.get_delay(errors))
+                )
+                continue
+            errors = 0
+            if not count:
+                self.store.ready.wait(self.poll_interval)
+
+    def start(self) -> "OutboxDrainer":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        # The batch being sent is finished first.
+        self._stop.set()
+        self.store.ready.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self) -> "OutboxDrainer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def stats(self) -> namedtuples.OutboxDrainerStats:
+        with self._lock:
+            return namedtuples.OutboxDrainerStats(
+                sent=self._sent, retried=self._retried, failed=self._failed
+            )
@@ -0,0 +1,106 @@
+import contextlib
+import threading
+import time
+from collections.abc import Iterator
+from typing import ContextManager, Optional
+
+from . import metrics, namedtuples
+
+NETWORK_STAGE = "network"
+QUEUE_STAGE = "queue"
+TOKEN_STAGE = "token"
+# Stages spent waiting on the API or on the limiters rather than on our CPU.
+WAITING_STAGES = frozenset({NETWORK_STAGE, QUEUE_STAGE, TOKEN_STAGE})
+
+_NOT_PROFILED = contextlib.nullcontext()
+
+
+class Profiler(metrics.Hook):
+    # Time spent in each stage of the client's calls: building the URL and
+    # the headers, to_dict, encoding, decoding and from_dict on our side,
+    # getting a token, and queueing and network time, taken from the
+    # request events.
+    def __init__(self) -> None:
+        self._stages: dict[str, list[float]] = {}
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def count_call(self) -> None:
+        with self._lock:
+            self._calls += 1
+
+    def record(self, stage_name: str, seconds: float) -> None:
+        with self._lock:
+            totals = self._stages.get(stage_name)
+            if totals is None:
+                totals = self._stages[stage_name] = [0, 0.0]
+            totals[0] += 1
+            totals[1] += seconds
+
+    @contextlib.contextmanager
+    def stage(self, stage_name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage_name, time.perf_counter() - start)
+
+    def after_request(self, event: metrics.RequestEvent) -> None:
+        # The token request is made while getting a token, so its time is
+        # already in the "token" stage.
+        if event.endpoint == "token":
+            return
+        self.record(QUEUE_STAGE, event.queue_wait)
+        self.record(NETWORK_STAGE, event.duration)
+
+    def report(self) -> namedtuples.ProfileReport:
+        with self._lock:
+            calls = self._calls
+            stages = {name: tuple(totals) for name, totals in self._stages.items()}
+        tracked = sum(total for _, total in stages.values())
+        overhead = sum(
+            total for name, (_, total) in stages.items() if name not in WAITING_STAGES
+        )
+        return namedtuples.ProfileReport(
+            calls=calls,
+            stages={
+                name: namedtuples.StageStats(
+                    count=int(count),
+                    total=total,
+                    per_call=total / calls if calls else 0.0,
+                    share=total / tracked if tracked else 0.0,
+                )
+                for name, (count, total) in sorted(
+                    stages.items(), key=lambda item: -item[1][1]
+                )
+            },
+            overhead=overhead,
+            overhead_share=overhead / tracked if tracked else 0.0,
+        )
+
+    def format_report(self) -> str:
+        report = self.report()
+        lines = [
+            f"{report.calls} calls, client overhead "
+            f"{report.overhead_share:.1%} of the tracked time",
+            f"{'stage':<12}{'count':>10}{'total (s)':>12}{'per call (ms)':>15}"
+            f"{'share':>8}",
+        ]
+        for name, stats in report.stages.items():
+            lines.append(
+                f"{name:<12}{stats.count:>10}{stats.total:>12.3f}"
+                f"{stats.per_call * 1000:>15.3f}{stats.share:>8.1%}"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._calls = 0
+
+
+def stage(profiler: Optional[Profiler], stage_name: str) -> ContextManager[None]:
+    # Nothing is measured, and next to nothing spent, without a profiler.
+    if profiler is None:
+        return _NOT_PROFILED
+    return profiler.stage(stage_name)
@@ -0,0 +1,158 @@
+import abc
+import contextlib
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Optional
+
+from . import constants
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+
+class BaseRateLimiter(abc.ABC):
+    # reserve takes the tokens right away, even when the bucket is empty,
+    # and returns how long the caller must wait before sending. Callers
+    # are served in the order they arrive and nobody polls the bucket.
+    # A caller that gives up instead of waiting gives its tokens back with
+    # refund. blocking tells whether the calls may block on I/O.
+    blocking = False
+
+    @abc.abstractmethod
+    def reserve(self, tokens: float = 1) -> float:
+        pass
+
+    @abc.abstractmethod
+    def refund(self, tokens: float = 1) -> None:
+        pass
+
+    def acquire(self, tokens: float = 1) -> float:
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+def _refill(
+    tokens: float, updated_at: float, now: float, rate: float, burst: float
+) -> float:
+    return min(burst, tokens + max(0.0, now - updated_at) * rate)
+
+
+class TokenBucket(BaseRateLimiter):
+    # Shared by the threads of one process.
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = max(1.0, rate) if burst is None else burst
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        with self._lock:
+            now = self._clock()
+            self._tokens = (
+                _refill(self._tokens, self._updated_at, now, self.rate, self.burst)
+                - tokens
+            )
+            self._updated_at = now
+            return max(0.0, -self._tokens / self.rate)
+
+    def refund(self, tokens: float = 1) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + tokens)
+
+
+class FileTokenBucket(BaseRateLimiter):
+    # Shared by every process on the host that points to the same file.
+    # The buckets are kept in one JSON document by name, updated under an
+    # exclusive lock, with the wall clock since processes don't share a
+    # monotonic one.
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        rate: float,
+        burst: Optional[float] = None,
+        name: str = "default",
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.rate = rate
+        self.burst = max(1.0, rate) if burst is None else burst
+        self.name = name
+        self._clock = clock
+        self._thread_lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def lock(self) -> Iterator[None]:
+        with self._thread_lock, open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self) -> dict[str, list[float]]:
+        try:
+            with open(self.path, encoding="utf-8") as bucket_file:
+                stored = json.load(bucket_file)
+        except (OSError, ValueError):
+            return {}
+        return stored if isinstance(stored, dict) else {}
+
+    def save(self, buckets: dict[str, list[float]]) -> None:
+        # Only written while holding the lock, so a plain rewrite is safe;
+        # an unreadable file just starts the buckets full again.
+        with open(self.path, "w", encoding="utf-8") as bucket_file:
+            json.dump(buckets, bucket_file)
+
+    def reserve(self, tokens: float = 1) -> float:
+        with self.lock():
+            now = self._clock()
+            buckets = self.load()
+            stored = buckets.get(self.name)
+            if isinstance(stored, list) and len(stored) == 2:
+                available = _refill(stored[0], stored[1], now, self.rate, self.burst)
+            else:
+                available = self.burst
+            available -= tokens
+            buckets[self.name] = [available, now]
+            self.save(buckets)
+        return max(0.0, -available / self.rate)
+
+    def refund(self, tokens: float = 1) -> None:
+        with self.lock():
+            buckets = self.load()
+            stored = buckets.get(self.name)
+            if isinstance(stored, list) and len(stored) == 2:
+                buckets[self.name] = [min(self.burst, stored[0] + tokens), stored[1]]
+                self.save(buckets)
+
+
+def build_rate_limiter(
+    rate: float,
+    name: str,
+    burst: float = constants.RATE_LIMIT_BURST,
+    path: str = constants.RATE_LIMIT_PATH,
+) -> Optional[BaseRateLimiter]:
+    # A burst of 0 means one second worth of requests.
+    if rate <= 0:
+        return None
+    if path:
+        return FileTokenBucket(path, rate, burst or None, name=name)
+    return TokenBucket(rate, burst or None)
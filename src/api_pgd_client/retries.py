@@ -0,0 +1,91 @@
+import email.utils
+import random
+import threading
+import time
+from collections.abc import Collection
+from typing import Optional
+
+from . import constants
+
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+class RetryBudget:
+    # Every request earns a fraction of a retry and every retry spends a
+    # whole one, so retries stay around `ratio` of the traffic instead of
+    # multiplying it while the API is down. Up to max_tokens retries can
+    # be spent in a burst.
+    def __init__(
+        self,
+        ratio: float = constants.RETRY_BUDGET_RATIO,
+        max_tokens: float = constants.RETRY_BUDGET_MAX_TOKENS,
+    ):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = constants.RETRY_MAX_ATTEMPTS,
+        backoff_base: float = constants.RETRY_BACKOFF_BASE,
+        backoff_max: float = constants.RETRY_BACKOFF_MAX,
+        retry_after_max: float = constants.RETRY_AFTER_MAX,
+        status_codes: Collection[int] = RETRYABLE_STATUS_CODES,
+        budget: Optional[RetryBudget] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.status_codes = frozenset(status_codes)
+        self.budget = RetryBudget() if budget is None else budget
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        return status_code in self.status_codes
+
+    def get_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        # Retry-After wins when the API sends it; otherwise "full jitter":
+        # a random wait up to the capped exponential backoff, so clients
+        # that failed together don't come back together.
+        delay = parse_retry_after(retry_after)
+        if delay is not None:
+            return delay
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def should_retry(self, attempt: int, delay: float) -> bool:
+        if attempt >= self.max_attempts or delay > self.retry_after_max:
+            return False
+        return self.budget.withdraw()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
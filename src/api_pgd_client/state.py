@@ -0,0 +1,71 @@
+import abc
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from .utils import encoding
+
+
+def content_digest(data: Any) -> str:
+    # Keys are sorted so the same content always hashes the same, whatever
+    # order the dicts were built in.
+    return hashlib.sha256(encoding.encode_json(data, sort_keys=True)).hexdigest()
+
+
+class BaseStateStore(abc.ABC):
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abc.abstractmethod
+    def set(self, key: str, digest: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def discard(self, key: str) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteStateStore(BaseStateStore):
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # One connection shared by the client threads; WAL lets other
+        # processes read the same file while a job is writing to it.
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sent_content ("
+            "key TEXT PRIMARY KEY, digest TEXT NOT NULL, sent_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT digest FROM sent_content WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, digest: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sent_content (key, digest, sent_at) "
+                "VALUES (?, ?, ?)",
+                (key, digest, time.time()),
+            )
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM sent_content WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
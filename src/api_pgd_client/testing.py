@@ -0,0 +1,307 @@
+# Stand-in for the PGD API, served from a thread of the current process:
+#
+#     with FakePgdApiServer(latency=0.05, token_ttl=60) as server:
+#         api_client = ApiClient(domain=server.url, ...)
+#
+# It serves /token, /user/{email} and the participante, plano_entregas and
+# plano_trabalho routes, keeping what is PUT in memory, with configurable
+# latency, injected errors, 429s, token expiry and ETags. It can also run on
+# its own, e.g. for load tests:
+#
+#     python -m api_pgd_client.testing --port 5057 --latency 0.05
+
+import argparse
+import hashlib
+import http.server
+import json
+import math
+import random
+import secrets
+import threading
+import time
+from collections.abc import Callable, Mapping
+from typing import Any, Optional, Union
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .constants import endpoints, errors
+from .constants import headers as constants_headers
+
+Latency = Union[float, Callable[[int], float]]
+
+
+class FakePgdApiHandler(http.server.BaseHTTPRequestHandler):
+    server: "FakePgdApiServer"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes, which Nagle's algorithm
+    # would hold back until the client's delayed ACK, about 40ms each.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.server.record(self)
+        body = self.read_body()
+        if self.path != endpoints.TOKEN_ENDPOINT.path:
+            self.send_json(404, {"detail": "Not Found"})
+            return
+        form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+        token = self.server.issue_token(form.get("username"), form.get("password"))
+        if token is None:
+            self.send_json(401, {"detail": "Incorrect username or password"})
+            return
+        self.send_json(200, {"access_token": token, "token_type": "bearer"})
+
+    def do_PUT(self) -> None:
+        self.handle_resource(self.put_resource)
+
+    def do_GET(self) -> None:
+        self.handle_resource(self.get_resource)
+
+    def handle_resource(self, handle: Callable[[str, bytes], None]) -> None:
+        self.server.record(self)
+        body = self.read_body()
+        path = urlsplit(self.path).path
+        if endpoints.match_endpoint_name(path) in (None, "token"):
+            self.send_json(404, {"detail": "Not Found"})
+            return
+        if not self.server.is_authorized(
+            self.headers.get(constants_headers.AUTHORIZATION_HEADER_LABEL)
+        ):
+            self.send_json(401, {"detail": errors.TOKEN_INVALIDO})
+            return
+        with self.server.serving():
+            failure = self.server.get_failure()
+            if failure is not None:
+                status_code, headers = failure
+                self.send_json(status_code, {"detail": "Falha simulada"}, headers)
+                return
+            handle(unquote(path), body)
+
+    def put_resource(self, path: str, body: bytes) -> None:
+        try:
+            resource = json.loads(body)
+        except ValueError:
+            self.send_json(422, {"detail": "JSON inválido"})
+            return
+        self.server.set_resource(path, resource)
+        self.send_json(200, resource)
+
+    def get_resource(self, path: str, body: bytes) -> None:
+        content = self.server.get_resource_content(path)
+        if content is None:
+            self.send_json(404, {"detail": "Não encontrado"})
+            return
+        headers = {}
+        if self.server.etags:
+            etag = f'"{hashlib.sha256(content).hexdigest()[:16]}"'
+            headers[constants_headers.ETAG_HEADER_LABEL] = etag
+            if self.headers.get(constants_headers.IF_NONE_MATCH_HEADER_LABEL) == etag:
+                self.send_content(304, b"", headers)
+                return
+        self.send_content(200, content, headers)
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def send_json(
+        self, status_code: int, data: Any, headers: Optional[Mapping[str, str]] = None
+    ) -> None:
+        self.send_content(status_code, json.dumps(data).encode(), headers)
+
+    def send_content(
+        self,
+        status_code: int,
+        content: bytes,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.send_response(status_code)
+        if status_code != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if status_code != 304:
+            self.wfile.write(content)
+
+
+class FakePgdApiServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Latency = 0,
+        error_rate: float = 0,
+        error_status_code: int = 503,
+        rate_limit: Optional[float] = None,
+        token_ttl: Optional[float] = None,
+        credentials: Optional[Mapping[str, str]] = None,
+        etags: bool = True,
+        seed: Optional[int] = None,
+    ):
+        super().__init__((host, port), FakePgdApiHandler)
+        self.host = host
+        # Seconds each GET and PUT takes to be answered; a callable gets
+        # the number of requests being answered at the moment.
+        self.latency = latency
+        # Share of the GETs and PUTs answered with error_status_code.
+        self.error_rate = error_rate
+        self.error_status_code = error_status_code
+        # GETs and PUTs allowed per second; the others get a 429.
+        self.rate_limit = rate_limit
+        self.token_ttl = token_ttl
+        self.credentials = dict(credentials) if credentials is not None else None
+        self.etags = etags
+        # Responses, as (status_code, headers), for the next GETs and PUTs.
+        self.failures: list[tuple[int, Mapping[str, str]]] = []
+        self.resources: dict[str, Any] = {}
+        self.requests: list[tuple[str, str, dict[str, str]]] = []
+        self.tokens: dict[str, float] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._window = (0.0, 0)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.server_address[1]}"
+
+    def start(self) -> "FakePgdApiServer":
+        # A short poll interval so stop() doesn't keep tests waiting.
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self) -> "FakePgdApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def record(self, handler: FakePgdApiHandler) -> None:
+        with self._lock:
+            self.requests.append((handler.command, handler.path, dict(handler.headers)))
+
+    def issue_token(
+        self, username: Optional[str], password: Optional[str]
+    ) -> Optional[str]:
+        if self.credentials is not None and (
+            username not in self.credentials or self.credentials[username] != password
+        ):
+            return None
+        token = secrets.token_hex(16)
+        expires_at = (
+            math.inf if self.token_ttl is None else time.time() + self.token_ttl
+        )
+        with self._lock:
+            self.tokens[token] = expires_at
+        return token
+
+    def expire_tokens(self) -> None:
+        with self._lock:
+            self.tokens.clear()
+
+    def is_authorized(self, authorization: Optional[str]) -> bool:
+        if not authorization or " " not in authorization:
+            return False
+        token = authorization.split(" ", 1)[1]
+        with self._lock:
+            expires_at = self.tokens.get(token)
+        return expires_at is not None and time.time() < expires_at
+
+    def serving(self) -> "_Serving":
+        return _Serving(self)
+
+    def get_failure(self) -> Optional[tuple[int, Mapping[str, str]]]:
+        with self._lock:
+            if self.failures:
+                return self.failures.pop(0)
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                started_at, count = self._window
+                if now - started_at >= 1:
+                    started_at, count = now, 0
+                self._window = (started_at, count + 1)
+                if count >= self.rate_limit:
+                    retry_after = max(1, math.ceil(started_at + 1 - now))
+                    return 429, {
+                        constants_headers.RETRY_AFTER_HEADER_LABEL: str(retry_after)
+                    }
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self.error_status_code, {}
+        return None
+
+    def set_resource(self, path: str, resource: Any) -> None:
+        with self._lock:
+            self.resources[path] = resource
+
+    def get_resource_content(self, path: str) -> Optional[bytes]:
+        with self._lock:
+            resource = self.resources.get(path)
+        return None if resource is None else json.dumps(resource).encode()
+
+
+class _Serving:
+    # Counts the request as in flight while it waits for its latency.
+    def __init__(self, server: FakePgdApiServer):
+        self.server = server
+
+    def __enter__(self) -> None:
+        server = self.server
+        with server._lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            in_flight = server.in_flight
+        latency = (
+            server.latency(in_flight) if callable(server.latency) else server.latency
+        )
+        if latency > 0:
+            time.sleep(latency)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        with self.server._lock:
+            self.server.in_flight -= 1
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Stand-in PGD API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5057)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--token-ttl", type=float, default=None)
+    arguments = parser.parse_args(argv)
+    server = FakePgdApiServer(
+        host=arguments.host,
+        port=arguments.port,
+        latency=arguments.latency,
+        error_rate=arguments.error_rate,
+        rate_limit=arguments.rate_limit,
+        token_ttl=arguments.token_ttl,
+    )
+    print(f"Serving the PGD API stand-in on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
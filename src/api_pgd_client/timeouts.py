@@ -0,0 +1,105 @@
+import contextlib
+import contextvars
+import math
+import time
+from collections.abc import Iterator, Mapping
+from typing import Any, Optional, Union
+from urllib.parse import urlsplit
+
+from . import constants, namedtuples
+from .constants import endpoints
+
+TimeoutValue = Union[float, tuple[float, float], namedtuples.Timeout]
+
+DEFAULT_TIMEOUT = namedtuples.Timeout(constants.CONNECT_TIMEOUT, constants.READ_TIMEOUT)
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "api_pgd_client_deadline", default=None
+)
+
+
+def as_timeout(value: Any) -> namedtuples.Timeout:
+    # A single number is the read timeout, as REQUEST_TIMEOUT used to be.
+    if isinstance(value, tuple):
+        return namedtuples.Timeout(*value)
+    return namedtuples.Timeout(DEFAULT_TIMEOUT.connect, value)
+
+
+def as_timeouts(
+    values: Optional[Mapping[str, TimeoutValue]],
+) -> dict[str, namedtuples.Timeout]:
+    return {key: as_timeout(value) for key, value in (values or {}).items()}
+
+
+def get_timeout(
+    timeouts: Optional[Mapping[str, namedtuples.Timeout]],
+    method_name: str,
+    url: str,
+    default: namedtuples.Timeout = DEFAULT_TIMEOUT,
+) -> namedtuples.Timeout:
+    # Overrides are keyed by endpoint name, e.g. "token", or by method and
+    # endpoint name, e.g. "PUT plano_entregas", which wins.
+    if not timeouts:
+        return default
+    name = endpoints.match_endpoint_name(urlsplit(url).path)
+    if name is None:
+        return default
+    timeout = timeouts.get(f"{method_name} {name}") or timeouts.get(name)
+    return default if timeout is None else timeout
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[float]:
+    # Every request made inside the block, retries included, has to finish
+    # within seconds. A nested deadline can only make it earlier.
+    with deadline_at(time.monotonic() + seconds) as at:
+        yield at
+
+
+@contextlib.contextmanager
+def deadline_at(at: Optional[float]) -> Iterator[float]:
+    # at is a time.monotonic() value, as returned by get_deadline, so the
+    # deadline can be carried over to worker threads.
+    current = _deadline.get()
+    if at is None or (current is not None and current <= at):
+        at = current
+    token = _deadline.set(at)
+    try:
+        yield math.inf if at is None else at
+    finally:
+        _deadline.reset(token)
+
+
+def get_deadline(seconds: Optional[float] = None) -> Optional[float]:
+    # The current deadline or, when seconds is given and comes first, the
+    # deadline seconds from now.
+    current = _deadline.get()
+    if seconds is None:
+        return current
+    at = time.monotonic() + seconds
+    return at if current is None else min(current, at)
+
+
+def remaining_time() -> Optional[float]:
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def fits_deadline(delay: float) -> bool:
+    remaining = remaining_time()
+    return remaining is None or delay < remaining
+
+
+def get_attempt_timeout(
+    timeout: namedtuples.Timeout, attempts_left: int
+) -> Optional[namedtuples.Timeout]:
+    # Under a deadline each attempt gets at most an equal share of the time
+    # left, so a slow first attempt can't use up what the retries need.
+    # None means the deadline has passed.
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        return None
+    share = remaining / max(1, attempts_left)
+    return namedtuples.Timeout(min(timeout.connect, share), min(timeout.read, share))
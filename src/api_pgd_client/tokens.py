@@ -0,0 +1,238 @@
+import abc
+import base64
+import binascii
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Any, Optional
+
+from . import constants
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+BACKGROUND_RETRY_INTERVAL = 5.0
+
+
+def decode_expiration(token: Any) -> Optional[float]:
+    if not isinstance(token, dict):
+        return None
+    access_token = token.get("access_token")
+    if isinstance(access_token, str) and access_token.count(".") == 2:
+        payload = access_token.split(".")[1]
+        try:
+            claims = json.loads(
+                base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+            )
+        except (binascii.Error, ValueError):
+            claims = None
+        if isinstance(claims, dict) and isinstance(claims.get("exp"), (int, float)):
+            return float(claims["exp"])
+    expires_in = token.get("expires_in")
+    if isinstance(expires_in, (int, float)):
+        return time.time() + expires_in
+    return None
+
+
+class BaseTokenStore(abc.ABC):
+    @abc.abstractmethod
+    def load(self) -> tuple[Any, Optional[float]]:
+        pass
+
+    @abc.abstractmethod
+    def save(self, token: Any, expires_at: Optional[float]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def discard(self, token: Any) -> None:
+        pass
+
+    @contextlib.contextmanager
+    def lock(self) -> Iterator[None]:
+        yield
+
+
+class FileTokenStore(BaseTokenStore):
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._thread_lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def lock(self) -> Iterator[None]:
+        with self._thread_lock, open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self) -> tuple[Any, Optional[float]]:
+        try:
+            with open(self.path, encoding="utf-8") as token_file:
+                stored = json.load(token_file)
+        except (OSError, ValueError):
+            return {}, None
+        if not isinstance(stored, dict):
+            return {}, None
+        return stored.get("token") or {}, stored.get("expires_at")
+
+    def save(self, token: Any, expires_at: Optional[float]) -> None:
+        # Written to a private temporary file and renamed over the old one,
+        # so readers never see a partial token.
+        directory = os.path.dirname(os.path.abspath(self.path))
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as token_file:
+                json.dump({"token": token, "expires_at": expires_at}, token_file)
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temporary_path)
+            raise
+
+    def discard(self, token: Any) -> None:
+        # The file is shared by every process, so without a token to compare
+        # there is nothing to discard.
+        if not token:
+            return
+        with self.lock():
+            stored, _ = self.load()
+            if _access_token(stored) == _access_token(token):
+                with contextlib.suppress(OSError):
+                    os.remove(self.path)
+
+
+def _access_token(token: Any) -> Any:
+    return token.get("access_token") if isinstance(token, dict) else None
+
+
+class TokenManager:
+    def __init__(
+        self,
+        fetch: Callable[[], Any],
+        refresh_margin: float = constants.TOKEN_REFRESH_MARGIN,
+        store: Optional[BaseTokenStore] = None,
+    ):
+        self._fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.store = store
+        self._token: Any = {}
+        self._expires_at: Optional[float] = None
+        self._condition = threading.Condition()
+        self._fetching = False
+        self._background_retry_at = 0.0
+
+    @property
+    def current(self) -> Any:
+        return self._token
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        return self._expires_at
+
+    def get(self) -> Any:
+        token = self._token
+        if not token or self._is_expired():
+            return self._refresh()
+        if self._is_expiring():
+            self._refresh_in_background()
+        return token
+
+    def set(self, token: Any) -> None:
+        with self._condition:
+            self._set(token)
+
+    def invalidate(self, token: Any) -> None:
+        # Only the token that actually failed is dropped: when several
+        # requests fail with the same expired token, the first one to get
+        # here clears it and the others reuse whatever replaced it.
+        if not token:
+            return
+        with self._condition:
+            if token is self._token:
+                self._set({})
+        if self.store is not None:
+            self.store.discard(token)
+
+    def _set(self, token: Any, expires_at: Optional[float] = None) -> None:
+        self._token = token
+        if expires_at is None and token:
+            expires_at = decode_expiration(token)
+        self._expires_at = expires_at if token else None
+
+    def _fetch_token(self) -> tuple[Any, Optional[float]]:
+        if self.store is None:
+            token = self._fetch()
+            return token, decode_expiration(token)
+        # Processes sharing the store take turns here: the first one fetches
+        # and saves the token, the others find it still fresh and reuse it.
+        with self.store.lock():
+            token, expires_at = self.store.load()
+            if token and (
+                expires_at is None or time.time() < expires_at - self.refresh_margin
+            ):
+                return token, expires_at
+            token = self._fetch()
+            expires_at = decode_expiration(token)
+            self.store.save(token, expires_at)
+        return token, expires_at
+
+    def _is_expired(self) -> bool:
+        return self._expires_at is not None and time.time() >= self._expires_at
+
+    def _is_expiring(self) -> bool:
+        return (
+            self._expires_at is not None
+            and time.time() >= self._expires_at - self.refresh_margin
+        )
+
+    def _refresh(self) -> Any:
+        with self._condition:
+            while self._fetching:
+                self._condition.wait()
+            if self._token and not self._is_expired():
+                return self._token
+            self._fetching = True
+        try:
+            token, expires_at = self._fetch_token()
+        except BaseException:
+            with self._condition:
+                self._fetching = False
+                self._condition.notify_all()
+            raise
+        with self._condition:
+            self._set(token, expires_at)
+            self._fetching = False
+            self._condition.notify_all()
+        return token
+
+    def _refresh_in_background(self) -> None:
+        with self._condition:
+            if self._fetching or time.monotonic() < self._background_retry_at:
+                return
+            self._fetching = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self) -> None:
+        try:
+            token, expires_at = self._fetch_token()
+        except Exception:
+            # The current token is still valid; the next call past its
+            # expiration retries synchronously and surfaces the error.
+            token, expires_at = None, None
+        with self._condition:
+            if token:
+                self._set(token, expires_at)
+            else:
+                self._background_retry_at = time.monotonic() + BACKGROUND_RETRY_INTERVAL
+            self._fetching = False
+            self._condition.notify_all()
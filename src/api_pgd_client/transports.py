@@ -0,0 +1,267 @@
+import abc
+import base64
+import collections
+import datetime
+import gzip
+import http
+import json
+import threading
+import time
+from collections.abc import Mapping
+from typing import IO, Any, Optional
+from urllib.parse import urlencode, urlsplit
+
+import requests  # type: ignore
+from requests import adapters, structures
+
+from . import constants
+from .constants import endpoints
+
+# Response headers that describe how the body was sent, not the body
+# requests hands over, plus cookies, which the client never uses.
+UNRECORDED_HEADERS = frozenset(
+    {"content-encoding", "transfer-encoding", "content-length", "set-cookie"}
+)
+RECORDED_TOKEN = "recorded-token"
+
+
+class BaseTransport(abc.ABC):
+    @abc.abstractmethod
+    def request(self, method_name: str, url: str, **kwargs: Any) -> Any:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "BaseTransport":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class SessionTransport(BaseTransport):
+    def __init__(
+        self,
+        pool_connections: int = constants.POOL_CONNECTIONS,
+        pool_maxsize: int = constants.POOL_MAXSIZE,
+        pool_block: bool = False,
+        idle_timeout: float = constants.POOL_IDLE_TIMEOUT,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._last_used = time.monotonic()
+        self._session = self._create_session()
+
+    @property
+    def session(self) -> requests.Session:
+        return self._session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = adapters.HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def request(self, method_name: str, url: str, **kwargs: Any) -> Any:
+        self._evict_if_idle()
+        try:
+            return self._session.request(method_name.upper(), url, **kwargs)
+        finally:
+            self._last_used = time.monotonic()
+
+    def _evict_if_idle(self) -> None:
+        if not self.idle_timeout:
+            return
+        if time.monotonic() - self._last_used < self.idle_timeout:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_used < self.idle_timeout:
+                return
+            self.evict_idle_connections()
+            self._last_used = time.monotonic()
+
+    def evict_idle_connections(self) -> None:
+        # Idle sockets are usually already dropped by the server or by some
+        # proxy in between, so the pools are cleared instead of reusing them.
+        for adapter in self._session.adapters.values():
+            adapter.close()
+
+    def close(self) -> None:
+        self._session.close()
+
+
+def open_cassette(path: str, mode: str) -> IO[str]:
+    # Cassettes are JSON lines, gzipped when the path ends with .gz.
+    if path.endswith(".gz"):
+        return gzip.open(path, f"{mode}t", encoding="utf-8")  # type: ignore[return-value]
+    return open(path, mode, encoding="utf-8")
+
+
+def get_cassette_key(method_name: str, url: str, params: Any = None) -> str:
+    if params:
+        url = f"{url}?{urlencode(sorted(dict(params).items()))}"
+    return f"{method_name.upper()} {url}"
+
+
+class RecordingTransport(BaseTransport):
+    # Sends the requests through transport and writes each one, with its
+    # response (or connection error) and timings, to a cassette that
+    # ReplayTransport plays back. Request bodies and headers aren't kept,
+    # since the token request carries the password, and issued access
+    # tokens are replaced by RECORDED_TOKEN.
+    def __init__(self, path: str, transport: Optional[BaseTransport] = None):
+        self.path = path
+        self._owns_transport = transport is None
+        self.transport = SessionTransport() if transport is None else transport
+        self._file: Optional[IO[str]] = open_cassette(path, "w")
+        self._lock = threading.Lock()
+
+    def request(self, method_name: str, url: str, **kwargs: Any) -> Any:
+        data = kwargs.get("data")
+        interaction: dict[str, Any] = {
+            "key": get_cassette_key(method_name, url, kwargs.get("params")),
+            "request_bytes": len(data) if isinstance(data, (bytes, str)) else 0,
+        }
+        start = time.perf_counter()
+        try:
+            response = self.transport.request(method_name, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            interaction["elapsed"] = round(time.perf_counter() - start, 6)
+            interaction["error"] = type(exc).__name__
+            self._write(interaction)
+            raise
+        interaction["elapsed"] = round(time.perf_counter() - start, 6)
+        elapsed = getattr(response, "elapsed", None)
+        if isinstance(elapsed, datetime.timedelta):
+            interaction["headers_elapsed"] = round(elapsed.total_seconds(), 6)
+        interaction["status_code"] = response.status_code
+        interaction["headers"] = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() not in UNRECORDED_HEADERS
+        }
+        content = response.content or b""
+        if endpoints.match_endpoint_name(urlsplit(url).path) == "token":
+            content = self._redact_token(content)
+        try:
+            interaction["content"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            interaction["content_b64"] = base64.b64encode(content).decode("ascii")
+        self._write(interaction)
+        return response
+
+    def _redact_token(self, content: bytes) -> bytes:
+        try:
+            token = json.loads(content)
+        except ValueError:
+            return content
+        if not isinstance(token, dict) or "access_token" not in token:
+            return content
+        return json.dumps({**token, "access_token": RECORDED_TOKEN}).encode()
+
+    def _write(self, interaction: Mapping[str, Any]) -> None:
+        line = json.dumps(interaction, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            if self._file is not None:
+                self._file.write(f"{line}\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self._owns_transport:
+            self.transport.close()
+
+
+class ReplayTransport(BaseTransport):
+    # Answers each request with the next interaction recorded for the same
+    # method and URL, or again with the last one once they run out (unless
+    # strict). speed=0 answers at once; otherwise each answer takes its
+    # recorded response time divided by speed, so with speed=1 every
+    # request takes as long as it did, and a read timeout shorter than that
+    # is raised as the real one would be. The time between requests is up
+    # to the client replaying them.
+    def __init__(self, path: str, speed: float = 0, strict: bool = False):
+        self.path = path
+        self.speed = speed
+        self.strict = strict
+        self._interactions: dict[str, collections.deque[dict[str, Any]]] = {}
+        self._last: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        with open_cassette(path, "r") as file:
+            for line in file:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions.setdefault(
+                        interaction["key"], collections.deque()
+                    ).append(interaction)
+
+    @property
+    def unplayed(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._interactions.values())
+
+    def request(self, method_name: str, url: str, **kwargs: Any) -> Any:
+        key = get_cassette_key(method_name, url, kwargs.get("params"))
+        interaction = self._next(key)
+        elapsed = interaction["elapsed"] / self.speed if self.speed > 0 else 0.0
+        read_timeout = self._get_read_timeout(kwargs.get("timeout"))
+        if read_timeout is not None and elapsed > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.ReadTimeout(f"Recorded {key} took longer than timeout.")
+        if elapsed > 0:
+            time.sleep(elapsed)
+        error = interaction.get("error")
+        if error is not None:
+            error_class = getattr(requests.exceptions, error, requests.ConnectionError)
+            raise error_class(f"Recorded {error} on {key}.")
+        return self._build_response(interaction, url)
+
+    def _next(self, key: str) -> dict[str, Any]:
+        with self._lock:
+            queue = self._interactions.get(key)
+            if queue:
+                interaction = self._last[key] = queue.popleft()
+                return interaction
+            if key in self._last and not self.strict:
+                return self._last[key]
+        raise LookupError(f"No recorded interaction left for {key}.")
+
+    def _get_read_timeout(self, timeout: Any) -> Optional[float]:
+        if timeout is None or self.speed <= 0:
+            return None
+        if isinstance(timeout, tuple):
+            return float(timeout[1])
+        return float(timeout)
+
+    def _build_response(self, interaction: Mapping[str, Any], url: str) -> Any:
+        if "content_b64" in interaction:
+            content = base64.b64decode(interaction["content_b64"])
+        else:
+            content = interaction.get("content", "").encode("utf-8")
+        status_code = interaction["status_code"]
+        headers_elapsed = interaction.get("headers_elapsed", interaction["elapsed"])
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = content
+        response.headers = structures.CaseInsensitiveDict(interaction["headers"])
+        response.url = url
+        response.encoding = "utf-8"
+        try:
+            response.reason = http.HTTPStatus(status_code).phrase
+        except ValueError:
+            response.reason = ""
+        response.elapsed = datetime.timedelta(
+            seconds=headers_elapsed / self.speed if self.speed > 0 else 0
+        )
+        return response
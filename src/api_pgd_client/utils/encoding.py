@@ -0,0 +1,51 @@
+import json
+import math
+from typing import Any
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:  # pragma: no cover
+    HAS_ORJSON = False
+
+if HAS_ORJSON:
+    # Dates go through default=str, like the json module path, instead of
+    # orjson's own ISO format, so both backends send the same values.
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def has_non_finite_float(value: Any) -> bool:
+    if type(value) is float:
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(has_non_finite_float(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(has_non_finite_float(item) for item in value)
+    return False
+
+
+def encode_json(data: Any, sort_keys: bool = False) -> bytes:
+    # NaN and infinity raise ValueError with either backend: the json
+    # module refuses them and orjson would quietly send null instead. Only
+    # orjson output with a null in it is searched for them.
+    if HAS_ORJSON:
+        option = ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else ORJSON_OPTIONS
+        encoded: bytes = orjson.dumps(data, default=str, option=option)
+        if b"null" in encoded and has_non_finite_float(data):
+            raise ValueError("Out of range float values are not JSON compliant")
+        return encoded
+    return json.dumps(
+        data,
+        default=str,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        sort_keys=sort_keys,
+    ).encode("utf-8")
+
+
+def decode_json(content: bytes) -> Any:
+    if HAS_ORJSON:
+        return orjson.loads(content)
+    return json.loads(content)
@@ -0,0 +1,78 @@
+import functools
+import operator
+import re
+import string
+from collections.abc import Callable, Mapping
+from urllib.parse import quote
+
+# Characters allowed unescaped in a path segment (RFC 3986 pchar), so values
+# such as e-mails keep their usual form while "/" or "?" are escaped.
+PATH_SEGMENT_SAFE_CHARACTERS = "!$&'()*+,;=:@"
+
+# Paths kept by each builder before it starts over.
+PATH_CACHE_MAXSIZE = 4096
+
+_is_safe_path_segment = re.compile(r"[A-Za-z0-9\-._~!$&'()*+,;=:@]*").fullmatch
+
+
+@functools.lru_cache(maxsize=4096, typed=True)
+def quote_path_parameter(value: object) -> str:
+    text = str(value)
+    if _is_safe_path_segment(text):
+        return text
+    return quote(text, safe=PATH_SEGMENT_SAFE_CHARACTERS)
+
+
+def compile_path(path: str, maxsize: int = PATH_CACHE_MAXSIZE) -> Callable[..., str]:
+    # The template is parsed once into a positional format string, and each
+    # built path is kept by its values, so a repeated call is one lookup.
+    # The key holds the types too: 1, 1.0 and True are equal keys but give
+    # different paths.
+    names: list[str] = []
+    pieces = []
+    for literal, name, format_spec, conversion in string.Formatter().parse(path):
+        pieces.append(literal.replace("{", "{{").replace("}", "}}"))
+        if name is None:
+            continue
+        if not name.isidentifier() or format_spec or conversion:
+            raise ValueError(f"Unsupported path parameter in {path!r}")
+        pieces.append(f"{{{len(names)}}}")
+        names.append(name)
+    template = "".join(pieces).format
+    if not names:
+        static_path = template()
+        return lambda **kwargs: static_path
+    get_values: Callable[[Mapping[str, object]], tuple[object, ...]]
+    if len(names) == 1:
+        only_name = names[0]
+
+        def get_only_value(kwargs: Mapping[str, object]) -> tuple[object, ...]:
+            return (kwargs[only_name],)
+
+        get_values = get_only_value
+    else:
+        get_values = operator.itemgetter(*names)
+    paths: dict[tuple[object, ...], str] = {}
+    quote_parameter = quote_path_parameter
+
+    def build_path(**kwargs: object) -> str:
+        values = get_values(kwargs)
+        key = (values, tuple(map(type, values)))
+        built = paths.get(key)
+        if built is None:
+            if len(paths) >= maxsize:
+                paths.clear()
+            built = paths[key] = template(*map(quote_parameter, values))
+        return built
+
+    return build_path
+
+
+def compile_pattern(path: str) -> re.Pattern[str]:
+    # Matches the paths built from the template, with any parameter values.
+    pieces = []
+    for literal, name, _, _ in string.Formatter().parse(path):
+        pieces.append(re.escape(literal))
+        if name is not None:
+            pieces.append("[^/]+")
+    return re.compile("".join(pieces))
@@ -0,0 +1,248 @@
+import dataclasses
+import sys
+from collections.abc import Callable, Collection, Iterable, Mapping, MutableSequence
+from typing import Any, Optional, TypeVar, Union, overload
+
+T = TypeVar("T")
+
+# Field values of these types are copied to the output as they are.
+SCALAR_FIELD_TYPES = (str, int, float, bool)
+ATOMIC_TYPES = frozenset((str, int, float, bool, type(None)))
+
+# Shared copies of the integers seen in interned fields; only meant for
+# low-cardinality codes such as unit codes.
+_interned_integers: dict[int, int] = {}
+
+
+def encode_value(value: Any) -> Any:
+    # Like dataclasses.asdict, nested dataclasses become dicts, but lists
+    # and dicts are only copied when something inside them had to change.
+    value_type = type(value)
+    if value_type in ATOMIC_TYPES:
+        return value
+    if value_type is list or value_type is tuple:
+        encoded_items: Optional[list[Any]] = None
+        for index, item in enumerate(value):
+            if type(item) in ATOMIC_TYPES:
+                continue
+            encoded_item = encode_value(item)
+            if encoded_item is not item:
+                if encoded_items is None:
+                    encoded_items = list(value)
+                encoded_items[index] = encoded_item
+        if encoded_items is None:
+            return value
+        return encoded_items if value_type is list else tuple(encoded_items)
+    if value_type is dict:
+        encoded_dict: Optional[dict[Any, Any]] = None
+        for key, item in value.items():
+            if type(item) in ATOMIC_TYPES:
+                continue
+            encoded_item = encode_value(item)
+            if encoded_item is not item:
+                if encoded_dict is None:
+                    encoded_dict = dict(value)
+                encoded_dict[key] = encoded_item
+        return value if encoded_dict is None else encoded_dict
+    if value_type is LazyEntityList:
+        return value.to_list()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return get_encoder(value_type)(value)
+    return value
+
+
+class LazyEntityList(MutableSequence[T]):
+    # Keeps the decoded dicts and only builds the entity for an item when
+    # it is read. Items that were never read are encoded back as the same
+    # dicts, and a list where nothing was read encodes to the original list.
+    # Read items are encoded over their dicts, so keys the entity doesn't
+    # declare are kept for every item.
+    def __init__(self, items: list[Any], decode: Callable[[Any], T]):
+        self._items = items
+        self._entities: Optional[list[Optional[T]]] = None
+        self._owns_items = False
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[T]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, list[T]]:
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        entities = self._entities
+        if entities is None:
+            entities = self._entities = [None] * len(self._items)
+        entity = entities[index]
+        if entity is None:
+            item = self._items[index]
+            entity = entities[index] = (
+                self._decode(item) if isinstance(item, dict) else item
+            )
+        return entity
+
+    @overload
+    def __setitem__(self, index: int, value: T) -> None: ...
+
+    @overload
+    def __setitem__(self, index: slice, value: Iterable[T]) -> None: ...
+
+    def __setitem__(self, index: Union[int, slice], value: Any) -> None:
+        items, entities = self._prepare_change()
+        if isinstance(index, slice):
+            values = list(value)
+            items[index] = values
+            entities[index] = [self._as_entity(item) for item in values]
+        else:
+            items[index] = value
+            entities[index] = self._as_entity(value)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        items, entities = self._prepare_change()
+        del items[index]
+        del entities[index]
+
+    def insert(self, index: int, value: T) -> None:
+        items, entities = self._prepare_change()
+        items.insert(index, value)
+        entities.insert(index, self._as_entity(value))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (LazyEntityList, list)):
+            return NotImplemented
+        # Compared item by item as entities, so reading an item does not
+        # change the result; plain dicts on the other side are decoded.
+        if len(self) != len(other):
+            return False
+        return all(
+            mine == (self._decode(theirs) if isinstance(theirs, dict) else theirs)
+            for mine, theirs in zip(self, other)
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_list()!r})"
+
+    def to_list(self) -> list[Any]:
+        entities = self._entities
+        if entities is None:
+            return self._items
+        return [
+            item if entity is None else self._encode(item, entity)
+            for item, entity in zip(self._items, entities)
+        ]
+
+    @staticmethod
+    def _encode(item: Any, entity: Any) -> Any:
+        encoded = encode_value(entity)
+        if isinstance(item, dict) and isinstance(encoded, dict):
+            return {**item, **encoded}
+        return encoded
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # The decoder is a closure and can't be pickled, so the list is
+        # pickled with every item as an entity.
+        return list, (list(self),)
+
+    def _as_entity(self, value: Any) -> Optional[T]:
+        return None if isinstance(value, dict) else value
+
+    def _prepare_change(self) -> tuple[list[Any], list[Optional[T]]]:
+        # The decoded list may still be referenced by the response, so it
+        # is copied before the first change.
+        if not self._owns_items:
+            self._items = list(self._items)
+            self._owns_items = True
+        if self._entities is None:
+            self._entities = [None] * len(self._items)
+        return self._items, self._entities
+
+
+def compile_encoder(cls: type) -> Callable[[Any], dict[str, Any]]:
+    # Copies the instance's __dict__ when it holds exactly the fields, and
+    # reads the fields one by one otherwise (slotted classes).
+    # Only the non-scalar fields go through encode_value, so nothing is
+    # deep-copied.
+    fields = dataclasses.fields(cls)
+    names = tuple(field.name for field in fields)
+    field_names = frozenset(names)
+    encoded_names = tuple(
+        field.name for field in fields if field.type not in SCALAR_FIELD_TYPES
+    )
+
+    def encode(obj: Any) -> dict[str, Any]:
+        data: Optional[dict[str, Any]] = getattr(obj, "__dict__", None)
+        if data is not None and data.keys() == field_names:
+            data = data.copy()
+        else:
+            data = {name: getattr(obj, name) for name in names}
+        for name in encoded_names:
+            data[name] = encode_value(data[name])
+        return data
+
+    return encode
+
+
+def compile_decoder(
+    cls: type,
+    nested: Optional[Mapping[str, Callable[[Any], Any]]] = None,
+    interned: Collection[str] = (),
+    lazy: bool = False,
+) -> Callable[[Mapping[str, Any]], Any]:
+    # Keys the class does not declare are dropped using the field set
+    # computed here, so fields added to the API don't break older clients.
+    # Fields listed in nested have each of their dict items converted by
+    # the given callable, on access when lazy is set, and values of the
+    # interned fields are replaced by a shared copy (sys.intern for
+    # strings).
+    field_names = frozenset(
+        field.name for field in dataclasses.fields(cls) if field.init
+    )
+    is_known = field_names.issuperset
+    nested_fields = tuple((nested or {}).items())
+    interned_fields = tuple(name for name in interned if name in field_names)
+    intern = sys.intern
+    intern_integer = _interned_integers.setdefault
+
+    def decode(data: Mapping[str, Any]) -> Any:
+        if not is_known(data):
+            data = {key: value for key, value in data.items() if key in field_names}
+        if not nested_fields and not interned_fields:
+            return cls(**data)
+        data = dict(data)
+        for name in interned_fields:
+            value = data.get(name)
+            if type(value) is str:
+                data[name] = intern(value)
+            elif type(value) is int:
+                data[name] = intern_integer(value, value)
+        for name, decode_item in nested_fields:
+            value = data.get(name)
+            if isinstance(value, list):
+                if lazy:
+                    data[name] = LazyEntityList(value, decode_item)
+                    continue
+                data[name] = [
+                    decode_item(item) if isinstance(item, dict) else item
+                    for item in value
+                ]
+        return cls(**data)
+
+    return decode
+
+
+_encoders: dict[type, Callable[[Any], dict[str, Any]]] = {}
+
+
+def get_encoder(cls: type) -> Callable[[Any], dict[str, Any]]:
+    try:
+        return _encoders[cls]
+    except KeyError:
+        encoder = _encoders[cls] = compile_encoder(cls)
+        return encoder
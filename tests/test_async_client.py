@@ -0,0 +1,307 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from unittest import TestCase, mock
+
+import pytest
+
+from api_pgd_client import cache, entities, ratelimit, retries, state, timeouts
+from api_pgd_client.constants import errors as constants_errors
+
+httpx = pytest.importorskip("httpx")
+
+from api_pgd_client import async_client  # noqa: E402
+
+
+class FakePgdApi:
+    def __init__(self, responses=None):
+        self.responses = responses or {}
+        self.requests = []
+        self.tokens_issued = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request):
+        self.requests.append(request)
+        if request.url.path == "/token":
+            self.tokens_issued += 1
+            return httpx.Response(
+                200,
+                json={
+                    "access_token": f"token-{self.tokens_issued}",
+                    "token_type": "Bearer",
+                },
+            )
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        status_code, content = self.responses.get(
+            (request.method, request.url.path), (200, {})
+        )
+        if callable(content):
+            status_code, content = content(request)
+        return httpx.Response(status_code, json=content)
+
+    def client(self, **kwargs):
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return async_client.AsyncApiClient(
+            domain="https://api-pgd.example",
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            http_client=http_client,
+            **kwargs,
+        )
+
+
+class AsyncApiClientTestCase(TestCase):
+    def setUp(self):
+        self.participante_path = "/organizacao/SIAPE/999/777/participante/1234567"
+        self.plano_trabalho_path = "/organizacao/SIAPE/999/plano_trabalho/555"
+        self.plano_entregas_path = "/organizacao/SIAPE/999/plano_entregas/444"
+
+    def test_deveria_compartilhar_os_endpoints_com_o_cliente_sincrono(self):
+        api_client = async_client.AsyncApiClient(
+            domain="https://api-pgd.example",
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+        )
+        assert (
+            f"https://api-pgd.example{self.plano_trabalho_path}"
+            == api_client.plano_trabalho_endpoint(555)
+        )
+        assert api_client.get_error_class() is api_client.Error
+
+    def test_deveria_exigir_o_httpx(self):
+        with (
+            mock.patch.object(async_client, "HAS_HTTPX", False),
+            pytest.raises(async_client.AsyncApiClient.Error, match="requires httpx"),
+        ):
+            async_client.AsyncApiClient(http_client=object())
+
+    def test_consultar_participante_deveria_buscar_token_e_participante(self):
+        api = FakePgdApi(
+            {
+                ("GET", self.participante_path): (
+                    200,
+                    {"matricula_siape": "1234567", "cod_unidade_lotacao": 777},
+                )
+            }
+        )
+
+        async def run():
+            async with api.client() as api_client:
+                return await api_client.consultar_participante(777, "1234567")
+
+        participante = asyncio.run(run())
+
+        assert participante == entities.Participante(
+            matricula_siape="1234567", cod_unidade_lotacao=777
+        )
+        token_request, get_request = api.requests
+        assert "POST" == token_request.method
+        assert "Bearer token-1" == get_request.headers["Authorization"]
+
+    def test_enviar_plano_trabalho_deveria_enviar_o_plano_serializado(self):
+        api = FakePgdApi({("PUT", self.plano_trabalho_path): (200, {"ok": True})})
+        plano_trabalho = entities.PlanoDeTrabalho(
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            id_plano_trabalho="555",
+        )
+
+        async def run():
+            async with api.client() as api_client:
+                return await api_client.enviar_plano_trabalho(plano_trabalho)
+
+        assert {"ok": True} == asyncio.run(run())
+        assert plano_trabalho.to_dict() == json.loads(api.requests[-1].content)
+
+    def test_nao_deveria_reenviar_plano_inalterado(self):
+        api = FakePgdApi({("PUT", self.plano_trabalho_path): (200, {"ok": True})})
+        state_store = state.SqliteStateStore(":memory:")
+        plano_trabalho = entities.PlanoDeTrabalho(id_plano_trabalho="555")
+
+        async def run():
+            async with api.client(state_store=state_store) as api_client:
+                return [
+                    await api_client.enviar_plano_trabalho(plano_trabalho),
+                    await api_client.enviar_plano_trabalho(plano_trabalho),
+                ]
+
+        assert [{"ok": True}, None] == asyncio.run(run())
+        assert 1 == len([r for r in api.requests if r.method == "PUT"])
+        state_store.close()
+
+    def test_deveria_reaproveitar_o_corpo_quando_a_api_responder_304(self):
+        def plano_entregas(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                return 304, None
+            return 200, {"id_plano_entregas": "444", "status": 2}
+
+        api = FakePgdApi({("GET", self.plano_entregas_path): (200, plano_entregas)})
+        conditional_cache = cache.ConditionalCache(maxsize=10)
+
+        async def handler(request):
+            response = await FakePgdApi.handler(api, request)
+            if response.status_code == 304:
+                return httpx.Response(304, headers={"ETag": '"v1"'})
+            return httpx.Response(
+                response.status_code, content=response.content, headers={"ETag": '"v1"'}
+            )
+
+        async def run():
+            http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            async with async_client.AsyncApiClient(
+                domain="https://api-pgd.example",
+                origem_unidade="SIAPE",
+                cod_unidade_autorizadora=999,
+                http_client=http_client,
+                conditional_cache=conditional_cache,
+            ) as api_client:
+                return [
+                    await api_client.consultar_plano_entregas(444),
+                    await api_client.consultar_plano_entregas(444),
+                ]
+
+        primeiro, segundo = asyncio.run(run())
+
+        assert primeiro == segundo
+        assert 2 == segundo.status
+        assert 1 == conditional_cache.stats().hits
+
+    def test_consultar_plano_entregas_deveria_lancar_erro_da_api(self):
+        api = FakePgdApi(
+            {("GET", self.plano_entregas_path): (404, {"detail": "Não encontrado"})}
+        )
+
+        async def run():
+            async with api.client() as api_client:
+                await api_client.consultar_plano_entregas("444")
+
+        with pytest.raises(async_client.AsyncApiClient.Error, match="404"):
+            asyncio.run(run())
+
+    def test_deveria_renovar_o_token_uma_unica_vez_quando_expirado(self):
+        def expired_once(request):
+            if request.headers["Authorization"] == "Bearer token-1":
+                return 401, {"detail": constants_errors.TOKEN_INVALIDO}
+            return 200, {"matricula_siape": "1234567"}
+
+        api = FakePgdApi({("GET", self.participante_path): (None, expired_once)})
+
+        async def run():
+            async with api.client() as api_client:
+                return await asyncio.gather(
+                    *(
+                        api_client.consultar_participante(777, "1234567")
+                        for _ in range(10)
+                    )
+                )
+
+        resultados = asyncio.run(run())
+
+        assert 10 == len(resultados)
+        assert 2 == api.tokens_issued
+
+    def test_deveria_limitar_as_requisicoes_simultaneas(self):
+        api = FakePgdApi()
+
+        async def run():
+            async with api.client(max_connections=5) as api_client:
+                await asyncio.gather(
+                    *(api_client.consultar_plano_trabalho(str(i)) for i in range(50))
+                )
+
+        asyncio.run(run())
+
+        assert 5 == api.max_in_flight
+
+    def test_deveria_tentar_novamente_em_erro_temporario(self):
+        falhas = [(429, {"Retry-After": "0"}), (503, {})]
+
+        def falha_duas_vezes(request):
+            if falhas:
+                status_code, _ = falhas.pop(0)
+                return status_code, {"detail": "Falha simulada"}
+            return 200, {"id_plano_trabalho": "555"}
+
+        api = FakePgdApi({("GET", self.plano_trabalho_path): (None, falha_duas_vezes)})
+
+        async def run():
+            async with api.client(
+                retry_policy=retries.RetryPolicy(max_attempts=3, backoff_base=0)
+            ) as api_client:
+                return await api_client.consultar_plano_trabalho("555")
+
+        plano_trabalho = asyncio.run(run())
+
+        assert "555" == plano_trabalho.id_plano_trabalho
+        assert 3 == len(
+            [r for r in api.requests if r.url.path == self.plano_trabalho_path]
+        )
+
+    def test_nao_deveria_enviar_depois_do_prazo(self):
+        api = FakePgdApi()
+
+        async def run():
+            async with api.client() as api_client:
+                await api_client.token()
+                with timeouts.deadline(0):
+                    await api_client.consultar_plano_trabalho("555")
+
+        with self.assertRaises(async_client.AsyncApiClient.Error) as context:
+            asyncio.run(run())
+
+        assert "deadline" in str(context.exception)
+        assert ["/token"] == [request.url.path for request in api.requests]
+
+    def test_deveria_usar_o_limite_compartilhado_fora_do_loop(self):
+        api = FakePgdApi()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        threads = set()
+
+        class RecordingFileTokenBucket(ratelimit.FileTokenBucket):
+            def reserve(self, tokens=1):
+                threads.add(threading.get_ident())
+                return super().reserve(tokens)
+
+        limiter = RecordingFileTokenBucket(
+            os.path.join(directory.name, "rate_limit.json"),
+            rate=1,
+            burst=1,
+            clock=lambda: 1000.0,
+        )
+
+        async def run():
+            async with api.client(read_limiter=limiter) as api_client:
+                await api_client.consultar_plano_trabalho("555")
+                with timeouts.deadline(0.5):
+                    await api_client.consultar_plano_trabalho("555")
+
+        with self.assertRaises(async_client.AsyncApiClient.Error) as context:
+            asyncio.run(run())
+
+        assert "deadline" in str(context.exception)
+        assert threading.get_ident() not in threads
+        assert 1.0 == limiter.reserve()
+
+    def test_deveria_aplicar_o_timeout_do_endpoint(self):
+        api = FakePgdApi()
+
+        async def run():
+            async with api.client(
+                endpoint_timeouts={"plano_trabalho": (1, 2)}
+            ) as api_client:
+                await api_client.consultar_plano_trabalho("555")
+
+        asyncio.run(run())
+
+        assert {"connect": 1, "read": 2, "write": 2, "pool": 2} == (
+            api.requests[-1].extensions["timeout"]
+        )
@@ -0,0 +1,76 @@
+from unittest import TestCase, mock
+
+from api_pgd_client import cache
+
+
+class LruResponseCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = cache.LruResponseCache(
+            maxsize=2, ttl=60, ttls={"participante": 300}, negative_ttl=5
+        )
+
+    def test_deveria_retornar_missing_quando_nao_houver_entrada(self):
+        assert self.cache.get("url") is cache.MISSING
+        assert (0, 1) == self.cache.stats()[:2]
+
+    def test_deveria_retornar_uma_copia_a_cada_acerto(self):
+        self.cache.set("url", {"entregas": [{"id_entrega": "1"}]}, 60)
+
+        primeiro = self.cache.get("url")
+        primeiro["entregas"].append({"id_entrega": "2"})
+
+        assert {"entregas": [{"id_entrega": "1"}]} == self.cache.get("url")
+        assert 2 == self.cache.stats().hits
+
+    def test_deveria_descartar_a_entrada_menos_usada(self):
+        self.cache.set("a", 1, 60)
+        self.cache.set("b", 2, 60)
+        self.cache.get("a")
+
+        self.cache.set("c", 3, 60)
+
+        assert self.cache.get("b") is cache.MISSING
+        assert 1 == self.cache.get("a")
+        assert 3 == self.cache.get("c")
+        stats = self.cache.stats()
+        assert (1, 2, 2) == (stats.evictions, stats.size, stats.maxsize)
+
+    def test_deveria_expirar_as_entradas(self):
+        with mock.patch("api_pgd_client.cache.time.monotonic", return_value=100.0):
+            self.cache.set("url", {"ok": True}, 10)
+        with mock.patch("api_pgd_client.cache.time.monotonic", return_value=109.0):
+            assert {"ok": True} == self.cache.get("url")
+        with mock.patch("api_pgd_client.cache.time.monotonic", return_value=110.0):
+            assert self.cache.get("url") is cache.MISSING
+        assert 1 == self.cache.stats().expirations
+        assert 0 == self.cache.stats().size
+
+    def test_deveria_usar_o_ttl_do_endpoint(self):
+        assert 300 == self.cache.get_ttl("participante")
+        assert 60 == self.cache.get_ttl("plano_trabalho")
+
+    def test_nao_deveria_guardar_com_ttl_ou_tamanho_zerado(self):
+        self.cache.set("url", 1, 0)
+        assert self.cache.get("url") is cache.MISSING
+
+        desligado = cache.LruResponseCache(maxsize=0)
+        desligado.set("url", 1, 60)
+        assert desligado.get("url") is cache.MISSING
+
+    def test_deveria_guardar_com_o_tamanho_padrao(self):
+        padrao = cache.LruResponseCache()
+        padrao.set("url", 1, 60)
+
+        assert 1 == padrao.get("url")
+        assert cache.DEFAULT_MAXSIZE == padrao.stats().maxsize > 0
+
+    def test_delete_e_clear_deveriam_remover_entradas(self):
+        self.cache.set("a", 1, 60)
+        self.cache.set("b", cache.NotFound("Não encontrado", {"detail": "x"}), 5)
+
+        self.cache.delete("a")
+        assert self.cache.get("a") is cache.MISSING
+        assert isinstance(self.cache.get("b"), cache.NotFound)
+
+        self.cache.clear()
+        assert 0 == self.cache.stats().size
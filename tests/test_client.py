@@ -1,14 +1,31 @@
+import datetime
+import decimal
 import json
+import time
 from collections import namedtuple
+from concurrent import futures
 from unittest import TestCase, mock
 
 import pytest
 import requests
 
-from api_pgd_client import client, constants, entities
+from api_pgd_client import (
+    cache,
+    client,
+    coalescing,
+    concurrency,
+    constants,
+    entities,
+    ratelimit,
+    retries,
+    state,
+    timeouts,
+    transports,
+)
 from api_pgd_client.constants import endpoints as constants_endpoints
 from api_pgd_client.constants import errors as constants_errors
 from api_pgd_client.constants import headers as constants_headers
+from api_pgd_client.testing import FakePgdApiServer
 
 
 class MockResponse:
@@ -39,9 +56,13 @@ class BaseRequestTestCase(TestCase):
         self.request = ConcreteRequest()
         self.url = "http://example.com"
         self.headers = {"Authorization": "Bearer token"}
+        self.put_headers = {
+            constants_headers.CONTENT_TYPE_HEADER_LABEL: constants_headers.CONTENT_TYPE_JSON_VALUE,
+            **self.headers,
+        }
         self.data = {"key": "value"}
 
-    @mock.patch("api_pgd_client.client.requests.get")
+    @mock.patch("api_pgd_client.transports.requests.Session.request")
     def test_do_get_success(self, mock_get):
         mock_response = mock.MagicMock()
         mock_response.content = b'{"key": "value"}'
@@ -53,10 +74,14 @@ class BaseRequestTestCase(TestCase):
 
         self.assertEqual(response, {"key": "value"})
         mock_get.assert_called_once_with(
-            self.url, params={}, headers=self.headers, timeout=constants.REQUEST_TIMEOUT
+            "GET",
+            self.url,
+            params={},
+            headers=self.headers,
+            timeout=(constants.CONNECT_TIMEOUT, constants.READ_TIMEOUT),
         )
 
-    @mock.patch("api_pgd_client.client.requests.post")
+    @mock.patch("api_pgd_client.transports.requests.Session.request")
     def test_do_post_success(self, mock_post):
         mock_response = mock.MagicMock()
         mock_response.content = b'{"key": "value"}'
@@ -68,13 +93,14 @@ class BaseRequestTestCase(TestCase):
 
         self.assertEqual(response, {"key": "value"})
         mock_post.assert_called_once_with(
+            "POST",
             self.url,
             data='{"key": "value"}',
             headers=self.headers,
-            timeout=constants.REQUEST_TIMEOUT,
+            timeout=(constants.CONNECT_TIMEOUT, constants.READ_TIMEOUT),
         )
 
-    @mock.patch("api_pgd_client.client.requests.put")
+    @mock.patch("api_pgd_client.transports.requests.Session.request")
     def test_do_put_timeout_error(self, mock_put):
         mock_put.side_effect = requests.exceptions.Timeout()
         erro_esperado = "Due to timeout error, PUT can't be done."
@@ -83,15 +109,15 @@ class BaseRequestTestCase(TestCase):
             self.request.do_put(self.url, self.data, self.headers)
 
         self.assertIn(erro_esperado, str(context.exception))
-        payload = json.loads(json.dumps(self.data, default=str))
         mock_put.assert_called_once_with(
+            "PUT",
             self.url,
-            json=payload,
-            headers=self.headers,
-            timeout=constants.REQUEST_TIMEOUT,
+            data=b'{"key":"value"}',
+            headers=self.put_headers,
+            timeout=(constants.CONNECT_TIMEOUT, constants.READ_TIMEOUT),
         )
 
-    @mock.patch("api_pgd_client.client.requests.put")
+    @mock.patch("api_pgd_client.transports.requests.Session.request")
     def test_do_get_http_error(self, mock_put):
         mock_response = MockResponse(content=b'{"detail": "value"}')
         mock_response.raise_for_status = mock.MagicMock(
@@ -108,15 +134,15 @@ class BaseRequestTestCase(TestCase):
             self.request.do_put(self.url, self.data, self.headers)
 
         self.assertIn(erro_esperado, str(context.exception))
-        payload = json.loads(json.dumps(self.data, default=str))
         mock_put.assert_called_once_with(
+            "PUT",
             self.url,
-            json=payload,
-            headers=self.headers,
-            timeout=constants.REQUEST_TIMEOUT,
+            data=b'{"key":"value"}',
+            headers=self.put_headers,
+            timeout=(constants.CONNECT_TIMEOUT, constants.READ_TIMEOUT),
         )
 
-    @mock.patch("api_pgd_client.client.requests.put")
+    @mock.patch("api_pgd_client.transports.requests.Session.request")
     def test_do_put_success(self, mock_put):
         mock_response = mock.MagicMock()
         mock_response.content = b'{"key": "value"}'
@@ -128,13 +154,39 @@ class BaseRequestTestCase(TestCase):
 
         self.assertEqual(response, {"key": "value"})
         mock_put.assert_called_once_with(
+            "PUT",
             self.url,
-            json={"key": "value"},
-            headers=self.headers,
-            timeout=constants.REQUEST_TIMEOUT,
+            data=b'{"key":"value"}',
+            headers=self.put_headers,
+            timeout=(constants.CONNECT_TIMEOUT, constants.READ_TIMEOUT),
         )
 
-    @mock.patch("api_pgd_client.client.requests.delete")
+    @mock.patch("api_pgd_client.transports.requests.Session.request")
+    def test_do_put_deveria_serializar_datas_e_decimais_como_texto(self, mock_put):
+        mock_put.return_value.content = b""
+        data = {
+            "data_inicio": datetime.date(2025, 1, 31),
+            "atualizado_em": datetime.datetime(2025, 1, 31, 8, 30),
+            "percentual": decimal.Decimal("12.50"),
+            "nome": "Secretaria de Gestão",
+        }
+
+        self.request.do_put(self.url, data, self.headers)
+
+        body = mock_put.call_args.kwargs["data"]
+        assert json.loads(json.dumps(data, default=str)) == json.loads(body)
+        assert "Secretaria de Gestão".encode() in body
+
+    @mock.patch("api_pgd_client.transports.requests.Session.request")
+    def test_do_put_deveria_manter_o_content_type_informado(self, mock_put):
+        mock_put.return_value.content = b""
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+
+        self.request.do_put(self.url, self.data, headers)
+
+        assert headers == mock_put.call_args.kwargs["headers"]
+
+    @mock.patch("api_pgd_client.transports.requests.Session.request")
     def test_do_delete_success(self, mock_delete):
         mock_response = mock.MagicMock()
         mock_response.content = b'{"key": "value"}'
@@ -146,7 +198,10 @@ class BaseRequestTestCase(TestCase):
 
         self.assertEqual(response, {"key": "value"})
         mock_delete.assert_called_once_with(
-            self.url, headers=self.headers, timeout=constants.REQUEST_TIMEOUT
+            "DELETE",
+            self.url,
+            headers=self.headers,
+            timeout=(constants.CONNECT_TIMEOUT, constants.READ_TIMEOUT),
         )
 
 
@@ -167,13 +222,14 @@ class ApiClientTestCase(TestCase):
             origem_unidade=self.origem_unidade,
             cod_unidade_autorizadora=self.unidade_autorizadora,
         )
+        self.api_client.token_manager.set(self.token)
 
     def tearDown(self):
         pass
 
     def test_default_headers_deveria_retornar_os_headers_padrao(self):
         expected_source = "my app/2025.3.1 (https://my.app.example/about)"
-        self.api_client._token = self.token
+        self.api_client.token_manager.set(self.token)
         headers_esperados = {
             constants_headers.CONTENT_TYPE_HEADER_LABEL: constants_headers.CONTENT_TYPE_JSON_VALUE,
             constants_headers.AUTHORIZATION_HEADER_LABEL: constants_headers.AUTHORIZATION_HEADER.value.format(
@@ -185,6 +241,65 @@ class ApiClientTestCase(TestCase):
         headers = self.api_client.default_headers
         assert headers_esperados == headers
 
+    def test_default_headers_deveria_ser_reconstruido_apenas_com_novo_token(self):
+        self.api_client.token_manager.set(self.token)
+        with mock.patch.object(
+            self.api_client,
+            "build_default_headers",
+            wraps=self.api_client.build_default_headers,
+        ) as mock_build_default_headers:
+            primeiro = self.api_client.default_headers
+            primeiro["X-Alterado"] = "sim"
+            segundo = self.api_client.default_headers
+            novo_token = {"access_token": "novo", "token_type": "Bearer"}
+            self.api_client.token_manager.set(novo_token)
+            terceiro = self.api_client.default_headers
+
+        assert "X-Alterado" not in segundo
+        assert "Bearer novo" == terceiro[constants_headers.AUTHORIZATION_HEADER_LABEL]
+        mock_build_default_headers.assert_has_calls(
+            [mock.call(self.token), mock.call(novo_token)]
+        )
+        assert 2 == mock_build_default_headers.call_count
+
+    def test_deveria_invalidar_o_token_enviado_quando_expirado(self):
+        primeiro = {"access_token": "primeiro", "token_type": "Bearer"}
+        segundo = {"access_token": "segundo", "token_type": "Bearer"}
+        enviados = []
+        self.api_client.token_manager.set({})
+
+        def do_get(url, params, headers):
+            enviados.append(headers[constants_headers.AUTHORIZATION_HEADER_LABEL])
+            if len(enviados) == 1:
+                raise client.ApiClient.Error(constants_errors.TOKEN_INVALIDO)
+            return {}
+
+        with (
+            mock.patch.object(
+                self.api_client, "get_token", side_effect=[primeiro, segundo]
+            ),
+            mock.patch.object(self.api_client, "do_get", side_effect=do_get),
+            mock.patch.object(
+                self.api_client.token_manager,
+                "invalidate",
+                wraps=self.api_client.token_manager.invalidate,
+            ) as mock_invalidate,
+        ):
+            self.api_client.consultar_usuario(self.email)
+
+        mock_invalidate.assert_called_once_with(primeiro)
+        assert ["Bearer primeiro", "Bearer segundo"] == enviados
+        assert self.api_client.token_manager.current is segundo
+
+    def test_get_endpoint_deveria_codificar_os_parametros_do_caminho(self):
+        url = self.api_client.get_endpoint(
+            constants_endpoints.PLANO_TRABALHO_ENDPOINT,
+            origem_unidade=self.origem_unidade,
+            cod_unidade_autorizadora=self.unidade_autorizadora,
+            id_plano_trabalho="2024/01",
+        )
+        assert url.endswith("/plano_trabalho/2024%2F01")
+
     def test_get_endpoint_deveria_lancar_erro_quando_nao_definido(self):
         with pytest.raises(client.ApiClient.Error, match="Endpoint not defined"):
             self.api_client.get_endpoint("endpoint_inexistente")
@@ -349,6 +464,7 @@ class ApiClientTestCase(TestCase):
         )
 
     def test_propriedade_token_deveria_buscar_um_novo_token(self):
+        self.api_client.token_manager.set({})
         with mock.patch("api_pgd_client.client.ApiClient.get_token") as mock_get_token:
             token = self.api_client.token
         mock_get_token.assert_called_once_with()
@@ -359,7 +475,7 @@ class ApiClientTestCase(TestCase):
             "access_token": "token",
             "type": "Bearer",
         }
-        self.api_client._token = token_esperado
+        self.api_client.token_manager.set(token_esperado)
         with mock.patch("api_pgd_client.client.ApiClient.get_token") as mock_get_token:
             token = self.api_client.token
         mock_get_token.assert_not_called()
@@ -972,5 +1088,650 @@ class ApiClientTestCase(TestCase):
             self.api_client.retry_on_expired_token(mock_method)
         mock_method.assert_called_once()
 
+    def test_retry_on_expired_token_deveria_renovar_o_token_uma_unica_vez(self):
+        token_expirado = {"access_token": "expirado", "token_type": "Bearer"}
+        token_novo = {"access_token": "novo", "token_type": "Bearer"}
+        self.api_client.token_manager.set(token_expirado)
+
+        def request_call():
+            if self.api_client.token["access_token"] == "expirado":
+                time.sleep(0.01)
+                raise client.ApiClient.Error(constants_errors.TOKEN_INVALIDO)
+            return self.api_client.token["access_token"]
+
+        with (
+            mock.patch(
+                "api_pgd_client.client.ApiClient.get_token", return_value=token_novo
+            ) as mock_get_token,
+            futures.ThreadPoolExecutor(max_workers=10) as executor,
+        ):
+            resultados = list(
+                executor.map(
+                    lambda _: self.api_client.retry_on_expired_token(request_call),
+                    range(10),
+                )
+            )
+
+        assert ["novo"] * 10 == resultados
+        mock_get_token.assert_called_once_with()
+
     def test_sss(self):
         pass
+
+
+def build_response(status_code=200, json_data=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(json_data).encode() if json_data else b""
+    return response
+
+
+class ApiClientEnvioEmLoteTestCase(TestCase):
+    def setUp(self):
+        self.transport = mock.Mock(spec=transports.BaseTransport)
+        self.api_client = client.ApiClient(
+            domain="https://api-pgd.dth.api.gov.br",
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            transport=self.transport,
+        )
+        self.api_client.token_manager.set(
+            {"access_token": "token", "token_type": "Bearer"}
+        )
+
+    def test_deveria_retornar_um_resultado_por_item_na_ordem_de_entrada(self):
+        def request(method_name, url, **kwargs):
+            if url.endswith("/2"):
+                return build_response(422, {"detail": "Plano inválido"})
+            return build_response(200, {"url": url})
+
+        self.transport.request.side_effect = request
+        planos = [entities.PlanoDeTrabalho(id_plano_trabalho=str(i)) for i in range(5)]
+
+        resultados = self.api_client.enviar_planos_trabalho_em_lote(
+            planos, max_workers=2
+        )
+
+        assert planos == [resultado.entity for resultado in resultados]
+        assert [True, True, False, True, True] == [
+            resultado.success for resultado in resultados
+        ]
+        falha = resultados[2]
+        assert 422 == falha.status_code
+        assert {"detail": "Plano inválido"} == falha.error_body
+        assert isinstance(falha.error, client.ApiClient.Error)
+        assert falha.response is None
+        sucesso = resultados[0]
+        assert 200 == sucesso.status_code
+        assert sucesso.error is None
+        assert sucesso.response["url"].endswith("/plano_trabalho/0")
+        assert all(resultado.latency >= 0 for resultado in resultados)
+
+    def test_nao_deveria_interromper_o_lote_em_erro_de_conexao(self):
+        self.api_client.retry_policy = retries.RetryPolicy(max_attempts=1)
+        self.transport.request.side_effect = [
+            requests.ConnectionError("Conexão recusada"),
+            build_response(200, {"ok": True}),
+        ]
+        participantes = [
+            entities.Participante(matricula_siape="1", cod_unidade_lotacao=7),
+            entities.Participante(matricula_siape="2", cod_unidade_lotacao=7),
+        ]
+
+        resultados = self.api_client.enviar_participantes_em_lote(
+            participantes, max_workers=1
+        )
+
+        assert [False, True] == [resultado.success for resultado in resultados]
+        assert resultados[0].status_code is None
+        assert isinstance(resultados[0].error, requests.ConnectionError)
+
+    def test_nao_deveria_interromper_o_lote_com_valor_nao_finito(self):
+        self.transport.request.return_value = build_response(200, {"ok": True})
+        planos = [entities.PlanoDeTrabalho(id_plano_trabalho=str(i)) for i in range(3)]
+        planos[1].carga_horaria_disponivel = float("nan")
+
+        resultados = self.api_client.enviar_planos_trabalho_em_lote(
+            planos, max_workers=1
+        )
+
+        assert [True, False, True] == [resultado.success for resultado in resultados]
+        assert isinstance(resultados[1].error, client.ApiClient.Error)
+        urls = [call.args[1] for call in self.transport.request.call_args_list]
+        assert ["0", "2"] == [url.rsplit("/", 1)[-1] for url in urls]
+
+    def test_deveria_consumir_a_entrada_sob_demanda(self):
+        self.transport.request.return_value = build_response(200, {"ok": True})
+        lidos = []
+
+        def planos_entregas():
+            for i in range(100):
+                lidos.append(i)
+                yield entities.PlanoDeEntregas(id_plano_entregas=str(i))
+
+        resultados = self.api_client._enviar_em_lote(
+            self.api_client.enviar_plano_entregas, planos_entregas(), 2
+        )
+        next(resultados)
+
+        assert len(lidos) <= 5
+        resultados.close()
+
+    def test_deveria_usar_a_quantidade_de_workers_informada(self):
+        self.transport.request.return_value = build_response(200, {"ok": True})
+        with mock.patch(
+            "api_pgd_client.client.futures.ThreadPoolExecutor",
+            wraps=client.futures.ThreadPoolExecutor,
+        ) as mock_executor:
+            self.api_client.enviar_planos_entregas_em_lote(
+                [entities.PlanoDeEntregas(id_plano_entregas="1")], max_workers=3
+            )
+        mock_executor.assert_called_once_with(max_workers=3)
+
+
+class ApiClientEstadoDeEnvioTestCase(TestCase):
+    def setUp(self):
+        self.transport = mock.Mock(spec=transports.BaseTransport)
+        self.transport.request.return_value = build_response(200, {"ok": True})
+        self.state_store = state.SqliteStateStore(":memory:")
+        self.api_client = client.ApiClient(
+            domain="https://api-pgd.dth.api.gov.br",
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            transport=self.transport,
+            state_store=self.state_store,
+        )
+        self.api_client.token_manager.set(
+            {"access_token": "token", "token_type": "Bearer"}
+        )
+        self.plano_trabalho = entities.PlanoDeTrabalho(
+            id_plano_trabalho="1", carga_horaria_disponivel=40
+        )
+
+    def tearDown(self):
+        self.state_store.close()
+
+    def test_nao_deveria_reenviar_conteudo_inalterado(self):
+        assert {"ok": True} == self.api_client.enviar_plano_trabalho(
+            self.plano_trabalho
+        )
+        assert self.api_client.enviar_plano_trabalho(self.plano_trabalho) is None
+
+        self.transport.request.assert_called_once()
+
+    def test_deveria_reenviar_conteudo_alterado(self):
+        self.api_client.enviar_plano_trabalho(self.plano_trabalho)
+        self.plano_trabalho.carga_horaria_disponivel = 20
+
+        self.api_client.enviar_plano_trabalho(self.plano_trabalho)
+
+        assert 2 == self.transport.request.call_count
+
+    def test_deveria_reenviar_apos_falha(self):
+        self.transport.request.side_effect = [
+            build_response(500, {"detail": "Erro"}),
+            build_response(200, {"ok": True}),
+        ]
+        with self.assertRaises(client.ApiClient.Error):
+            self.api_client.enviar_plano_trabalho(self.plano_trabalho)
+
+        self.api_client.enviar_plano_trabalho(self.plano_trabalho)
+
+        assert 2 == self.transport.request.call_count
+
+    def test_deveria_usar_a_url_do_recurso_como_chave(self):
+        participante = entities.Participante(
+            matricula_siape="1234567", cod_unidade_lotacao=777
+        )
+        outro_participante = entities.Participante(
+            matricula_siape="7654321", cod_unidade_lotacao=777
+        )
+
+        self.api_client.enviar_participante(participante)
+        self.api_client.enviar_participante(outro_participante)
+
+        url = self.api_client.participante_endpoint(777, "1234567")
+        assert state.content_digest(participante.to_dict()) == self.state_store.get(url)
+        assert 2 == self.transport.request.call_count
+
+    def test_envio_em_lote_deveria_indicar_os_itens_ignorados(self):
+        self.api_client.enviar_plano_trabalho(self.plano_trabalho)
+        novo = entities.PlanoDeTrabalho(id_plano_trabalho="2")
+
+        resultados = self.api_client.enviar_planos_trabalho_em_lote(
+            [self.plano_trabalho, novo], max_workers=2
+        )
+
+        assert [True, False] == [resultado.skipped for resultado in resultados]
+        assert all(resultado.success for resultado in resultados)
+        assert resultados[0].status_code is None
+        assert 2 == self.transport.request.call_count
+
+
+class ApiClientCacheTestCase(TestCase):
+    def setUp(self):
+        self.transport = mock.Mock(spec=transports.BaseTransport)
+        self.response_cache = cache.LruResponseCache()
+        self.api_client = client.ApiClient(
+            domain="https://api-pgd.dth.api.gov.br",
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            transport=self.transport,
+            response_cache=self.response_cache,
+        )
+        self.api_client.token_manager.set(
+            {"access_token": "token", "token_type": "Bearer"}
+        )
+
+    def test_deveria_criar_os_caches_apenas_quando_configurados(self):
+        with (
+            mock.patch.object(client.constants, "CACHE_MAXSIZE", 5),
+            mock.patch.object(client.constants, "CONDITIONAL_CACHE_MAXSIZE", 7),
+        ):
+            configurado = client.ApiClient(transport=self.transport)
+
+        assert (5, 7) == (
+            configurado.response_cache.maxsize,
+            configurado.conditional_cache.maxsize,
+        )
+        padrao = client.ApiClient(transport=self.transport)
+        assert (None, None) == (padrao.response_cache, padrao.conditional_cache)
+
+    def test_deveria_consultar_a_api_apenas_uma_vez(self):
+        self.transport.request.return_value = build_response(
+            200, {"id_plano_trabalho": "1", "status": 3}
+        )
+
+        primeiro = self.api_client.consultar_plano_trabalho("1")
+        segundo = self.api_client.consultar_plano_trabalho("1")
+
+        assert primeiro == segundo
+        assert primeiro is not segundo
+        self.transport.request.assert_called_once()
+        assert (1, 1) == self.response_cache.stats()[:2]
+
+    def test_deveria_guardar_a_resposta_404(self):
+        self.transport.request.return_value = build_response(
+            404, {"detail": "Participante não encontrado"}
+        )
+
+        for _ in range(2):
+            with self.assertRaises(client.ApiClient.Error) as context:
+                self.api_client.consultar_participante(777, "1234567")
+            assert 404 == context.exception.status_code
+            assert {"detail": "Participante não encontrado"} == (
+                context.exception.content
+            )
+
+        self.transport.request.assert_called_once()
+
+    def test_nao_deveria_guardar_outros_erros(self):
+        self.transport.request.side_effect = [
+            build_response(500, {"detail": "Erro"}),
+            build_response(200, {"email": "fulano@mail.com"}),
+        ]
+
+        with self.assertRaises(client.ApiClient.Error):
+            self.api_client.consultar_usuario("fulano@mail.com")
+
+        assert (
+            "fulano@mail.com"
+            == self.api_client.consultar_usuario("fulano@mail.com").email
+        )
+
+    def test_enviar_deveria_invalidar_a_resposta_guardada(self):
+        self.transport.request.side_effect = [
+            build_response(404, {"detail": "Plano não encontrado"}),
+            build_response(200, {"ok": True}),
+            build_response(200, {"id_plano_entregas": "1", "status": 2}),
+        ]
+        with self.assertRaises(client.ApiClient.Error):
+            self.api_client.consultar_plano_entregas("1")
+
+        self.api_client.enviar_plano_entregas(
+            entities.PlanoDeEntregas(id_plano_entregas="1", status=2)
+        )
+
+        assert 2 == self.api_client.consultar_plano_entregas("1").status
+        assert 3 == self.transport.request.call_count
+
+
+class ApiClientRequisicaoCondicionalTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.conditional_cache = cache.ConditionalCache()
+        self.api_client = client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            conditional_cache=self.conditional_cache,
+        )
+        self.addCleanup(self.api_client.close)
+        self.path = "/organizacao/SIAPE/999/plano_entregas/1"
+        self.server.resources[self.path] = {
+            "id_plano_entregas": "1",
+            "entregas": [{"id_entrega": str(i)} for i in range(100)],
+        }
+
+    def get_requests(self):
+        return [request for request in self.server.requests if request[0] == "GET"]
+
+    def test_deveria_reaproveitar_o_corpo_quando_a_api_responder_304(self):
+        primeiro = self.api_client.consultar_plano_entregas("1")
+        segundo = self.api_client.consultar_plano_entregas("1")
+
+        assert primeiro == segundo
+        assert 100 == len(segundo.entregas)
+        requests_get = self.get_requests()
+        assert "If-None-Match" not in requests_get[0][2]
+        assert requests_get[1][2]["If-None-Match"]
+        assert (1, 1, 1) == (
+            self.conditional_cache.stats().hits,
+            self.conditional_cache.stats().misses,
+            self.conditional_cache.stats().size,
+        )
+
+    def test_deveria_baixar_novamente_quando_o_recurso_mudar(self):
+        self.api_client.consultar_plano_entregas("1")
+        self.api_client.enviar_plano_entregas(
+            entities.PlanoDeEntregas(id_plano_entregas="1", status=2)
+        )
+
+        plano_entregas = self.api_client.consultar_plano_entregas("1")
+
+        assert 2 == plano_entregas.status
+        assert [] == plano_entregas.entregas
+        assert 2 == self.conditional_cache.stats().misses
+
+    def test_nao_deveria_guardar_respostas_sem_validadores(self):
+        self.conditional_cache.resolve("url", None, 200, {}, b"{}")
+
+        assert self.conditional_cache.get("url") is None
+        assert "url?a=1&b=2" == self.conditional_cache.get_key("url", {"b": 2, "a": 1})
+
+
+class ApiClientRetentativaTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api_client = client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            retry_policy=retries.RetryPolicy(max_attempts=3),
+        )
+        self.addCleanup(self.api_client.close)
+        self.path = "/organizacao/SIAPE/999/plano_entregas/1"
+        self.server.resources[self.path] = {"id_plano_entregas": "1"}
+        self.api_client.default_headers
+        patcher = mock.patch("api_pgd_client.client.time.sleep")
+        self.mock_sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_requests(self):
+        return [request for request in self.server.requests if request[0] == "GET"]
+
+    def test_deveria_tentar_novamente_em_erro_temporario(self):
+        self.server.failures.append((503, {}))
+
+        plano_entregas = self.api_client.consultar_plano_entregas("1")
+
+        assert "1" == plano_entregas.id_plano_entregas
+        assert 2 == len(self.get_requests())
+        self.mock_sleep.assert_called_once()
+
+    def test_deveria_esperar_o_retry_after_em_429(self):
+        self.server.failures.append((429, {"Retry-After": "2"}))
+
+        self.api_client.consultar_plano_entregas("1")
+
+        self.mock_sleep.assert_called_once_with(2)
+
+    def test_nao_deveria_tentar_novamente_em_erro_definitivo(self):
+        self.server.failures.append((500, {}))
+
+        with self.assertRaises(client.ApiClient.Error) as context:
+            self.api_client.consultar_plano_entregas("1")
+
+        assert 500 == context.exception.status_code
+        assert 1 == len(self.get_requests())
+        self.mock_sleep.assert_not_called()
+
+    def test_deveria_desistir_apos_o_maximo_de_tentativas(self):
+        self.server.failures.extend([(503, {})] * 3)
+
+        with self.assertRaises(client.ApiClient.Error) as context:
+            self.api_client.consultar_plano_entregas("1")
+
+        assert 503 == context.exception.status_code
+        assert 3 == len(self.get_requests())
+
+    def test_nao_deveria_tentar_novamente_sem_saldo_de_retentativas(self):
+        self.api_client.retry_policy = retries.RetryPolicy(
+            max_attempts=3, budget=retries.RetryBudget(ratio=0, max_tokens=0)
+        )
+        self.server.failures.append((503, {}))
+
+        with self.assertRaises(client.ApiClient.Error):
+            self.api_client.consultar_plano_entregas("1")
+
+        assert 1 == len(self.get_requests())
+
+    def test_deveria_informar_as_tentativas_no_resultado_do_lote(self):
+        self.server.failures.append((502, {}))
+
+        resultados = self.api_client.enviar_planos_entregas_em_lote(
+            [entities.PlanoDeEntregas(id_plano_entregas="1")]
+        )
+
+        assert resultados[0].success
+        assert 2 == resultados[0].attempts
+
+
+class ApiClientLimiteDeTaxaTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.clock = [0.0]
+        self.read_limiter = ratelimit.TokenBucket(
+            rate=1, burst=1, clock=lambda: self.clock[0]
+        )
+        self.write_limiter = ratelimit.TokenBucket(
+            rate=1, burst=1, clock=lambda: self.clock[0]
+        )
+        self.api_client = client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            read_limiter=self.read_limiter,
+            write_limiter=self.write_limiter,
+        )
+        self.addCleanup(self.api_client.close)
+        self.server.resources["/organizacao/SIAPE/999/plano_entregas/1"] = {
+            "id_plano_entregas": "1"
+        }
+        patcher = mock.patch("api_pgd_client.client.time.sleep")
+        self.mock_sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_deveria_esperar_quando_exceder_a_taxa_de_leitura(self):
+        self.api_client.consultar_plano_entregas("1")
+        self.api_client.consultar_plano_entregas("1")
+
+        self.mock_sleep.assert_called_once_with(1.0)
+
+    def test_deveria_limitar_leituras_e_escritas_separadamente(self):
+        self.api_client.consultar_plano_entregas("1")
+        self.api_client.enviar_plano_entregas(
+            entities.PlanoDeEntregas(id_plano_entregas="1")
+        )
+
+        self.mock_sleep.assert_not_called()
+        assert self.write_limiter.reserve() > 0
+
+    def test_deveria_devolver_a_ficha_quando_o_prazo_nao_permitir_esperar(self):
+        self.api_client.consultar_plano_entregas("1")
+
+        with self.assertRaises(client.ApiClient.Error) as context:
+            with timeouts.deadline(0.5):
+                self.api_client.consultar_plano_entregas("1")
+
+        assert "deadline" in str(context.exception)
+        assert 1.0 == self.read_limiter.reserve()
+
+
+class ApiClientConcorrenciaAdaptativaTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.limiter = concurrency.AimdLimiter(
+            initial_limit=2, min_limit=1, max_limit=8, latency_threshold=0.1
+        )
+        self.api_client = client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            retry_policy=retries.RetryPolicy(max_attempts=1),
+            concurrency_limiter=self.limiter,
+        )
+        self.addCleanup(self.api_client.close)
+        self.planos_entregas = [
+            entities.PlanoDeEntregas(id_plano_entregas=str(i)) for i in range(60)
+        ]
+        self.server.latency = 0.01
+
+    def enviar(self):
+        return self.api_client.enviar_planos_entregas_em_lote(
+            self.planos_entregas, max_workers=8
+        )
+
+    def test_deveria_aumentar_a_concorrencia_enquanto_a_api_responde_bem(self):
+        self.limiter.latency_threshold = 0
+
+        resultados = self.enviar()
+
+        assert all(resultado.success for resultado in resultados)
+        assert 8 == self.limiter.limit
+        assert self.server.max_in_flight <= 8
+
+    def test_deveria_reduzir_a_concorrencia_quando_a_api_ficar_lenta(self):
+        # The fake API slows down past 3 simultaneous requests.
+        self.server.latency = lambda in_flight: 0.2 if in_flight > 3 else 0.01
+
+        self.enviar()
+
+        assert self.limiter.limit < 8
+        assert self.limiter.stats().decreases >= 1
+        assert self.server.max_in_flight < 8
+
+    def test_deveria_reduzir_a_concorrencia_em_429(self):
+        self.limiter.latency_threshold = 0
+        self.server.failures.append((429, {}))
+
+        resultados = self.enviar()
+
+        assert [429] == [r.status_code for r in resultados if not r.success]
+        assert 1 == self.limiter.stats().decreases
+
+
+class ApiClientCoalescenciaTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.server.latency = 0.05
+        self.single_flight = coalescing.SingleFlight()
+        self.api_client = client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            single_flight=self.single_flight,
+        )
+        self.addCleanup(self.api_client.close)
+        self.server.resources["/organizacao/SIAPE/999/plano_entregas/1"] = {
+            "id_plano_entregas": "1",
+            "entregas": [{"id_entrega": "1"}],
+        }
+        self.api_client.default_headers
+
+    def test_deveria_compartilhar_consultas_simultaneas_identicas(self):
+        with futures.ThreadPoolExecutor(max_workers=5) as executor:
+            planos_entregas = list(
+                executor.map(
+                    lambda _: self.api_client.consultar_plano_entregas("1"), range(5)
+                )
+            )
+
+        gets = [request for request in self.server.requests if request[0] == "GET"]
+        stats = self.single_flight.stats()
+        assert len(gets) == stats.issued
+        assert 5 == stats.issued + stats.coalesced
+        assert stats.coalesced >= 1
+        assert all(plano == planos_entregas[0] for plano in planos_entregas)
+        # Each caller gets its own entity, even when the response is shared.
+        assert len({id(plano) for plano in planos_entregas}) == 5
+
+    def test_nao_deveria_compartilhar_as_listas_entre_consultas(self):
+        with futures.ThreadPoolExecutor(max_workers=2) as executor:
+            primeiro, segundo = executor.map(
+                lambda _: self.api_client.consultar_plano_entregas("1"), range(2)
+            )
+
+        primeiro.entregas.append({"id_entrega": "2"})
+
+        assert 1 == self.single_flight.stats().coalesced
+        assert [{"id_entrega": "1"}] == segundo.entregas
+
+
+class ApiClientPrazoTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api_client = client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            retry_policy=retries.RetryPolicy(max_attempts=3, backoff_base=0),
+            endpoint_timeouts={"PUT plano_entregas": (1, 0.2)},
+        )
+        self.addCleanup(self.api_client.close)
+        self.api_client.default_headers
+
+    def test_deveria_aplicar_o_timeout_do_endpoint(self):
+        self.server.latency = 0.5
+
+        with self.assertRaises(client.ApiClient.Error) as context:
+            self.api_client.enviar_plano_entregas(
+                entities.PlanoDeEntregas(id_plano_entregas="1")
+            )
+
+        assert "timeout" in str(context.exception)
+        assert 3 == len([r for r in self.server.requests if r[0] == "PUT"])
+
+    def test_nao_deveria_enviar_depois_do_prazo(self):
+        with timeouts.deadline(0):
+            with self.assertRaises(client.ApiClient.Error) as context:
+                self.api_client.consultar_plano_entregas("1")
+
+        assert "deadline" in str(context.exception)
+        assert [] == [r for r in self.server.requests if r[0] == "GET"]
+
+    def test_deveria_cancelar_o_restante_do_lote_apos_o_prazo(self):
+        self.server.latency = 0.1
+        planos_entregas = [
+            entities.PlanoDeEntregas(id_plano_entregas=str(i)) for i in range(20)
+        ]
+
+        resultados = self.api_client.enviar_planos_entregas_em_lote(
+            planos_entregas, max_workers=2, deadline=0.25
+        )
+
+        enviados = [r for r in self.server.requests if r[0] == "PUT"]
+        assert 20 == len(resultados)
+        assert len(enviados) < 10
+        assert all(
+            "deadline" in str(r.error) or "timeout" in str(r.error)
+            for r in resultados
+            if not r.success
+        )
+        assert sum(not r.success for r in resultados) >= 10
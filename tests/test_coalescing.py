@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from api_pgd_client import coalescing
+
+
+class GetKeyTestCase(TestCase):
+    def test_deveria_ignorar_a_ordem_dos_parametros(self):
+        assert coalescing.get_key(
+            "GET", "url", {"a": 1, "b": 2}, {}
+        ) == coalescing.get_key("GET", "url", {"b": 2, "a": 1}, {})
+
+    def test_deveria_separar_credenciais_diferentes(self):
+        assert coalescing.get_key(
+            "GET", "url", {}, {"Authorization": "Bearer a"}
+        ) != coalescing.get_key("GET", "url", {}, {"Authorization": "Bearer b"})
+
+
+class SingleFlightTestCase(TestCase):
+    def setUp(self):
+        self.single_flight = coalescing.SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow_call(self):
+        self.calls += 1
+        self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+    def run_concurrently(self, count, key=("GET", "url")):
+        results = []
+
+        def run():
+            try:
+                results.append(self.single_flight.do(key, self.slow_call))
+            except Exception as exc:
+                results.append(exc)
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        while self.single_flight.stats().coalesced < count - 1:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_deveria_compartilhar_uma_unica_chamada(self):
+        self.result = {"id": 1}
+
+        results = self.run_concurrently(5)
+
+        assert 1 == self.calls
+        assert all(result is self.result for result in results)
+        assert (1, 4, 0) == tuple(self.single_flight.stats())
+
+    def test_deveria_compartilhar_o_erro(self):
+        self.result = ValueError("falhou")
+
+        results = self.run_concurrently(3)
+
+        assert 1 == self.calls
+        assert all(result is self.result for result in results)
+
+    def test_deveria_chamar_de_novo_depois_de_concluida(self):
+        self.result = {"id": 1}
+        self.release.set()
+
+        self.single_flight.do(("GET", "url"), self.slow_call)
+        self.single_flight.do(("GET", "url"), self.slow_call)
+
+        assert 2 == self.calls
+        assert (2, 0, 0) == tuple(self.single_flight.stats())
+
+
+class AsyncSingleFlightTestCase(TestCase):
+    def test_deveria_compartilhar_uma_unica_chamada(self):
+        single_flight = coalescing.AsyncSingleFlight()
+        calls = []
+
+        async def slow_call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"id": 1}
+
+        async def run():
+            return await asyncio.gather(
+                *(single_flight.do(("GET", "url"), slow_call) for _ in range(5))
+            )
+
+        results = asyncio.run(run())
+
+        assert 1 == len(calls)
+        assert [{"id": 1}] * 5 == results
+        assert (1, 4, 0) == tuple(single_flight.stats())
+
+    def test_deveria_compartilhar_o_erro(self):
+        single_flight = coalescing.AsyncSingleFlight()
+
+        async def failing_call():
+            await asyncio.sleep(0.01)
+            raise ValueError("falhou")
+
+        async def run():
+            return await asyncio.gather(
+                *(single_flight.do(("GET", "url"), failing_call) for _ in range(3)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    def test_deveria_continuar_para_os_outros_se_o_primeiro_for_cancelado(self):
+        single_flight = coalescing.AsyncSingleFlight()
+
+        async def slow_call():
+            await asyncio.sleep(0.02)
+            return {"id": 1}
+
+        async def run():
+            leader = asyncio.ensure_future(single_flight.do(("GET", "url"), slow_call))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(
+                single_flight.do(("GET", "url"), slow_call)
+            )
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await asyncio.gather(leader, follower, return_exceptions=True)
+
+        leader, follower = asyncio.run(run())
+
+        assert isinstance(leader, asyncio.CancelledError)
+        assert {"id": 1} == follower
+        assert (1, 1, 0) == tuple(single_flight.stats())
@@ -0,0 +1,81 @@
+import threading
+from unittest import TestCase
+
+from api_pgd_client import concurrency
+
+
+class AimdLimiterTestCase(TestCase):
+    def setUp(self):
+        self.limiter = concurrency.AimdLimiter(
+            initial_limit=4, min_limit=1, max_limit=8, backoff_ratio=0.5
+        )
+
+    def succeed(self, count):
+        for _ in range(count):
+            self.limiter.release(self.limiter.acquire(), False, 0.01)
+
+    def test_deveria_aumentar_um_por_rodada_de_sucessos(self):
+        self.succeed(4)
+        assert 4 == self.limiter.limit
+
+        self.succeed(1)
+        assert 5 == self.limiter.limit
+
+        self.succeed(5)
+        assert 6 == self.limiter.limit
+        assert 2 == self.limiter.stats().increases
+
+    def test_nao_deveria_passar_do_limite_maximo(self):
+        self.succeed(100)
+
+        assert 8 == self.limiter.limit
+
+    def test_deveria_reduzir_pela_metade_em_sobrecarga(self):
+        self.limiter.release(self.limiter.acquire(), True, 0.01)
+
+        assert 2 == self.limiter.limit
+        assert 1 == self.limiter.stats().decreases
+
+    def test_deveria_reduzir_uma_vez_por_geracao(self):
+        generations = [self.limiter.acquire() for _ in range(4)]
+
+        for generation in generations:
+            self.limiter.release(generation, True, 0.01)
+
+        assert 2 == self.limiter.limit
+        assert 1 == self.limiter.stats().decreases
+
+    def test_nao_deveria_reduzir_abaixo_do_limite_minimo(self):
+        for _ in range(10):
+            self.limiter.release(self.limiter.acquire(), True, 0.01)
+
+        assert 1 == self.limiter.limit
+
+    def test_deveria_tratar_latencia_alta_como_sobrecarga(self):
+        self.limiter.latency_threshold = 0.5
+
+        self.limiter.release(self.limiter.acquire(), False, 0.6)
+
+        assert 2 == self.limiter.limit
+
+    def test_deveria_classificar_os_status_de_sobrecarga(self):
+        assert self.limiter.is_overload_status(429)
+        assert self.limiter.is_overload_status(503)
+        assert not self.limiter.is_overload_status(422)
+
+    def test_deveria_bloquear_acima_do_limite(self):
+        generations = [self.limiter.acquire() for _ in range(4)]
+        acquired = threading.Event()
+
+        def acquire():
+            self.limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        assert not acquired.wait(0.05)
+        assert 4 == self.limiter.stats().in_flight
+
+        self.limiter.release(generations[0], False, 0.01)
+        thread.join()
+        assert acquired.is_set()
@@ -0,0 +1,164 @@
+import threading
+import time
+from concurrent import futures
+from unittest import TestCase
+
+import pytest
+
+from api_pgd_client import client, dispatcher, entities, timeouts
+from api_pgd_client.testing import FakePgdApiServer
+
+
+class DispatcherTestCase(TestCase):
+    def setUp(self):
+        self.api_client = client.ApiClient(domain="http://127.0.0.1:1")
+        self.addCleanup(self.api_client.close)
+        self.liberar = threading.Event()
+
+    def build_dispatcher(self, **kwargs):
+        kwargs.setdefault("max_workers", 1)
+        kwargs.setdefault("max_queue", 1)
+        instance = dispatcher.Dispatcher(self.api_client, **kwargs)
+        self.addCleanup(instance.shutdown, cancel_pending=True)
+        # Cleanups run last in, first out: the worker is freed first.
+        self.addCleanup(self.liberar.set)
+        return instance
+
+    def esperar(self, valor):
+        self.liberar.wait(5)
+        return valor
+
+    def ocupar(self, instance):
+        # One call running in the only worker and another waiting.
+        rodando = instance.submit(self.esperar, "rodando")
+        limite = time.monotonic() + 5
+        while instance.stats().in_flight < 1 and time.monotonic() < limite:
+            time.sleep(0.001)
+        return rodando, instance.submit(self.esperar, "na fila")
+
+    def test_deveria_devolver_o_resultado_no_future(self):
+        instance = self.build_dispatcher()
+
+        future = instance.submit(lambda a, b=0: a + b, 1, b=2)
+
+        assert 3 == future.result(timeout=5)
+
+    def test_deveria_guardar_a_excecao_no_future(self):
+        instance = self.build_dispatcher()
+
+        future = instance.submit(lambda: 1 / 0)
+
+        with pytest.raises(ZeroDivisionError):
+            future.result(timeout=5)
+        instance.shutdown()
+        assert (0, 1) == (instance.stats().completed, instance.stats().failed)
+
+    def test_reject_deveria_recusar_quando_a_fila_estiver_cheia(self):
+        instance = self.build_dispatcher(policy=dispatcher.REJECT)
+        self.ocupar(instance)
+
+        with pytest.raises(client.ApiClient.Error):
+            instance.submit(self.esperar, "recusado")
+
+        assert 1 == instance.stats().rejected
+
+    def test_drop_oldest_deveria_descartar_o_mais_antigo(self):
+        instance = self.build_dispatcher(policy=dispatcher.DROP_OLDEST)
+        rodando, na_fila = self.ocupar(instance)
+
+        novo = instance.submit(self.esperar, "novo")
+        self.liberar.set()
+
+        with pytest.raises(client.ApiClient.Error):
+            na_fila.result(timeout=5)
+        assert ["rodando", "novo"] == [
+            rodando.result(timeout=5),
+            novo.result(timeout=5),
+        ]
+        assert 1 == instance.stats().dropped
+
+    def test_block_deveria_esperar_por_espaco_na_fila(self):
+        instance = self.build_dispatcher(policy=dispatcher.BLOCK, block_timeout=5)
+        self.ocupar(instance)
+        threading.Timer(0.05, self.liberar.set).start()
+
+        future = instance.submit(self.esperar, "esperou")
+
+        assert "esperou" == future.result(timeout=5)
+
+    def test_block_deveria_desistir_apos_o_tempo_limite(self):
+        instance = self.build_dispatcher(policy=dispatcher.BLOCK, block_timeout=0.01)
+        self.ocupar(instance)
+
+        with pytest.raises(client.ApiClient.Error):
+            instance.submit(self.esperar, "atrasado")
+
+    def test_shutdown_deveria_concluir_o_que_estava_na_fila(self):
+        instance = self.build_dispatcher()
+        rodando, na_fila = self.ocupar(instance)
+        threading.Timer(0.05, self.liberar.set).start()
+
+        instance.shutdown()
+
+        assert (True, True) == (rodando.done(), na_fila.done())
+        with pytest.raises(client.ApiClient.Error):
+            instance.submit(self.esperar, "depois")
+
+    def test_shutdown_deveria_cancelar_a_fila_quando_pedido(self):
+        instance = self.build_dispatcher()
+        rodando, na_fila = self.ocupar(instance)
+
+        instance.shutdown(wait=False, cancel_pending=True)
+        self.liberar.set()
+
+        assert na_fila.cancelled()
+        assert "rodando" == rodando.result(timeout=5)
+
+    def test_deveria_manter_o_prazo_de_quem_submeteu(self):
+        instance = self.build_dispatcher()
+
+        with timeouts.deadline(60):
+            future = instance.submit(timeouts.remaining_time)
+
+        assert 0 < future.result(timeout=5) <= 60
+        assert instance.submit(timeouts.remaining_time).result(timeout=5) is None
+
+    def test_deveria_recusar_politica_desconhecida(self):
+        with pytest.raises(ValueError):
+            dispatcher.Dispatcher(self.api_client, policy="ignorar")
+
+
+class ApiClientDespacharTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer(latency=0.01).__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api_client = client.ApiClient(
+            domain=self.server.url, origem_unidade="SIAPE", cod_unidade_autorizadora=9
+        )
+
+    def test_deveria_enviar_em_segundo_plano(self):
+        pendentes = [
+            self.api_client.despachar(
+                entities.PlanoDeTrabalho(id_plano_trabalho=str(i))
+            )
+            for i in range(20)
+        ]
+
+        futures.wait(pendentes, timeout=10)
+
+        assert all(future.exception() is None for future in pendentes)
+        assert 20 == len(self.server.resources)
+        assert self.api_client.dispatcher.stats().workers <= 10
+
+    def test_close_deveria_esperar_o_que_foi_despachado(self):
+        pendentes = [
+            self.api_client.despachar(
+                entities.PlanoDeTrabalho(id_plano_trabalho=str(i))
+            )
+            for i in range(5)
+        ]
+
+        self.api_client.close()
+
+        assert all(future.done() for future in pendentes)
+        assert 5 == len(self.server.resources)
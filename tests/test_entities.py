@@ -0,0 +1,255 @@
+import dataclasses
+import pickle
+import sys
+import typing
+from collections.abc import MutableSequence
+from unittest import TestCase, mock
+
+import pytest
+
+from api_pgd_client import entities
+from api_pgd_client.utils import serialization
+
+
+def build_plano_trabalho(**kwargs):
+    return entities.PlanoDeTrabalho(
+        origem_unidade="SIAPE",
+        cod_unidade_autorizadora=1,
+        id_plano_trabalho="PT-1",
+        cpf_participante="12345678901",
+        contribuicoes=[
+            {"id_contribuicao": "C-1", "tipo_contribuicao": 1},
+            entities.Contribuicao(id_contribuicao="C-2", percentual_contribuicao=50),
+        ],
+        **kwargs,
+    )
+
+
+class ToDictTestCase(TestCase):
+    def test_deveria_gerar_o_mesmo_resultado_que_asdict(self):
+        plano_trabalho = build_plano_trabalho()
+        plano_entregas = entities.PlanoDeEntregas(
+            id_plano_entregas="PE-1",
+            entregas=[entities.Entrega(id_entrega="E-1"), {"id_entrega": "E-2"}],
+        )
+
+        assert dataclasses.asdict(plano_trabalho) == plano_trabalho.to_dict()
+        assert dataclasses.asdict(plano_entregas) == plano_entregas.to_dict()
+        assert dataclasses.asdict(entities.User()) == entities.User().to_dict()
+
+    def test_deveria_gerar_apenas_os_campos_declarados(self):
+        participante = entities.Participante(cpf="12345678901")
+        participante.campo_novo = "valor"
+
+        data = participante.to_dict()
+
+        assert dataclasses.asdict(entities.Participante(cpf="12345678901")) == data
+        assert list(data) == [field.name for field in dataclasses.fields(participante)]
+        data["cpf"] = "outro"
+        assert "12345678901" == participante.cpf
+
+    def test_nao_deveria_copiar_listas_sem_entidades(self):
+        contribuicoes = [{"id_contribuicao": "C-1"}]
+        plano_trabalho = entities.PlanoDeTrabalho(contribuicoes=contribuicoes)
+
+        data = plano_trabalho.to_dict()
+
+        assert data["contribuicoes"] is contribuicoes
+
+    def test_deveria_converter_entidades_em_tuplas_e_dicionarios(self):
+        value = {"itens": (entities.Entrega(id_entrega="E-1"),), "total": 1}
+
+        encoded = serialization.encode_value(value)
+
+        expected = {"itens": (entities.Entrega(id_entrega="E-1").to_dict(),)}
+        assert expected | {"total": 1} == encoded
+        assert isinstance(value["itens"][0], entities.Entrega)
+
+
+class FromDictTestCase(TestCase):
+    def test_deveria_ignorar_campos_desconhecidos(self):
+        data = {"email": "a@b.c", "is_admin": True, "campo_novo": "valor"}
+
+        user = entities.User.from_dict(data)
+
+        assert entities.User(email="a@b.c", is_admin=True) == user
+
+    def test_deveria_usar_os_valores_padrao_dos_campos_ausentes(self):
+        primeiro = entities.PlanoDeEntregas.from_dict({})
+        segundo = entities.PlanoDeEntregas.from_dict({})
+
+        assert entities.PlanoDeEntregas() == primeiro
+        assert primeiro.entregas is not segundo.entregas
+
+    def test_deveria_manter_itens_aninhados_como_dicionarios_por_padrao(self):
+        data = build_plano_trabalho().to_dict()
+
+        plano_trabalho = entities.PlanoDeTrabalho.from_dict(data)
+
+        assert entities.PlanoDeTrabalho(**data) == plano_trabalho
+        assert isinstance(plano_trabalho.contribuicoes[0], dict)
+
+    def test_deveria_converter_itens_aninhados_quando_solicitado(self):
+        data = build_plano_trabalho().to_dict()
+        data["contribuicoes"][0]["campo_novo"] = "valor"
+
+        plano_trabalho = entities.PlanoDeTrabalho.from_dict(data, nested=True)
+
+        assert [
+            entities.Contribuicao(id_contribuicao="C-1", tipo_contribuicao=1),
+            entities.Contribuicao(id_contribuicao="C-2", percentual_contribuicao=50),
+        ] == plano_trabalho.contribuicoes
+        assert data["contribuicoes"][1] == plano_trabalho.to_dict()["contribuicoes"][1]
+
+    def test_deveria_exigir_campos_sem_valor_padrao(self):
+        @dataclasses.dataclass()
+        class Obrigatorio(entities.BaseEntity):
+            codigo: str
+            total: int = dataclasses.field(default=0, init=False)
+
+        assert Obrigatorio("A") == Obrigatorio.from_dict({"codigo": "A", "total": 5})
+        with pytest.raises(TypeError):
+            Obrigatorio.from_dict({})
+
+
+class SlottedEntitiesTestCase(TestCase):
+    def test_deveria_existir_uma_variante_para_cada_entidade(self):
+        for entity, slotted_entity in entities.SLOTTED_ENTITIES.items():
+            assert f"Slotted{entity.__name__}" == slotted_entity.__name__
+            assert getattr(entities, slotted_entity.__name__) is slotted_entity
+            assert dataclasses.fields(entity) == dataclasses.fields(slotted_entity)
+            assert not hasattr(slotted_entity(), "__dict__")
+
+    def test_deveria_manter_o_comportamento_da_entidade(self):
+        plano_trabalho = build_plano_trabalho()
+        slotted = entities.SlottedPlanoDeTrabalho(**plano_trabalho.to_dict())
+
+        assert plano_trabalho.to_dict() == slotted.to_dict()
+        assert slotted == pickle.loads(pickle.dumps(slotted))
+        assert (
+            entities.SlottedPlanoDeTrabalho().contribuicoes
+            is not entities.SlottedPlanoDeTrabalho().contribuicoes
+        )
+        with pytest.raises(AttributeError):
+            slotted.campo_novo = "valor"
+
+    def test_from_dict_deveria_converter_itens_aninhados_nas_variantes(self):
+        data = build_plano_trabalho().to_dict()
+
+        slotted = entities.SlottedPlanoDeTrabalho.from_dict(data, nested=True)
+
+        assert all(
+            isinstance(contribuicao, entities.SlottedContribuicao)
+            for contribuicao in slotted.contribuicoes
+        )
+
+
+class InternTestCase(TestCase):
+    def test_deveria_internar_os_campos_repetidos(self):
+        data = {"origem_unidade": "".join(["SIA", "PE"]), "cpf": "".join(["1", "2"])}
+
+        participante = entities.SlottedParticipante.from_dict(data, intern=True)
+
+        assert participante.origem_unidade is sys.intern("SIAPE")
+        assert participante.cpf is data["cpf"]
+
+    def test_deveria_compartilhar_os_codigos_de_unidade(self):
+        primeiro = entities.SlottedParticipante.from_dict(
+            {"cod_unidade_lotacao": int("123456")}, intern=True
+        )
+        segundo = entities.SlottedParticipante.from_dict(
+            {"cod_unidade_lotacao": int("123456")}, intern=True
+        )
+
+        assert primeiro.cod_unidade_lotacao is segundo.cod_unidade_lotacao
+
+    def test_deveria_internar_os_itens_aninhados(self):
+        data = {"contribuicoes": [{"id_plano_entregas": "".join(["PE", "-1"])}]}
+
+        plano_trabalho = entities.PlanoDeTrabalho.from_dict(
+            data, nested=True, intern=True
+        )
+
+        id_plano_entregas = plano_trabalho.contribuicoes[0].id_plano_entregas
+        assert id_plano_entregas is sys.intern("PE-1")
+
+    def test_nao_deveria_internar_por_padrao(self):
+        data = {"origem_unidade": "".join(["SIA", "PE"])}
+
+        assert entities.User.from_dict(data).origem_unidade is data["origem_unidade"]
+
+
+class LazyEntityListTestCase(TestCase):
+    def setUp(self):
+        self.entregas = [{"id_entrega": f"E-{index}"} for index in range(5)]
+        self.data = {"id_plano_entregas": "PE-1", "entregas": self.entregas}
+
+    def test_deveria_converter_apenas_os_itens_lidos(self):
+        decode = mock.Mock(side_effect=entities.Entrega.from_dict)
+        entregas = serialization.LazyEntityList(self.entregas, decode)
+
+        assert entities.Entrega(id_entrega="E-1") == entregas[1]
+        assert entregas[1] is entregas[1]
+        assert entities.Entrega(id_entrega="E-4") == entregas[-1]
+        assert 5 == len(entregas)
+        assert 2 == decode.call_count
+
+    def test_from_dict_lazy_deveria_usar_a_lista_preguicosa(self):
+        plano_entregas = entities.PlanoDeEntregas.from_dict(self.data, lazy=True)
+
+        assert isinstance(plano_entregas.entregas, serialization.LazyEntityList)
+        assert isinstance(plano_entregas.entregas[0], entities.Entrega)
+        assert entities.PlanoDeEntregas(**self.data) == plano_entregas
+
+    def test_anotacao_deveria_aceitar_a_lista_preguicosa(self):
+        plano_entregas = entities.PlanoDeEntregas.from_dict(self.data, lazy=True)
+        hint = typing.get_type_hints(entities.PlanoDeEntregas)["entregas"]
+
+        assert isinstance(plano_entregas.entregas, MutableSequence)
+        assert MutableSequence[entities.Entrega] in typing.get_args(hint)
+
+    def test_deveria_serializar_sem_conversao_quando_nada_foi_lido(self):
+        plano_entregas = entities.PlanoDeEntregas.from_dict(self.data, lazy=True)
+
+        assert plano_entregas.to_dict()["entregas"] is self.entregas
+
+    def test_deveria_manter_chaves_desconhecidas_dos_itens_lidos(self):
+        self.entregas[0]["campo_novo"] = 1
+        self.entregas[1]["campo_novo"] = 2
+        plano_entregas = entities.PlanoDeEntregas.from_dict(self.data, lazy=True)
+
+        plano_entregas.entregas[0].nome_entrega = "Relatório"
+        entregas = plano_entregas.to_dict()["entregas"]
+
+        assert (1, "Relatório") == (
+            entregas[0]["campo_novo"],
+            entregas[0]["nome_entrega"],
+        )
+        assert 2 == entregas[1]["campo_novo"]
+
+    def test_deveria_serializar_com_pickle(self):
+        plano_entregas = entities.PlanoDeEntregas.from_dict(self.data, lazy=True)
+        plano_entregas.entregas[0]
+
+        copia = pickle.loads(pickle.dumps(plano_entregas))
+
+        assert plano_entregas == copia
+        assert entities.Entrega(id_entrega="E-4") == copia.entregas[4]
+
+    def test_deveria_serializar_as_alteracoes_dos_itens_lidos(self):
+        plano_entregas = entities.PlanoDeEntregas.from_dict(self.data, lazy=True)
+
+        plano_entregas.entregas[0].nome_entrega = "Relatório"
+        plano_entregas.entregas.append(entities.Entrega(id_entrega="E-5"))
+        del plano_entregas.entregas[1]
+        plano_entregas.entregas[1] = {"id_entrega": "E-9"}
+
+        assert [
+            entities.Entrega(id_entrega="E-0", nome_entrega="Relatório").to_dict(),
+            {"id_entrega": "E-9"},
+            {"id_entrega": "E-3"},
+            {"id_entrega": "E-4"},
+            entities.Entrega(id_entrega="E-5").to_dict(),
+        ] == plano_entregas.to_dict()["entregas"]
+        assert 5 == len(self.entregas)
+        assert [entities.Entrega(id_entrega="E-3")] == plano_entregas.entregas[2:3]
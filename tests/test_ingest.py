@@ -0,0 +1,183 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import pytest
+
+from api_pgd_client import client, entities, ingest, retries
+from api_pgd_client.testing import FakePgdApiServer
+
+CSV = (
+    "MATRICULA;CPF;LOTACAO;SITUACAO;MODALIDADE;ASSINATURA_TCR\n"
+    "1234567;12345678901;10;1;3;31/12/2024\n"
+    "7654321; 10987654321 ;20.0;0;;\n"
+)
+COLUMNS = {
+    "matricula_siape": "MATRICULA",
+    "cpf": "CPF",
+    "cod_unidade_lotacao": "LOTACAO",
+    "situacao": "SITUACAO",
+    "modalidade_execucao": "MODALIDADE",
+    "data_assinatura_tcr": "ASSINATURA_TCR",
+}
+
+
+class ReadCsvTestCase(TestCase):
+    def read(self, content, **kwargs):
+        return ingest.read_csv(
+            io.StringIO(content),
+            entities.Participante,
+            columns=COLUMNS,
+            converters={"data_assinatura_tcr": ingest.date_converter("%d/%m/%Y")},
+            delimiter=";",
+            **kwargs,
+        )
+
+    def test_deveria_converter_as_colunas_nos_campos(self):
+        participantes = list(self.read(CSV))
+
+        assert [
+            entities.Participante(
+                cpf="12345678901",
+                matricula_siape="1234567",
+                cod_unidade_lotacao=10,
+                situacao=1,
+                modalidade_execucao=3,
+                data_assinatura_tcr="2024-12-31",
+            ),
+            entities.Participante(
+                cpf="10987654321",
+                matricula_siape="7654321",
+                cod_unidade_lotacao=20,
+            ),
+        ] == participantes
+
+    def test_deveria_ler_uma_linha_por_vez(self):
+        rows = iter([{"id_plano_trabalho": "1"}, {"id_plano_trabalho": "2"}])
+        reader = ingest.EntityReader(entities.PlanoDeTrabalho, rows)
+        iterator = iter(reader)
+
+        next(iterator)
+
+        assert 1 == reader.read
+        assert [{"id_plano_trabalho": "2"}] == list(rows)
+
+    def test_deveria_informar_a_linha_invalida(self):
+        with pytest.raises(ValueError, match="Row 2: LOTACAO='x'"):
+            list(self.read(CSV.replace("20.0", "x")))
+
+    def test_deveria_pular_linhas_invalidas_com_on_error(self):
+        erros = []
+
+        def validate(participante):
+            if len(participante.cpf) != 11:
+                raise ValueError("CPF inválido")
+
+        reader = self.read(
+            CSV.replace("12345678901", "123"),
+            validate=validate,
+            on_error=lambda line, row, exc: erros.append((line, str(exc))),
+        )
+
+        assert ["7654321"] == [p.matricula_siape for p in reader]
+        assert [(1, "CPF inválido")] == erros
+        assert (2, 1) == (reader.read, reader.invalid)
+
+    def test_deveria_ler_arquivos_compactados(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "participantes.csv.gz")
+            with gzip.open(path, "wt", encoding="utf-8") as file:
+                file.write(CSV)
+
+            participantes = list(
+                ingest.read_csv(path, entities.Participante, COLUMNS, delimiter=";")
+            )
+
+        assert ["1234567", "7654321"] == [p.matricula_siape for p in participantes]
+
+
+class ReadJsonlTestCase(TestCase):
+    def test_deveria_converter_cada_linha(self):
+        lines = [
+            {"id_plano_trabalho": "1", "status": "3", "contribuicoes": "[]"},
+            {"id_plano_trabalho": "2", "contribuicoes": [{"id_contribuicao": "c"}]},
+        ]
+        content = "\n".join(json.dumps(line) for line in lines) + "\n\n"
+
+        planos = list(ingest.read_jsonl(io.StringIO(content), entities.PlanoDeTrabalho))
+
+        assert [
+            entities.PlanoDeTrabalho(id_plano_trabalho="1", status=3),
+            entities.PlanoDeTrabalho(
+                id_plano_trabalho="2", contribuicoes=[{"id_contribuicao": "c"}]
+            ),
+        ] == planos
+
+    def test_deveria_informar_linhas_que_nao_sao_objetos(self):
+        content = '{"id_plano_trabalho": "1"}\n\n{"id_plano_trabalho": \n[1]\n'
+        erros = []
+
+        reader = ingest.read_jsonl(
+            io.StringIO(content),
+            entities.PlanoDeTrabalho,
+            on_error=lambda line, row, exc: erros.append((line, row)),
+        )
+
+        assert ["1"] == [plano.id_plano_trabalho for plano in reader]
+        assert [(3, '{"id_plano_trabalho": \n'), (4, "[1]\n")] == erros
+        assert (3, 2) == (reader.read, reader.invalid)
+
+    def test_deveria_informar_a_linha_malformada(self):
+        content = '{"id_plano_trabalho": "1"}\n{"id_plano_trabalho"\n'
+
+        with pytest.raises(ValueError, match="Row 2: Expecting"):
+            list(ingest.read_jsonl(io.StringIO(content), entities.PlanoDeTrabalho))
+
+
+class SendTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api_client = client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=9,
+            retry_policy=retries.RetryPolicy(max_attempts=1),
+        )
+        self.addCleanup(self.api_client.close)
+
+    def test_deveria_enviar_o_que_foi_lido(self):
+        content = "id_plano_trabalho,status\n1,3\n2,x\n3,3\n4,3\n"
+        reader = ingest.read_csv(
+            io.StringIO(content),
+            entities.PlanoDeTrabalho,
+            on_error=lambda *args: None,
+        )
+        self.server.failures.append((422, {}))
+        falhas = []
+
+        stats = ingest.send(self.api_client, reader, 1, on_failure=falhas.append)
+
+        assert (2, 0, 1, 1) == stats
+        assert ["1"] == [falha.entity.id_plano_trabalho for falha in falhas]
+        assert {
+            "/organizacao/SIAPE/9/plano_trabalho/3",
+            "/organizacao/SIAPE/9/plano_trabalho/4",
+        } == set(self.server.resources)
+
+    def test_deveria_ler_apenas_o_necessario_a_frente(self):
+        lidos = []
+
+        def planos():
+            for index in range(20):
+                lidos.append(index)
+                yield entities.PlanoDeTrabalho(id_plano_trabalho=str(index))
+
+        results = self.api_client.enviar_em_fluxo(planos(), max_workers=2)
+        next(results)
+
+        assert len(lidos) <= 5
+        assert 19 == sum(result.success for result in results)
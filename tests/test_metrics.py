@@ -0,0 +1,184 @@
+import datetime
+import math
+from unittest import TestCase
+
+from api_pgd_client import client, metrics, namedtuples
+from api_pgd_client.testing import FakePgdApiServer
+
+
+def build_event(duration, status_code=200, **kwargs):
+    event = metrics.RequestEvent(
+        endpoint="plano_entregas", method="GET", url="url", attempt=1, **kwargs
+    )
+    event.status_code = status_code
+    event.send = duration
+    return event
+
+
+class LatencyHistogramTestCase(TestCase):
+    def setUp(self):
+        self.histogram = metrics.LatencyHistogram((0.1, 1.0))
+
+    def test_deveria_contar_por_faixa_cumulativa(self):
+        for duration in (0.05, 0.1, 0.5, 2.0):
+            self.histogram.observe(build_event(duration))
+
+        snapshot = self.histogram.snapshot()
+
+        assert ((0.1, 2), (1.0, 3), (math.inf, 4)) == snapshot.buckets
+        assert 4 == snapshot.count
+        assert 2.65 == round(snapshot.total, 2)
+
+    def test_deveria_interpolar_os_quantis(self):
+        for _ in range(10):
+            self.histogram.observe(build_event(0.5))
+
+        assert 0.55 == round(self.histogram.quantile(0.5), 2)
+        assert math.isnan(metrics.LatencyHistogram().quantile(0.5))
+
+    def test_deveria_contar_erros_e_bytes(self):
+        self.histogram.observe(build_event(0.5, 503, bytes_sent=10))
+        self.histogram.observe(build_event(0.5, 200, bytes_sent=5))
+
+        snapshot = self.histogram.snapshot()
+
+        assert (1, 15) == (snapshot.errors, snapshot.bytes_sent)
+
+
+class Response:
+    status_code = 200
+    content = b'{"ok": true}'
+    elapsed = datetime.timedelta(seconds=0.25)
+
+
+class InstrumentationTestCase(TestCase):
+    def test_deveria_separar_envio_e_recebimento(self):
+        instrumentation = metrics.Instrumentation()
+        event = instrumentation.start(
+            "get", "https://api/organizacao/SIAPE/1/plano_entregas/2", 1
+        )
+
+        instrumentation.finish(event, Response(), elapsed=1.0)
+
+        assert ("plano_entregas", "GET") == (event.endpoint, event.method)
+        assert (0.25, 0.75, 12) == (event.send, event.receive, event.bytes_received)
+        assert ["GET plano_entregas"] == list(instrumentation.stats())
+
+    def test_deveria_agrupar_caminhos_desconhecidos(self):
+        instrumentation = metrics.Instrumentation()
+
+        event = instrumentation.start("GET", "https://api/outro", 1, data=b"abc")
+
+        assert ("other", 3) == (event.endpoint, event.bytes_sent)
+
+
+class RecordingHook(metrics.Hook):
+    def __init__(self):
+        self.before = []
+        self.after = []
+
+    def before_request(self, event):
+        self.before.append((event.method, event.endpoint, event.status_code))
+
+    def after_request(self, event):
+        self.after.append(event)
+
+
+class ApiClientInstrumentacaoTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.hook = RecordingHook()
+        self.api_client = client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            instrumentation=metrics.Instrumentation([self.hook]),
+        )
+        self.addCleanup(self.api_client.close)
+        self.server.resources["/organizacao/SIAPE/999/plano_entregas/1"] = {
+            "id_plano_entregas": "1"
+        }
+
+    def test_deveria_chamar_os_ganchos_antes_e_depois(self):
+        self.api_client.consultar_plano_entregas("1")
+
+        assert [("POST", "token", None), ("GET", "plano_entregas", None)] == (
+            self.hook.before
+        )
+        token, consulta = self.hook.after
+        assert 200 == consulta.status_code
+        assert consulta.bytes_received > 0
+        assert consulta.token_wait >= token.duration
+        assert 0 == token.token_wait
+
+    def test_nao_deveria_falhar_a_requisicao_por_um_gancho_com_erro(self):
+        class FailingHook(metrics.Hook):
+            def before_request(self, event):
+                raise RuntimeError("antes")
+
+            def after_request(self, event):
+                raise RuntimeError("depois")
+
+        self.api_client.instrumentation.add_hook(FailingHook())
+
+        with self.assertLogs("api_pgd_client.metrics", "ERROR") as logs:
+            plano_entregas = self.api_client.consultar_plano_entregas("1")
+            with self.assertRaises(client.ApiClient.Error) as context:
+                self.api_client.consultar_plano_entregas("2")
+
+        assert "1" == plano_entregas.id_plano_entregas
+        assert 404 == context.exception.status_code
+        assert 4 <= len(logs.records)
+
+    def test_deveria_informar_o_erro_da_tentativa(self):
+        with self.assertRaises(client.ApiClient.Error):
+            self.api_client.consultar_plano_entregas("2")
+
+        assert 404 == self.hook.after[-1].status_code
+        assert 1 == self.api_client.stats().latency["GET plano_entregas"].errors
+
+    def test_deveria_reunir_as_estatisticas_do_cliente(self):
+        self.api_client.consultar_plano_entregas("1")
+
+        stats = self.api_client.stats()
+
+        assert {"POST token", "GET plano_entregas"} == set(stats.latency)
+        assert 1 == stats.latency["GET plano_entregas"].count
+        assert stats.response_cache is None
+        assert stats.retry_budget is not None
+
+    def test_deveria_exportar_no_formato_do_prometheus(self):
+        self.api_client.consultar_plano_entregas("1")
+
+        texto = self.api_client.export_prometheus()
+
+        assert "# TYPE pgd_api_request_duration_seconds histogram" in texto
+        assert (
+            'pgd_api_request_duration_seconds_bucket{endpoint="plano_entregas",'
+            'method="GET",le="+Inf"} 1'
+        ) in texto
+        assert (
+            'pgd_api_request_duration_seconds_count{endpoint="token",method="POST"} 1'
+        ) in texto
+        assert "pgd_api_retry_budget_tokens " in texto
+        assert texto.endswith("\n")
+
+
+class RenderPrometheusTestCase(TestCase):
+    def test_deveria_exportar_os_componentes_presentes(self):
+        stats = namedtuples.ClientStats(
+            latency={},
+            response_cache=namedtuples.CacheStats(1, 2, 0, 0, 1, 10),
+            conditional_cache=None,
+            coalescing=None,
+            concurrency=None,
+            retry_budget=None,
+        )
+
+        texto = metrics.render_prometheus(stats)
+
+        assert "# TYPE pgd_api_response_cache_hits_total counter\n" in texto
+        assert "pgd_api_response_cache_hits_total 1\n" in texto
+        assert "# TYPE pgd_api_response_cache_size gauge\n" in texto
+        assert "pgd_api_request_duration_seconds_bucket" not in texto
@@ -0,0 +1,248 @@
+import os
+import sqlite3
+import tempfile
+import time
+from unittest import TestCase, mock
+
+import pytest
+import requests
+
+from api_pgd_client import client, entities, outbox, retries
+from api_pgd_client.testing import FakePgdApiServer
+
+
+class SqliteOutboxStoreTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "outbox.db")
+        self.store = outbox.SqliteOutboxStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_deveria_entregar_na_ordem_e_remover_ao_confirmar(self):
+        self.store.put("PlanoDeTrabalho", {"id_plano_trabalho": "1"}, key="url-1")
+        self.store.put("PlanoDeTrabalho", {"id_plano_trabalho": "2"}, key="url-2")
+
+        items = self.store.claim(10, lease=60)
+        self.store.ack(items)
+
+        assert [{"id_plano_trabalho": "1"}, {"id_plano_trabalho": "2"}] == [
+            item.data for item in items
+        ]
+        assert [1, 1] == [item.attempts for item in items]
+        assert (0, 0, 0) == self.store.stats()
+
+    def test_deveria_reentregar_o_que_nao_foi_confirmado_apos_o_prazo(self):
+        self.store.put("PlanoDeTrabalho", {"id_plano_trabalho": "1"}, key="url")
+        self.store.claim(10, lease=60)
+
+        assert [] == self.store.claim(10, lease=60)
+        # A crash: another connection finds the item once its lease is over.
+        self.store.close()
+        self.store = outbox.SqliteOutboxStore(self.path)
+        self.store._connection.execute("UPDATE outbox SET available_at = 0")
+
+        items = self.store.claim(10, lease=60)
+        assert [("url", 2)] == [(item.key, item.attempts) for item in items]
+
+    def test_deveria_substituir_o_que_ainda_nao_foi_enviado(self):
+        self.store.put("PlanoDeTrabalho", {"status": 1}, key="url")
+        self.store.put("PlanoDeTrabalho", {"status": 2}, key="url")
+
+        items = self.store.claim(10, lease=60)
+
+        assert [({"status": 2}, 2)] == [(item.data, item.version) for item in items]
+
+    def test_deveria_enviar_de_novo_o_que_mudou_durante_o_envio(self):
+        self.store.put("PlanoDeTrabalho", {"status": 1}, key="url")
+        items = self.store.claim(10, lease=60)
+        self.store.put("PlanoDeTrabalho", {"status": 2}, key="url")
+
+        self.store.ack(items)
+
+        assert [{"status": 2}] == [item.data for item in self.store.claim(10, 60)]
+
+    def test_deveria_adiar_e_descartar_falhas(self):
+        self.store.put("PlanoDeTrabalho", {"status": 1}, key="url-1")
+        self.store.put("PlanoDeTrabalho", {"status": 2}, key="url-2")
+        primeiro, segundo = self.store.claim(10, lease=0)
+
+        self.store.retry(primeiro, 60, "503")
+        self.store.fail(segundo, "422")
+
+        assert (1, 0, 1) == self.store.stats()
+        assert [] == self.store.claim(10, lease=0)
+        assert [("url-2", "422")] == [
+            (item.key, item.last_error) for item in self.store.dead_letters()
+        ]
+        assert 1 == self.store.requeue_dead_letters()
+        assert ["url-2"] == [item.key for item in self.store.claim(10, lease=0)]
+
+    def test_deveria_sinalizar_quando_houver_itens(self):
+        self.store.claim(10, lease=60)
+        assert not self.store.ready.is_set()
+
+        self.store.put("PlanoDeTrabalho", {}, key="url")
+
+        assert self.store.ready.is_set()
+
+
+class OutboxDrainerTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = outbox.SqliteOutboxStore(os.path.join(directory.name, "o.db"))
+        self.addCleanup(self.store.close)
+        self.api_client = client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            outbox_store=self.store,
+            retry_policy=retries.RetryPolicy(max_attempts=1),
+        )
+        self.addCleanup(self.api_client.close)
+        self.drainer = outbox.OutboxDrainer(
+            self.api_client, batch_size=2, max_attempts=2, backoff_base=0
+        )
+
+    def build_planos(self, count):
+        return [
+            entities.PlanoDeTrabalho(id_plano_trabalho=str(index), status=3)
+            for index in range(count)
+        ]
+
+    def get_path(self, id_plano_trabalho):
+        return f"/organizacao/SIAPE/999/plano_trabalho/{id_plano_trabalho}"
+
+    def test_deveria_enviar_o_que_foi_enfileirado(self):
+        for plano_trabalho in self.build_planos(5):
+            self.api_client.enfileirar(plano_trabalho)
+        self.api_client.enfileirar(
+            entities.Participante(cod_unidade_lotacao=1, matricula_siape="1234567")
+        )
+
+        assert 6 == self.drainer.drain()
+
+        assert 3 == self.server.resources[self.get_path("4")]["status"]
+        assert "/organizacao/SIAPE/999/1/participante/1234567" in self.server.resources
+        assert (6, 0, 0) == self.drainer.stats()
+        assert (0, 0, 0) == self.store.stats()
+
+    def test_deveria_tentar_novamente_falhas_temporarias(self):
+        self.api_client.enfileirar(self.build_planos(1)[0])
+        self.server.failures.append((503, {}))
+
+        assert 2 == self.drainer.drain()
+
+        assert self.get_path("0") in self.server.resources
+        assert (1, 1, 0) == self.drainer.stats()
+
+    def test_deveria_descartar_o_que_a_api_recusar(self):
+        self.api_client.enfileirar(self.build_planos(1)[0])
+        self.server.failures.append((422, {}))
+
+        self.drainer.drain()
+
+        assert (0, 0, 1) == self.drainer.stats()
+        dead_letters = self.store.dead_letters()
+        assert ["PlanoDeTrabalho"] == [item.kind for item in dead_letters]
+        assert "422" in dead_letters[0].last_error
+
+    def test_deveria_desistir_apos_o_maximo_de_tentativas(self):
+        self.api_client.enfileirar(self.build_planos(1)[0])
+        self.server.failures.extend([(503, {})] * 2)
+
+        self.drainer.drain()
+
+        assert (0, 1, 1) == self.drainer.stats()
+        assert 1 == self.store.stats().dead
+
+    def test_nao_deveria_tentar_novamente_erros_sem_resposta_da_api(self):
+        self.api_client.enfileirar(self.build_planos(1)[0])
+        erro = self.api_client.build_error("Endpoint malformed")
+
+        with mock.patch.object(self.api_client, "enviar", side_effect=erro):
+            self.drainer.drain()
+
+        assert (0, 0, 1) == self.drainer.stats()
+        assert "Endpoint malformed" == self.store.dead_letters()[0].last_error
+
+    def test_deveria_tentar_novamente_erros_de_conexao(self):
+        self.api_client.enfileirar(self.build_planos(1)[0])
+        erro = requests.ConnectionError("recusada")
+
+        with mock.patch.object(self.api_client, "enviar", side_effect=erro):
+            self.drainer.drain_once()
+
+        assert (0, 1, 0) == self.drainer.stats()
+
+    def test_deveria_continuar_em_segundo_plano_apos_um_erro(self):
+        claim = self.store.claim
+        erros = [sqlite3.OperationalError("database is locked")]
+
+        def claim_com_erro(*args):
+            if erros:
+                raise erros.pop()
+            return claim(*args)
+
+        self.drainer.poll_interval = 0.01
+        self.api_client.enfileirar(self.build_planos(1)[0])
+        with mock.patch.object(self.store, "claim", side_effect=claim_com_erro):
+            with self.assertLogs("api_pgd_client.outbox", "ERROR"):
+                with self.drainer:
+                    limite = time.monotonic() + 5
+                    while self.drainer.stats().sent < 1 and time.monotonic() < limite:
+                        time.sleep(0.01)
+
+        assert 1 == self.drainer.stats().sent
+        assert [] == erros
+
+    def test_deveria_enviar_em_segundo_plano(self):
+        with self.drainer:
+            for plano_trabalho in self.build_planos(3):
+                self.api_client.enfileirar(plano_trabalho)
+            limite = time.monotonic() + 5
+            while self.drainer.stats().sent < 3 and time.monotonic() < limite:
+                time.sleep(0.01)
+
+        assert 3 == self.drainer.stats().sent
+        assert 0 == self.store.stats().pending
+
+    def test_deveria_exigir_um_outbox(self):
+        api_client = client.ApiClient(domain=self.server.url)
+        self.addCleanup(api_client.close)
+
+        with pytest.raises(client.ApiClient.Error):
+            api_client.enfileirar(self.build_planos(1)[0])
+        with pytest.raises(ValueError):
+            outbox.OutboxDrainer(api_client)
+
+
+class ApiClientEnviarTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.api_client = client.ApiClient(
+            domain=self.server.url, origem_unidade="SIAPE", cod_unidade_autorizadora=9
+        )
+        self.addCleanup(self.api_client.close)
+
+    def test_deveria_enviar_qualquer_entidade(self):
+        self.api_client.enviar(entities.SlottedPlanoDeEntregas(id_plano_entregas="1"))
+        results = self.api_client.enviar_em_lote(
+            [entities.PlanoDeTrabalho(id_plano_trabalho="2")]
+        )
+
+        assert [True] == [result.success for result in results]
+        assert {
+            "/organizacao/SIAPE/9/plano_entregas/1",
+            "/organizacao/SIAPE/9/plano_trabalho/2",
+        } == set(self.server.resources)
+
+    def test_nao_deveria_enviar_entidades_sem_endpoint(self):
+        with pytest.raises(client.ApiClient.Error):
+            self.api_client.enviar(entities.User(email="fulano@gestao.gov.br"))
@@ -0,0 +1,128 @@
+import time
+from unittest import TestCase, mock
+
+from api_pgd_client import client, entities, metrics, profiling
+from api_pgd_client.testing import FakePgdApiServer
+
+
+class ProfilerTestCase(TestCase):
+    def setUp(self):
+        self.profiler = profiling.Profiler()
+
+    def test_deveria_somar_o_tempo_de_cada_etapa(self):
+        self.profiler.count_call()
+        self.profiler.count_call()
+        self.profiler.record("to_dict", 0.1)
+        self.profiler.record("to_dict", 0.3)
+        self.profiler.record(profiling.NETWORK_STAGE, 1.6)
+
+        report = self.profiler.report()
+
+        assert 2 == report.calls
+        assert ["network", "to_dict"] == list(report.stages)
+        to_dict = report.stages["to_dict"]
+        assert (2, 0.4, 0.2, 0.2) == (
+            to_dict.count,
+            round(to_dict.total, 2),
+            round(to_dict.per_call, 2),
+            round(to_dict.share, 2),
+        )
+        assert (0.4, 0.2) == (
+            round(report.overhead, 2),
+            round(report.overhead_share, 2),
+        )
+
+    def test_deveria_registrar_fila_e_rede_dos_eventos(self):
+        event = metrics.RequestEvent(
+            endpoint="plano_entregas", method="GET", url="url", attempt=1
+        )
+        event.queue_wait = 0.5
+        event.send = 0.25
+        token = metrics.RequestEvent(
+            endpoint="token", method="POST", url="url", attempt=1
+        )
+
+        self.profiler.after_request(event)
+        self.profiler.after_request(token)
+
+        stages = self.profiler.report().stages
+        assert {"queue": (1, 0.5), "network": (1, 0.25)} == {
+            name: (stats.count, stats.total) for name, stats in stages.items()
+        }
+
+    def test_nao_deveria_medir_sem_profiler(self):
+        with profiling.stage(None, "to_dict"):
+            pass
+
+        with profiling.stage(self.profiler, "to_dict"):
+            pass
+
+        assert 1 == self.profiler.report().stages["to_dict"].count
+
+    def test_deveria_zerar_o_relatorio(self):
+        self.profiler.count_call()
+        self.profiler.record("decode", 0.1)
+
+        self.profiler.reset()
+
+        assert (0, {}) == (self.profiler.report().calls, self.profiler.report().stages)
+
+
+class ApiClientProfilerTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.profiler = profiling.Profiler()
+        self.api_client = client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            profiler=self.profiler,
+        )
+        self.addCleanup(self.api_client.close)
+
+    def test_deveria_medir_as_etapas_de_envio_e_consulta(self):
+        plano_entregas = entities.PlanoDeEntregas(id_plano_entregas="1", status=2)
+
+        self.api_client.enviar_plano_entregas(plano_entregas)
+        self.api_client.consultar_plano_entregas("1")
+
+        report = self.profiler.report()
+        assert 2 == report.calls
+        assert {
+            "endpoint",
+            "token",
+            "headers",
+            "to_dict",
+            "encode",
+            "decode",
+            "from_dict",
+            "queue",
+            "network",
+        } == set(report.stages)
+        assert 2 == report.stages["network"].count
+        assert report.stages["token"].total > 0
+        assert 0 < report.overhead_share < 1
+        assert "2 calls" in self.profiler.format_report()
+
+    def test_deveria_medir_o_tempo_para_obter_o_token(self):
+        get_token = self.api_client.get_token
+
+        def slow_get_token():
+            time.sleep(0.05)
+            return get_token()
+
+        with mock.patch.object(self.api_client, "get_token", slow_get_token):
+            self.api_client.enviar_plano_entregas(
+                entities.PlanoDeEntregas(id_plano_entregas="1")
+            )
+
+        stages = self.profiler.report().stages
+        assert stages["token"].total >= 0.05
+        assert stages["headers"].total < 0.05
+
+    def test_nao_deveria_ter_profiler_por_padrao(self):
+        api_client = client.ApiClient(domain=self.server.url)
+        self.addCleanup(api_client.close)
+
+        assert api_client.profiler is None
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import threading
+from unittest import TestCase
+
+from api_pgd_client import ratelimit
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTestCase(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = ratelimit.TokenBucket(rate=2, burst=2, clock=self.clock)
+
+    def test_deveria_liberar_a_rajada_sem_espera(self):
+        assert [0, 0] == [self.bucket.reserve(), self.bucket.reserve()]
+
+    def test_deveria_espacar_as_requisicoes_apos_a_rajada(self):
+        self.bucket.reserve()
+        self.bucket.reserve()
+
+        assert [0.5, 1.0, 1.5] == [self.bucket.reserve() for _ in range(3)]
+
+    def test_deveria_repor_as_fichas_com_o_tempo(self):
+        self.bucket.reserve()
+        self.bucket.reserve()
+        self.clock.now += 0.5
+
+        assert 0 == self.bucket.reserve()
+        assert 0.5 == self.bucket.reserve()
+
+    def test_nao_deveria_acumular_acima_da_rajada(self):
+        self.clock.now += 60
+
+        delays = [self.bucket.reserve() for _ in range(3)]
+
+        assert [0, 0, 0.5] == delays
+
+    def test_deveria_devolver_as_fichas_de_quem_desistiu(self):
+        self.bucket.reserve()
+        self.bucket.reserve()
+        assert 0.5 == self.bucket.reserve()
+
+        self.bucket.refund()
+
+        assert 0.5 == self.bucket.reserve()
+
+    def test_deveria_usar_um_segundo_de_requisicoes_como_rajada_padrao(self):
+        assert 5 == ratelimit.TokenBucket(rate=5).burst
+        assert 1 == ratelimit.TokenBucket(rate=0.2).burst
+
+    def test_deveria_ser_compartilhado_entre_threads(self):
+        delays = []
+        lock = threading.Lock()
+
+        def reserve():
+            delay = self.bucket.reserve()
+            with lock:
+                delays.append(delay)
+
+        threads = [threading.Thread(target=reserve) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [0, 0] + [0.5 * i for i in range(1, 9)] == sorted(delays)
+
+
+class FileTokenBucketTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "rate_limit.json")
+        self.clock = FakeClock()
+
+    def build_bucket(self, name="reads"):
+        return ratelimit.FileTokenBucket(
+            self.path, rate=2, burst=2, name=name, clock=self.clock
+        )
+
+    def test_deveria_compartilhar_o_balde_entre_instancias(self):
+        primeiro = self.build_bucket()
+        segundo = self.build_bucket()
+
+        delays = [primeiro.reserve(), segundo.reserve(), primeiro.reserve()]
+
+        assert [0, 0, 0.5] == delays
+
+    def test_deveria_manter_baldes_separados_por_nome(self):
+        leituras = self.build_bucket("reads")
+        escritas = self.build_bucket("writes")
+        leituras.reserve()
+        leituras.reserve()
+
+        assert 0 == escritas.reserve()
+        assert 0.5 == leituras.reserve()
+
+    def test_deveria_devolver_as_fichas_de_quem_desistiu(self):
+        primeiro = self.build_bucket()
+        segundo = self.build_bucket()
+        primeiro.reserve()
+        primeiro.reserve()
+        assert 0.5 == primeiro.reserve()
+
+        primeiro.refund()
+
+        assert 0.5 == segundo.reserve()
+
+    def test_deveria_recomecar_cheio_se_o_arquivo_estiver_corrompido(self):
+        with open(self.path, "w") as bucket_file:
+            bucket_file.write("{")
+
+        assert 0 == self.build_bucket().reserve()
+
+
+class BuildRateLimiterTestCase(TestCase):
+    def test_nao_deveria_limitar_sem_taxa(self):
+        assert ratelimit.build_rate_limiter(0, "reads") is None
+
+    def test_deveria_usar_o_arquivo_quando_informado(self):
+        limiter = ratelimit.build_rate_limiter(
+            10, "reads", burst=3, path="/tmp/rate_limit.json"
+        )
+
+        assert isinstance(limiter, ratelimit.FileTokenBucket)
+        assert (10, 3, "reads") == (limiter.rate, limiter.burst, limiter.name)
+
+    def test_deveria_usar_o_balde_em_memoria_por_padrao(self):
+        limiter = ratelimit.build_rate_limiter(10, "writes", path="")
+
+        assert isinstance(limiter, ratelimit.TokenBucket)
+        assert 10 == limiter.burst
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import TestCase, mock
+
+from api_pgd_client import retries
+
+
+class RetryBudgetTestCase(TestCase):
+    def test_deveria_limitar_as_retentativas_ao_saldo(self):
+        budget = retries.RetryBudget(ratio=0.5, max_tokens=2)
+
+        assert budget.withdraw()
+        assert budget.withdraw()
+        assert not budget.withdraw()
+
+        budget.deposit()
+        assert not budget.withdraw()
+        budget.deposit()
+        assert budget.withdraw()
+
+    def test_nao_deveria_acumular_acima_do_maximo(self):
+        budget = retries.RetryBudget(ratio=1, max_tokens=2)
+
+        for _ in range(5):
+            budget.deposit()
+
+        assert 2 == budget.tokens
+
+
+class RetryPolicyTestCase(TestCase):
+    def setUp(self):
+        self.policy = retries.RetryPolicy(
+            max_attempts=3, backoff_base=0.5, backoff_max=4, retry_after_max=60
+        )
+
+    def test_deveria_sortear_o_atraso_ate_o_teto_exponencial(self):
+        with mock.patch("api_pgd_client.retries.random.uniform") as mock_uniform:
+            mock_uniform.side_effect = lambda low, high: high
+
+            assert [0.5, 1, 2, 4, 4] == [
+                self.policy.get_delay(attempt) for attempt in range(1, 6)
+            ]
+
+    def test_deveria_respeitar_o_retry_after_em_segundos(self):
+        assert 7 == self.policy.get_delay(1, "7")
+
+    def test_deveria_respeitar_o_retry_after_em_data(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+        delay = self.policy.get_delay(1, format_datetime(retry_at, usegmt=True))
+
+        assert 25 < delay <= 30
+
+    def test_deveria_ignorar_retry_after_invalido(self):
+        assert retries.parse_retry_after("amanhã") is None
+
+    def test_nao_deveria_tentar_novamente_apos_o_maximo_de_tentativas(self):
+        assert self.policy.should_retry(2, 1)
+        assert not self.policy.should_retry(3, 1)
+
+    def test_nao_deveria_esperar_mais_que_o_retry_after_maximo(self):
+        assert not self.policy.should_retry(1, 61)
+
+    def test_deveria_classificar_os_status(self):
+        assert self.policy.is_retryable_status(429)
+        assert self.policy.is_retryable_status(503)
+        assert not self.policy.is_retryable_status(500)
+        assert not self.policy.is_retryable_status(404)
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import threading
+from unittest import TestCase
+
+from api_pgd_client import state
+
+
+class ContentDigestTestCase(TestCase):
+    def test_deveria_ignorar_a_ordem_das_chaves(self):
+        primeiro = {"a": 1, "b": [{"c": 2, "d": 3}]}
+        segundo = {"b": [{"d": 3, "c": 2}], "a": 1}
+
+        assert state.content_digest(primeiro) == state.content_digest(segundo)
+
+    def test_deveria_mudar_quando_o_conteudo_mudar(self):
+        assert state.content_digest({"a": 1}) != state.content_digest({"a": 2})
+        assert state.content_digest({"a": [1, 2]}) != state.content_digest(
+            {"a": [2, 1]}
+        )
+
+
+class SqliteStateStoreTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "state.db")
+        self.store = state.SqliteStateStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_deveria_salvar_substituir_e_descartar_o_hash(self):
+        assert self.store.get("url") is None
+
+        self.store.set("url", "hash-1")
+        self.store.set("url", "hash-2")
+        assert "hash-2" == self.store.get("url")
+
+        self.store.discard("url")
+        assert self.store.get("url") is None
+
+    def test_deveria_persistir_entre_conexoes_em_modo_wal(self):
+        self.store.set("url", "hash")
+
+        outro = state.SqliteStateStore(self.path)
+        try:
+            assert "hash" == outro.get("url")
+            journal_mode = outro._connection.execute("PRAGMA journal_mode").fetchone()
+            assert ("wal",) == journal_mode
+        finally:
+            outro.close()
+
+    def test_deveria_aceitar_chamadas_de_varias_threads(self):
+        threads = [
+            threading.Thread(target=self.store.set, args=(f"url-{i}", f"hash-{i}"))
+            for i in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert all(self.store.get(f"url-{i}") == f"hash-{i}" for i in range(20))
@@ -0,0 +1,137 @@
+from unittest import TestCase, mock
+
+import pytest
+
+from api_pgd_client import client, entities, retries
+from api_pgd_client.testing import FakePgdApiServer
+
+
+class FakePgdApiServerTestCase(TestCase):
+    def start_server(self, **kwargs):
+        server = FakePgdApiServer(**kwargs).__enter__()
+        self.addCleanup(server.__exit__, None, None, None)
+        api_client = client.ApiClient(
+            domain=server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            retry_policy=retries.RetryPolicy(max_attempts=3),
+        )
+        self.addCleanup(api_client.close)
+        return server, api_client
+
+    def get_requests(self, server, method_name):
+        return [request for request in server.requests if request[0] == method_name]
+
+    def test_deveria_guardar_o_que_for_enviado(self):
+        server, api_client = self.start_server()
+
+        api_client.enviar_plano_entregas(
+            entities.PlanoDeEntregas(id_plano_entregas="1", status=2)
+        )
+
+        assert 2 == api_client.consultar_plano_entregas("1").status
+        assert (
+            2 == server.resources["/organizacao/SIAPE/999/plano_entregas/1"]["status"]
+        )
+
+    def test_deveria_consultar_usuario(self):
+        server, api_client = self.start_server()
+        server.resources["/user/fulano@gestao.gov.br"] = {
+            "email": "fulano@gestao.gov.br",
+            "origem_unidade": "SIAPE",
+            "cod_unidade_autorizadora": 999,
+        }
+
+        user = api_client.consultar_usuario("fulano@gestao.gov.br")
+
+        assert "fulano@gestao.gov.br" == user.email
+
+    def test_deveria_responder_404_fora_das_rotas_da_api(self):
+        server, api_client = self.start_server()
+
+        with pytest.raises(client.ApiClient.Error) as exc_info:
+            api_client.do_get(f"{server.url}/outro", {}, api_client.default_headers)
+
+        assert 404 == exc_info.value.status_code
+
+    def test_deveria_renovar_o_token_expirado(self):
+        server, api_client = self.start_server()
+        server.resources["/organizacao/SIAPE/999/plano_entregas/1"] = {
+            "id_plano_entregas": "1"
+        }
+        api_client.consultar_plano_entregas("1")
+
+        server.expire_tokens()
+        api_client.enviar_plano_entregas(
+            entities.PlanoDeEntregas(id_plano_entregas="1", status=3)
+        )
+
+        assert 2 == len(self.get_requests(server, "POST"))
+        assert (
+            3 == server.resources["/organizacao/SIAPE/999/plano_entregas/1"]["status"]
+        )
+
+    def test_deveria_recusar_credenciais_invalidas(self):
+        server, api_client = self.start_server(credentials={"fulano": "senha"})
+
+        with pytest.raises(client.ApiClient.Error) as exc_info:
+            api_client.consultar_plano_entregas("1")
+
+        assert 401 == exc_info.value.status_code
+
+    def test_deveria_responder_304_com_o_mesmo_etag(self):
+        server, api_client = self.start_server()
+        path = "/organizacao/SIAPE/999/plano_entregas/1"
+        server.resources[path] = {"id_plano_entregas": "1"}
+        headers = api_client.default_headers
+        response = api_client.transport.request(
+            "GET", f"{server.url}{path}", headers=headers
+        )
+
+        headers["If-None-Match"] = response.headers["ETag"]
+        revalidated = api_client.transport.request(
+            "GET", f"{server.url}{path}", headers=headers
+        )
+
+        assert (200, 304) == (response.status_code, revalidated.status_code)
+
+    @mock.patch("api_pgd_client.client.time.sleep")
+    def test_deveria_limitar_as_requisicoes_por_segundo(self, mock_sleep):
+        server, api_client = self.start_server(rate_limit=1)
+        server.resources["/organizacao/SIAPE/999/plano_entregas/1"] = {
+            "id_plano_entregas": "1"
+        }
+        server.resources["/organizacao/SIAPE/999/plano_entregas/2"] = {
+            "id_plano_entregas": "2"
+        }
+        api_client.consultar_plano_entregas("1")
+
+        with pytest.raises(client.ApiClient.Error) as exc_info:
+            api_client.consultar_plano_entregas("2")
+
+        assert 429 == exc_info.value.status_code
+        assert [mock.call(1.0)] * 2 == mock_sleep.call_args_list
+        assert 4 == len(self.get_requests(server, "GET"))
+
+    def test_deveria_injetar_erros_na_proporcao_pedida(self):
+        server, api_client = self.start_server(error_rate=1, error_status_code=500)
+
+        with pytest.raises(client.ApiClient.Error) as exc_info:
+            api_client.do_put(
+                f"{server.url}/organizacao/SIAPE/999/plano_entregas/1",
+                {},
+                api_client.default_headers,
+            )
+
+        assert 500 == exc_info.value.status_code
+        assert {} == server.resources
+
+    def test_deveria_contar_as_requisicoes_simultaneas(self):
+        server, api_client = self.start_server(latency=lambda in_flight: 0.01)
+        server.resources["/organizacao/SIAPE/999/plano_entregas/1"] = {
+            "id_plano_entregas": "1"
+        }
+
+        api_client.consultar_plano_entregas("1")
+
+        assert (0, 1) == (server.in_flight, server.max_in_flight)
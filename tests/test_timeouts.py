@@ -0,0 +1,94 @@
+import threading
+from unittest import TestCase, mock
+
+from api_pgd_client import constants, namedtuples, timeouts
+from api_pgd_client.constants import endpoints
+
+
+class TimeoutTestCase(TestCase):
+    def setUp(self):
+        self.overrides = timeouts.as_timeouts(
+            {"token": 5, "PUT plano_entregas": (3, 600), "plano_entregas": 30}
+        )
+
+    def test_deveria_usar_o_numero_como_timeout_de_leitura(self):
+        assert (constants.CONNECT_TIMEOUT, 5) == timeouts.as_timeout(5)
+        assert (2, 5) == timeouts.as_timeout((2, 5))
+
+    def test_deveria_preferir_o_timeout_do_metodo_e_endpoint(self):
+        url = "https://api/organizacao/SIAPE/1/plano_entregas/2"
+
+        assert (3, 600) == timeouts.get_timeout(self.overrides, "PUT", url)
+        assert (constants.CONNECT_TIMEOUT, 30) == timeouts.get_timeout(
+            self.overrides, "GET", url
+        )
+        assert (constants.CONNECT_TIMEOUT, 5) == timeouts.get_timeout(
+            self.overrides, "POST", "https://api/token"
+        )
+
+    def test_deveria_usar_o_padrao_para_os_demais_endpoints(self):
+        assert timeouts.DEFAULT_TIMEOUT == timeouts.get_timeout(
+            self.overrides, "GET", "https://api/user/a@b.c"
+        )
+        assert timeouts.DEFAULT_TIMEOUT == timeouts.get_timeout(
+            self.overrides, "GET", "https://api/outro"
+        )
+
+    def test_deveria_identificar_o_endpoint_pelo_caminho(self):
+        assert "participante" == endpoints.match_endpoint_name(
+            "/organizacao/SIAPE/1/2/participante/3"
+        )
+        assert "users" == endpoints.match_endpoint_name("/users")
+        assert endpoints.match_endpoint_name("/organizacao/SIAPE") is None
+
+
+class DeadlineTestCase(TestCase):
+    def setUp(self):
+        patcher = mock.patch("api_pgd_client.timeouts.time.monotonic")
+        self.monotonic = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.monotonic.return_value = 100.0
+        self.timeout = namedtuples.Timeout(10, 300)
+
+    def test_nao_deveria_limitar_sem_prazo(self):
+        assert timeouts.remaining_time() is None
+        assert self.timeout == timeouts.get_attempt_timeout(self.timeout, 3)
+        assert timeouts.fits_deadline(1000)
+
+    def test_deveria_dividir_o_tempo_restante_entre_as_tentativas(self):
+        with timeouts.deadline(60):
+            assert (10, 20) == timeouts.get_attempt_timeout(self.timeout, 3)
+            self.monotonic.return_value = 155.0
+            assert (5, 5) == timeouts.get_attempt_timeout(self.timeout, 1)
+
+    def test_deveria_indicar_o_prazo_esgotado(self):
+        with timeouts.deadline(60):
+            self.monotonic.return_value = 160.0
+
+            assert timeouts.get_attempt_timeout(self.timeout, 1) is None
+            assert not timeouts.fits_deadline(0)
+
+    def test_prazo_interno_nao_deveria_estender_o_externo(self):
+        with timeouts.deadline(10):
+            with timeouts.deadline(60):
+                assert 10 == timeouts.remaining_time()
+            with timeouts.deadline(5):
+                assert 5 == timeouts.remaining_time()
+        assert timeouts.remaining_time() is None
+
+    def test_deveria_levar_o_prazo_para_outras_threads(self):
+        remaining = []
+
+        with timeouts.deadline(30):
+            deadline_at = timeouts.get_deadline()
+
+        def run():
+            with timeouts.deadline_at(deadline_at):
+                remaining.append(timeouts.remaining_time())
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+
+        assert [30] == remaining
+        assert 20 == timeouts.get_deadline(20) - 100
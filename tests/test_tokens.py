@@ -0,0 +1,237 @@
+import base64
+import json
+import multiprocessing
+import os
+import stat
+import tempfile
+import threading
+import time
+from unittest import TestCase, mock
+
+import pytest
+
+from api_pgd_client import tokens
+
+
+def build_jwt(exp):
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    return ".".join(
+        [encode({"alg": "HS256", "typ": "JWT"}), encode({"exp": exp}), "assinatura"]
+    )
+
+
+def build_token(exp, name="token"):
+    return {"access_token": build_jwt(exp), "token_type": "Bearer", "name": name}
+
+
+class DecodeExpirationTestCase(TestCase):
+    def test_deveria_ler_o_exp_do_jwt(self):
+        assert 1_700_000_000.0 == tokens.decode_expiration(build_token(1_700_000_000))
+
+    def test_deveria_usar_expires_in_quando_nao_for_jwt(self):
+        with mock.patch("api_pgd_client.tokens.time.time", return_value=1000.0):
+            expiration = tokens.decode_expiration(
+                {"access_token": "opaco", "expires_in": 300}
+            )
+        assert 1300.0 == expiration
+
+    def test_deveria_retornar_none_quando_nao_houver_expiracao(self):
+        assert tokens.decode_expiration({"access_token": "a.b.c"}) is None
+        assert tokens.decode_expiration({"access_token": "opaco"}) is None
+        assert tokens.decode_expiration(mock.Mock()) is None
+
+
+class TokenManagerTestCase(TestCase):
+    def setUp(self):
+        self.now = time.time()
+        self.fetch = mock.Mock(return_value=build_token(self.now + 3600, "novo"))
+        self.manager = tokens.TokenManager(self.fetch, refresh_margin=60)
+
+    def test_deveria_buscar_o_token_na_primeira_chamada(self):
+        assert self.fetch.return_value == self.manager.get()
+        assert self.fetch.return_value == self.manager.get()
+        self.fetch.assert_called_once_with()
+        assert self.now + 3600 == self.manager.expires_at
+
+    def test_deveria_buscar_um_unico_token_para_chamadas_simultaneas(self):
+        iniciado = threading.Event()
+
+        def slow_fetch():
+            iniciado.set()
+            time.sleep(0.05)
+            return build_token(self.now + 3600)
+
+        self.fetch.side_effect = slow_fetch
+        resultados = []
+        threads = [
+            threading.Thread(target=lambda: resultados.append(self.manager.get()))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.fetch.assert_called_once_with()
+        assert 20 == len(resultados)
+        assert all(resultado is resultados[0] for resultado in resultados)
+
+    def test_deveria_buscar_novo_token_quando_expirado(self):
+        self.manager.set(build_token(self.now - 1, "expirado"))
+        assert "novo" == self.manager.get()["name"]
+        self.fetch.assert_called_once_with()
+
+    def test_deveria_renovar_em_segundo_plano_antes_de_expirar(self):
+        prestes_a_expirar = build_token(self.now + 30, "atual")
+        self.manager.set(prestes_a_expirar)
+        with mock.patch("api_pgd_client.tokens.threading.Thread") as mock_thread:
+            token = self.manager.get()
+        assert token is prestes_a_expirar
+        mock_thread.assert_called_once_with(
+            target=self.manager._background_refresh, daemon=True
+        )
+
+        self.manager._background_refresh()
+
+        assert "novo" == self.manager.get()["name"]
+        self.fetch.assert_called_once_with()
+
+    def test_nao_deveria_repetir_a_renovacao_em_segundo_plano_apos_falha(self):
+        prestes_a_expirar = build_token(self.now + 30, "atual")
+        self.manager.set(prestes_a_expirar)
+        self.fetch.side_effect = Exception("Falha de rede")
+        with mock.patch("api_pgd_client.tokens.threading.Thread") as mock_thread:
+            self.manager.get()
+            self.manager._background_refresh()
+            assert self.manager.get() is prestes_a_expirar
+        mock_thread.assert_called_once()
+
+    def test_invalidate_deveria_descartar_apenas_o_token_que_falhou(self):
+        antigo = build_token(self.now + 3600, "antigo")
+        atual = build_token(self.now + 3600, "atual")
+        self.manager.set(atual)
+
+        self.manager.invalidate(antigo)
+        assert self.manager.current is atual
+
+        self.manager.invalidate(atual)
+        assert {} == self.manager.current
+
+    def test_invalidate_nao_deveria_descartar_nada_sem_token(self):
+        atual = build_token(self.now + 3600, "atual")
+        self.manager.set(atual)
+
+        self.manager.invalidate({})
+
+        assert self.manager.current is atual
+
+    def test_deveria_propagar_erro_e_liberar_outras_chamadas(self):
+        self.fetch.side_effect = [Exception("Falha"), build_token(self.now + 3600)]
+        with self.assertRaises(Exception):
+            self.manager.get()
+        assert self.manager.get()
+        assert 2 == self.fetch.call_count
+
+
+def fetch_in_process(store_path, counter_path, expiration, queue):
+    def fetch():
+        with open(counter_path, "a") as counter:
+            counter.write("fetch\n")
+        time.sleep(0.05)
+        return build_token(expiration, f"processo-{os.getpid()}")
+
+    manager = tokens.TokenManager(fetch, store=tokens.FileTokenStore(store_path))
+    queue.put(manager.get()["name"])
+
+
+class FileTokenStoreTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "token.json")
+        self.store = tokens.FileTokenStore(self.path)
+        self.now = time.time()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_deveria_retornar_vazio_quando_nao_houver_token(self):
+        assert ({}, None) == self.store.load()
+
+    def test_deveria_salvar_e_carregar_o_token_com_a_expiracao(self):
+        token = build_token(self.now + 3600)
+        self.store.save(token, self.now + 3600)
+
+        assert (token, self.now + 3600) == self.store.load()
+        assert 0o600 == stat.S_IMODE(os.stat(self.path).st_mode)
+
+    def test_discard_deveria_remover_apenas_o_token_informado(self):
+        token = build_token(self.now + 3600, "salvo")
+        self.store.save(token, None)
+
+        self.store.discard(build_token(self.now + 1, "outro"))
+        assert token == self.store.load()[0]
+
+        self.store.discard(dict(token))
+        assert ({}, None) == self.store.load()
+
+    def test_discard_nao_deveria_remover_o_arquivo_sem_token(self):
+        token = build_token(self.now + 3600, "salvo")
+        self.store.save(token, None)
+
+        self.store.discard({})
+
+        assert token == self.store.load()[0]
+
+    def test_gerenciadores_deveriam_compartilhar_o_token_salvo(self):
+        fetch = mock.Mock(return_value=build_token(self.now + 3600, "compartilhado"))
+        primeiro = tokens.TokenManager(fetch, store=self.store)
+        segundo = tokens.TokenManager(mock.Mock(), store=self.store)
+
+        assert primeiro.get() == segundo.get()
+        fetch.assert_called_once_with()
+        segundo._fetch.assert_not_called()
+        assert self.now + 3600 == segundo.expires_at
+
+    def test_deveria_buscar_novo_token_quando_o_salvo_estiver_expirando(self):
+        self.store.save(build_token(self.now + 10, "antigo"), self.now + 10)
+        fetch = mock.Mock(return_value=build_token(self.now + 3600, "novo"))
+        manager = tokens.TokenManager(fetch, refresh_margin=60, store=self.store)
+
+        assert "novo" == manager.get()["name"]
+        assert "novo" == self.store.load()[0]["name"]
+
+    def test_invalidate_deveria_descartar_o_token_salvo(self):
+        fetch = mock.Mock(return_value=build_token(self.now + 3600))
+        manager = tokens.TokenManager(fetch, store=self.store)
+        token = manager.get()
+
+        manager.invalidate(token)
+
+        assert ({}, None) == self.store.load()
+
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(),
+        reason="fork indisponível",
+    )
+    def test_processos_deveriam_buscar_um_unico_token(self):
+        counter_path = os.path.join(self.directory.name, "fetches")
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        processes = [
+            context.Process(
+                target=fetch_in_process,
+                args=(self.path, counter_path, self.now + 3600, queue),
+            )
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        nomes = {queue.get(timeout=10) for _ in processes}
+        for process in processes:
+            process.join()
+
+        with open(counter_path) as counter:
+            assert 1 == len(counter.readlines())
+        assert 1 == len(nomes)
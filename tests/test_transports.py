@@ -0,0 +1,220 @@
+import json
+import os
+import tempfile
+from unittest import TestCase, mock
+
+import pytest
+import requests
+
+from api_pgd_client import client, constants, entities, retries, transports
+from api_pgd_client.testing import FakePgdApiServer
+
+
+class SessionTransportTestCase(TestCase):
+    def setUp(self):
+        self.transport = transports.SessionTransport(
+            pool_connections=2, pool_maxsize=20, idle_timeout=30
+        )
+        self.url = "http://example.com"
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_deveria_configurar_o_pool_de_conexoes(self):
+        for prefix in ("http://", "https://"):
+            adapter = self.transport.session.get_adapter(prefix)
+            assert 2 == adapter._pool_connections
+            assert 20 == adapter._pool_maxsize
+
+    def test_deveria_reutilizar_a_mesma_sessao_entre_requisicoes(self):
+        with mock.patch.object(self.transport.session, "request") as mock_request:
+            self.transport.request("get", self.url, timeout=1)
+            self.transport.request("put", self.url, timeout=1)
+        mock_request.assert_has_calls(
+            [
+                mock.call("GET", self.url, timeout=1),
+                mock.call("PUT", self.url, timeout=1),
+            ]
+        )
+
+    def test_deveria_descartar_conexoes_ociosas(self):
+        with (
+            mock.patch.object(self.transport.session, "request"),
+            mock.patch.object(
+                self.transport, "evict_idle_connections"
+            ) as mock_evict_idle_connections,
+            mock.patch(
+                "api_pgd_client.transports.time.monotonic",
+                side_effect=[100.0, 100.0, 100.0, 100.0],
+            ),
+        ):
+            self.transport._last_used = 0.0
+            self.transport.request("get", self.url)
+        mock_evict_idle_connections.assert_called_once_with()
+
+    def test_nao_deveria_descartar_conexoes_em_uso(self):
+        with (
+            mock.patch.object(self.transport.session, "request"),
+            mock.patch.object(
+                self.transport, "evict_idle_connections"
+            ) as mock_evict_idle_connections,
+        ):
+            self.transport.request("get", self.url)
+        mock_evict_idle_connections.assert_not_called()
+
+    def test_evict_idle_connections_deveria_fechar_os_adapters(self):
+        adapter = self.transport.session.get_adapter(self.url)
+        with mock.patch.object(adapter, "close") as mock_close:
+            self.transport.evict_idle_connections()
+        assert mock_close.called
+
+    def test_deveria_fechar_a_sessao_ao_sair_do_contexto(self):
+        with mock.patch.object(self.transport.session, "close") as mock_close:
+            with self.transport as transport:
+                assert transport is self.transport
+        mock_close.assert_called_once_with()
+
+
+class ApiClientTransportTestCase(TestCase):
+    def test_deveria_criar_um_transporte_proprio_sob_demanda(self):
+        api_client = client.ApiClient()
+        transport = api_client.transport
+        assert isinstance(transport, transports.SessionTransport)
+        assert transport is api_client.transport
+
+    def test_close_deveria_fechar_o_transporte_proprio(self):
+        with client.ApiClient() as api_client:
+            transport = api_client.transport
+            with mock.patch.object(transport, "close") as mock_close:
+                api_client.close()
+        mock_close.assert_called_once_with()
+
+    def test_close_nao_deveria_fechar_transporte_recebido(self):
+        transport = mock.Mock(spec=transports.BaseTransport)
+        with client.ApiClient(transport=transport) as api_client:
+            assert api_client.transport is transport
+        transport.close.assert_not_called()
+
+
+class RecordReplayTransportTestCase(TestCase):
+    def setUp(self):
+        self.server = FakePgdApiServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.server.resources["/organizacao/SIAPE/999/plano_entregas/1"] = {
+            "id_plano_entregas": "1",
+            "status": 2,
+        }
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cassette.jsonl.gz")
+
+    def build_client(self, transport):
+        return client.ApiClient(
+            domain=self.server.url,
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            transport=transport,
+            retry_policy=retries.RetryPolicy(max_attempts=1),
+        )
+
+    def record(self):
+        with transports.RecordingTransport(self.path) as transport:
+            api_client = self.build_client(transport)
+            api_client.consultar_plano_entregas("1")
+            api_client.enviar_plano_entregas(
+                entities.PlanoDeEntregas(id_plano_entregas="1", status=3)
+            )
+            return api_client.consultar_plano_entregas("1")
+
+    def read_cassette(self):
+        with transports.open_cassette(self.path, "r") as file:
+            return [json.loads(line) for line in file]
+
+    def test_deveria_gravar_as_interacoes_sem_credenciais(self):
+        self.record()
+
+        interactions = self.read_cassette()
+
+        assert ["POST", "GET", "PUT", "GET"] == [
+            interaction["key"].split()[0] for interaction in interactions
+        ]
+        token = json.loads(interactions[0]["content"])
+        assert transports.RECORDED_TOKEN == token["access_token"]
+        assert constants.API_PASSWORD not in json.dumps(interactions)
+        assert interactions[2]["request_bytes"] > 0
+        assert all(interaction["elapsed"] >= 0 for interaction in interactions)
+
+    def test_deveria_reproduzir_sem_acessar_a_api(self):
+        recorded = self.record()
+        self.server.resources.clear()
+
+        transport = transports.ReplayTransport(self.path)
+        api_client = self.build_client(transport)
+
+        assert 2 == api_client.consultar_plano_entregas("1").status
+        api_client.enviar_plano_entregas(
+            entities.PlanoDeEntregas(id_plano_entregas="1", status=3)
+        )
+        assert recorded == api_client.consultar_plano_entregas("1")
+        assert 0 == transport.unplayed
+        assert 4 == len(self.server.requests)
+
+    def test_deveria_repetir_a_ultima_resposta_quando_acabarem(self):
+        self.record()
+        api_client = self.build_client(transports.ReplayTransport(self.path))
+
+        statuses = [api_client.consultar_plano_entregas("1").status for _ in range(3)]
+
+        assert [2, 3, 3] == statuses
+
+    def test_deveria_recusar_requisicao_nao_gravada(self):
+        self.record()
+        api_client = self.build_client(
+            transports.ReplayTransport(self.path, strict=True)
+        )
+        api_client.consultar_plano_entregas("1")
+        api_client.consultar_plano_entregas("1")
+
+        with pytest.raises(LookupError):
+            api_client.consultar_plano_entregas("1")
+        with pytest.raises(LookupError):
+            api_client.consultar_plano_entregas("2")
+
+    def test_deveria_reproduzir_erros_http_e_de_conexao(self):
+        self.server.failures.append((503, {}))
+        with transports.RecordingTransport(self.path) as transport:
+            api_client = self.build_client(transport)
+            with pytest.raises(client.ApiClient.Error):
+                api_client.consultar_plano_entregas("1")
+            with pytest.raises(requests.ConnectionError):
+                transport.request("GET", "http://127.0.0.1:1/", timeout=1)
+        api_client = self.build_client(transports.ReplayTransport(self.path))
+
+        with pytest.raises(client.ApiClient.Error) as exc_info:
+            api_client.consultar_plano_entregas("1")
+        with pytest.raises(requests.ConnectionError):
+            api_client.transport.request("GET", "http://127.0.0.1:1/")
+
+        assert 503 == exc_info.value.status_code
+
+    def test_deveria_respeitar_a_velocidade_gravada(self):
+        self.record()
+        interactions = self.read_cassette()
+        transport = transports.ReplayTransport(self.path, speed=2)
+
+        with mock.patch("api_pgd_client.transports.time.sleep") as mock_sleep:
+            response = transport.request("POST", f"{self.server.url}/token")
+            with pytest.raises(requests.ReadTimeout):
+                transport.request(
+                    "GET",
+                    f"{self.server.url}/organizacao/SIAPE/999/plano_entregas/1",
+                    params={},
+                    timeout=(1, 0),
+                )
+
+        assert [
+            mock.call(interactions[0]["elapsed"] / 2),
+            mock.call(0.0),
+        ] == mock_sleep.call_args_list
+        assert 200 == response.status_code
+        assert "OK" == response.reason
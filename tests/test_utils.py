@@ -1,7 +1,14 @@
+import datetime
+import decimal
+import json
 from collections import namedtuple
-from unittest import TestCase
+from unittest import TestCase, mock
+
+import pytest
 
 from api_pgd_client.namedtuples import HeaderItem
+from api_pgd_client.utils import encoding
+from api_pgd_client.utils.endpoints import compile_path
 from api_pgd_client.utils.headers import create_headers_with
 
 
@@ -45,3 +52,103 @@ class CreateHeadersWithTestCase(TestCase):
             "All header items should be a api_pgd_client.namedtuples.HeaderItem object",
             str(context.exception),
         )
+
+
+class CompilePathTestCase(TestCase):
+    def setUp(self):
+        self.path = "/organizacao/{origem_unidade}/{cod_unidade_autorizadora}/plano_trabalho/{id_plano_trabalho}"
+        self.build_path = compile_path(self.path)
+
+    def test_deveria_montar_o_caminho_como_str_format(self):
+        params = {
+            "origem_unidade": "SIAPE",
+            "cod_unidade_autorizadora": 999,
+            "id_plano_trabalho": "abc-123",
+        }
+        self.assertEqual(self.path.format(**params), self.build_path(**params))
+
+    def test_deveria_ignorar_parametros_extras(self):
+        build_path = compile_path("/user/{email}")
+        self.assertEqual(
+            "/user/fulano@mail.com", build_path(email="fulano@mail.com", extra=1)
+        )
+
+    def test_deveria_codificar_os_parametros(self):
+        path = self.build_path(
+            origem_unidade="SIAPE",
+            cod_unidade_autorizadora=999,
+            id_plano_trabalho="2024/01 ?#%",
+        )
+        self.assertEqual(
+            "/organizacao/SIAPE/999/plano_trabalho/2024%2F01%20%3F%23%25", path
+        )
+
+    def test_deveria_preservar_literais_com_porcentagem(self):
+        build_path = compile_path("/a%20b/{nome}")
+        self.assertEqual("/a%20b/x", build_path(nome="x"))
+
+    def test_deveria_lancar_key_error_quando_faltar_parametro(self):
+        with self.assertRaises(KeyError):
+            self.build_path(origem_unidade="SIAPE")
+
+    def test_deveria_distinguir_valores_iguais_de_tipos_diferentes(self):
+        build_path = compile_path("/plano/{id}", maxsize=2)
+
+        assert ["/plano/1", "/plano/True", "/plano/1.0", "/plano/1"] == [
+            build_path(id=value) for value in (1, True, 1.0, 1)
+        ]
+
+    def test_deveria_montar_caminhos_sem_parametros(self):
+        self.assertEqual("/token", compile_path("/token")(extra=1))
+
+    def test_deveria_rejeitar_parametros_formatados(self):
+        with pytest.raises(ValueError, match="Unsupported path parameter"):
+            compile_path("/plano/{id:>10}")
+        with pytest.raises(ValueError, match="Unsupported path parameter"):
+            compile_path("/plano/{}")
+
+
+class EncodeJsonTestCase(TestCase):
+    def setUp(self):
+        self.data = {
+            "id_plano_trabalho": "2025-0001",
+            "data_inicio": datetime.date(2025, 1, 31),
+            "atualizado_em": datetime.datetime(2025, 1, 31, 8, 30),
+            "percentual": decimal.Decimal("12.50"),
+            "contribuicoes": [{"id_contribuicao": "c1", "tipo_contribuicao": 1}],
+            "nome_unidade": "Coordenação",
+        }
+        self.expected = json.loads(json.dumps(self.data, default=str))
+
+    def test_deveria_gerar_bytes_utf8_equivalentes_ao_default_str(self):
+        encoded = encoding.encode_json(self.data)
+
+        assert isinstance(encoded, bytes)
+        assert self.expected == json.loads(encoded.decode("utf-8"))
+
+    def test_modulo_json_deveria_gerar_o_mesmo_conteudo(self):
+        with mock.patch.object(encoding, "HAS_ORJSON", False):
+            encoded = encoding.encode_json(self.data)
+
+        assert self.expected == json.loads(encoded)
+        assert "Coordenação".encode() in encoded
+
+    def test_modulo_json_deveria_rejeitar_nan(self):
+        with mock.patch.object(encoding, "HAS_ORJSON", False):
+            with pytest.raises(ValueError):
+                encoding.encode_json({"valor": float("nan")})
+
+    @pytest.mark.skipif(not encoding.HAS_ORJSON, reason="orjson not installed")
+    def test_orjson_deveria_rejeitar_nan_e_infinito(self):
+        for valor in (float("nan"), float("inf")):
+            with pytest.raises(ValueError):
+                encoding.encode_json({"itens": [{"valor": valor}]})
+
+        assert b'{"valor":null}' == encoding.encode_json({"valor": None})
+
+    def test_decode_json_deveria_ler_bytes(self):
+        content = '{"nome": "Coordenação"}'.encode()
+
+        assert {"nome": "Coordenação"} == encoding.decode_json(content)
+        with mock.patch.object(encoding, "HAS_ORJSON", False):
+            assert {"nome": "Coordenação"} == encoding.decode_json(content)